@@ -0,0 +1,63 @@
+"""
+CertiWipe - Trustworthy IT Asset Recycling
+Importable secure wipe engine, history store and certificate generation
+"""
+
+from .device import DEFAULT_TARGET, TARGET_TYPES
+from .history import HISTORY_FILE, HistoryStore
+from .journal import JOURNAL_DIR, JobJournal, pending_journals
+from .manifest import MANIFEST_DIR, WipeManifest, check_proof
+from .methods import DEFAULT_WIPE_METHOD, WIPE_METHODS, PassPlan, WipePass, get_pass_plan
+from .metrics import PHASES, JobProfiler, WipeMetrics
+from .patterns import (DEFAULT_RANDOM_PATTERN, RANDOM_PATTERNS, FixedBytePattern,
+                       KeystreamPattern, NumpyRandomPattern, PatternGenerator, RepeatingPattern,
+                       SecureRandomPattern, create_random_pattern)
+from .pipeline import DEFAULT_RING_DEPTH, GeneratorPool, SharedMemoryPipeline, WritePipeline
+from .planner import PROFILE_FILE, ThroughputProfiles, plan_wipe
+from .progress import ProgressReporter
+from .selection import Selection
+from .signing import KEY_FILE, check_signature, load_key, sign
+from .sync import DEFAULT_SYNC_POLICY, SYNC_POLICIES, SyncPolicy, create_sync_policy
+from .utils import format_size
+from .verify import DEFAULT_VERIFY_MODE, VERIFY_MODES, VerificationError, Verifier
+from .writer import AUTO_STORAGE_TYPE, STORAGE_BLOCK_SIZES
+
+__version__ = '1.1.0'
+
+__all__ = [
+    'AUTO_STORAGE_TYPE', 'CERTIFICATE_DIR', 'DEFAULT_RANDOM_PATTERN', 'DEFAULT_RING_DEPTH',
+    'DEFAULT_SYNC_POLICY', 'DEFAULT_TARGET', 'DEFAULT_VERIFY_MODE', 'DEFAULT_WIPE_METHOD',
+    'HISTORY_FILE', 'JOURNAL_DIR', 'KEY_FILE', 'MANIFEST_DIR', 'PHASES', 'PROFILE_FILE',
+    'RANDOM_PATTERNS', 'STORAGE_BLOCK_SIZES', 'SYNC_POLICIES', 'TARGET_TYPES', 'VERIFY_MODES',
+    'WIPE_METHODS',
+    'FixedBytePattern', 'GeneratorPool', 'HistoryStore', 'JobJournal', 'JobProfiler',
+    'KeystreamPattern', 'NumpyRandomPattern', 'PassPlan', 'PatternGenerator',
+    'ProgressReporter', 'RepeatingPattern', 'SecureRandomPattern', 'Selection',
+    'SharedMemoryPipeline', 'SyncPolicy', 'ThroughputProfiles', 'VerificationError',
+    'Verifier', 'WipeEngine', 'WipeManifest', 'WipeMetrics', 'WipePass', 'WritePipeline',
+    'build_certificate', 'check_proof', 'check_signature', 'create_random_pattern',
+    'create_sync_policy', 'dry_run', 'format_size', 'get_pass_plan', 'load_key',
+    'pending_journals', 'plan_wipe', 'render_certificate', 'sign', 'verify_certificates',
+    'wipe', 'write_certificate',
+]
+
+
+# Loaded on first access so that importing the package (and CLI start) stays fast
+_LAZY_ATTRIBUTES = {
+    'WipeEngine': 'engine',
+    'dry_run': 'engine',
+    'wipe': 'engine',
+    'verify_certificates': 'audit',
+    'CERTIFICATE_DIR': 'certificate',
+    'build_certificate': 'certificate',
+    'render_certificate': 'certificate',
+    'write_certificate': 'certificate',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        module = importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
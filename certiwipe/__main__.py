@@ -0,0 +1,6 @@
+import sys
+
+from .cli import main
+
+if __name__ == '__main__':  # Generator processes import the main module again
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Certificate audit
+Verify batches of destruction certificates in parallel against their signature and the history
+"""
+
+import os
+import json
+from collections import defaultdict
+
+from .certificate import certificate_digest, render_certificate, text_certificate_path
+from .signing import check_signature
+
+PARALLEL_THRESHOLD = 64    # Smaller batches are checked in-process
+
+
+def find_certificates(paths):
+    """certificate_data_*.json files given directly or found under directories"""
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            found += [os.path.join(root, name) for name in sorted(files)
+                      if name.startswith('certificate_data_') and name.endswith('.json')]
+    return found
+
+
+def check_certificate(json_path, key):
+    """Check one certificate on its own: parse, signature and printable copy"""
+    result = {'path': json_path, 'certificate_id': None, 'operation_id': None, 'problems': []}
+    problems = result['problems']
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            cert_data = json.load(f)
+        result['certificate_id'] = cert_data['certificate_id']
+        result['operation_id'] = cert_data['operation_id']
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        problems.append(f"unreadable certificate data ({e})")
+        return result
+    
+    result['digest'] = certificate_digest(cert_data)
+    result['method'] = cert_data.get('method')
+    result['total_size'] = cert_data.get('total_size')
+    result['item_count'] = cert_data.get('item_count', len(cert_data.get('items', [])))
+    result['manifest_root'] = (cert_data.get('manifest') or {}).get('root')
+    
+    problem = check_signature(cert_data, key)
+    if problem:
+        problems.append(problem)
+    
+    try:
+        with open(text_certificate_path(json_path), 'r', encoding='utf-8') as f:
+            text = f.read()
+    except OSError:
+        problems.append("printable certificate is missing")
+    else:
+        try:
+            expected = render_certificate(cert_data)
+        except (KeyError, TypeError, ValueError) as e:
+            problems.append(f"incomplete certificate data ({e})")
+        else:
+            if text != expected:
+                problems.append("printable certificate does not match its data")
+    return result
+
+
+_worker_key = None
+
+
+def _init_worker(key):
+    global _worker_key
+    _worker_key = key
+
+
+def _check_in_worker(json_path):
+    return check_certificate(json_path, _worker_key)
+
+
+def cross_check(results, history=None):
+    """Checks across the batch and against the history's certificate index
+    
+    Certificate ids must be unique in the batch, each certificate must be in
+    the index with the same digest it was issued with, and its operation must
+    exist with the same method, size, item count and manifest root.
+    """
+    checked = [result for result in results if result['certificate_id'] is not None]
+    
+    by_id = defaultdict(list)
+    for result in checked:
+        by_id[result['certificate_id']].append(result)
+    for copies in by_id.values():
+        for result in copies[1:]:
+            if result['digest'] == copies[0]['digest']:
+                result['problems'].append(f"duplicate of {copies[0]['path']}")
+            else:
+                result['problems'].append(f"certificate id also used by {copies[0]['path']} "
+                                          "with different content")
+    
+    if history is None:
+        return results
+    index = history.certificates(result['certificate_id'] for result in checked)
+    operations = history.get_many(result['operation_id'] for result in checked)
+    for result in checked:
+        problems = result['problems']
+        entry = index.get(result['certificate_id'])
+        if entry is None:
+            problems.append("not in the certificate index")
+        elif entry['operation_id'] != result['operation_id']:
+            problems.append(f"issued for operation {entry['operation_id']}")
+        elif entry['digest'] != result['digest']:
+            problems.append("differs from the certificate as issued")
+        
+        operation = operations.get(result['operation_id'])
+        if operation is None:
+            problems.append(f"operation {result['operation_id']} is not in the history")
+            continue
+        recorded = {
+            'method': operation['method'],
+            'total_size': operation.get('total_size'),
+            'item_count': len(operation.get('successful_items', [])),
+            'manifest_root': (operation.get('manifest') or {}).get('root'),
+        }
+        for field, value in recorded.items():
+            if result[field] != value:
+                problems.append(f"{field.replace('_', ' ')} differs from the history "
+                                f"({result[field]} != {value})")
+    return results
+
+
+def verify_certificates(paths, key, history=None, workers=None):
+    """Verify every certificate in paths, returning one result per file
+    
+    Each result has the path, certificate and operation id and a list of
+    problems - empty for a valid certificate. The per-file checks (parsing,
+    HMAC, re-rendering the printable copy) run in a process pool; the batch
+    and history checks then need one indexed query per 500 certificates.
+    """
+    files = find_certificates(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(files) > PARALLEL_THRESHOLD:
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, min(256, len(files) // (workers * 4)))
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(key,)) as pool:
+            results = list(pool.map(_check_in_worker, files, chunksize=chunksize))
+    else:
+        results = [check_certificate(path, key) for path in files]
+    return cross_check(results, history)
@@ -0,0 +1,231 @@
+"""
+Benchmark suite
+Reproducible synthetic trees wiped with every method, block size and sync policy
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+from datetime import datetime
+
+from .pipeline import DEFAULT_RING_DEPTH, generator_processes
+from .writer import MIB
+
+KIB = 1024
+FILL_BLOCK = bytes(range(256)) * (4 * KIB)    # 1 MiB of filler for synthetic files
+REGRESSION_THRESHOLD = 0.10                   # Relative slowdown reported by compare()
+CASE_FIELDS = ('scenario', 'method', 'block_size', 'sync_policy', 'ring_depth',
+               'generator_processes')
+
+
+def _write_file(path, size, data_ranges=None):
+    """Create a file of size bytes; with data_ranges only those are written (sparse)"""
+    with open(path, 'wb') as f:
+        if data_ranges is None:
+            data_ranges = [(0, size)]
+        else:
+            f.truncate(size)
+        for offset, length in data_ranges:
+            f.seek(offset)
+            while length > 0:
+                count = min(length, len(FILL_BLOCK))
+                f.write(FILL_BLOCK[:count])
+                length -= count
+
+
+def _tiny_files(root, rng, scale):
+    for index in range(int(2000 * scale)):
+        folder = os.path.join(root, f"d{index % 20:02d}")
+        os.makedirs(folder, exist_ok=True)
+        _write_file(os.path.join(folder, f"f{index:05d}"), rng.randint(1, 4 * KIB))
+
+
+def _mixed_sizes(root, rng, scale):
+    for index in range(int(200 * scale)):
+        folder = os.path.join(root, f"d{index % 10}")
+        os.makedirs(folder, exist_ok=True)
+        size = int(2 ** rng.uniform(10, 24))    # 1 KiB - 16 MiB, log-uniform
+        _write_file(os.path.join(folder, f"f{index:04d}"), size)
+
+
+def _huge_files(root, rng, scale):
+    for index in range(2):
+        _write_file(os.path.join(root, f"huge{index}"), int(256 * MIB * scale))
+
+
+def _sparse_files(root, rng, scale):
+    for index in range(2):
+        size = int(4096 * MIB * scale)
+        ranges = sorted(rng.randrange(0, size - 8 * MIB) // (64 * KIB) * (64 * KIB)
+                        for _ in range(8))
+        _write_file(os.path.join(root, f"sparse{index}"), size,
+                    [(offset, 4 * MIB) for offset in ranges])
+
+
+def _deep_tree(root, rng, scale):
+    for branch in range(int(10 * scale) or 1):
+        folder = root
+        for depth in range(40):
+            folder = os.path.join(folder, f"b{branch}l{depth}")
+            os.makedirs(folder)
+            _write_file(os.path.join(folder, "f"), rng.randint(1, 64 * KIB))
+
+
+# Synthetic trees: name -> builder(root, rng, scale)
+SCENARIOS = {
+    'tiny-files': _tiny_files,
+    'mixed-sizes': _mixed_sizes,
+    'huge-files': _huge_files,
+    'sparse-files': _sparse_files,
+    'deep-tree': _deep_tree,
+}
+
+
+def build_tree(scenario, root, seed=0, scale=1.0):
+    """Create a scenario's tree under root, identical for the same seed and scale"""
+    os.makedirs(root, exist_ok=True)
+    SCENARIOS[scenario](root, random.Random(f"{scenario}:{seed}"), scale)
+    files = logical = 0
+    for folder, _, names in os.walk(root):
+        files += len(names)
+        logical += sum(os.path.getsize(os.path.join(folder, name)) for name in names)
+    return files, logical
+
+
+def read_process_io():
+    """Syscall and storage counters from /proc/self/io (empty where unavailable)"""
+    try:
+        with open('/proc/self/io') as f:
+            return {name: int(value) for name, value in
+                    (line.split(':') for line in f if ':' in line)}
+    except OSError:
+        return {}
+
+
+def _cpu_times():
+    try:
+        import resource
+    except ImportError:
+        times = os.times()
+        return times.user, times.system, 0, 0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime, usage.ru_stime, usage.ru_nvcsw, usage.ru_nivcsw
+
+
+def run_case(scenario, method, block_size, sync_policy, directory, seed=0, scale=1.0,
+             ring_depth=DEFAULT_RING_DEPTH, processes=0):
+    """Build a scenario tree, wipe it and return the measurements
+    
+    processes is the engine's generator_processes (0: generation in threads).
+    """
+    from .engine import WipeEngine
+    
+    root = tempfile.mkdtemp(prefix=f"{scenario}-", dir=directory)
+    files, logical = build_tree(scenario, root, seed, scale)
+    engine = WipeEngine(method, sync_policy=sync_policy, block_size=block_size,
+                        ring_depth=ring_depth, generator_processes=processes)
+    
+    io_before = read_process_io()
+    user, system, voluntary, involuntary = _cpu_times()
+    started = time.perf_counter()
+    operation = engine.wipe([root])
+    seconds = time.perf_counter() - started
+    user_after, system_after, voluntary_after, involuntary_after = _cpu_times()
+    io_after = read_process_io()
+    
+    def io_delta(name):
+        return io_after[name] - io_before[name] if name in io_before else None
+    
+    written = engine.progress.snapshot()['bytes_written']
+    return {
+        'scenario': scenario,
+        'method': method,
+        'block_size': block_size,
+        'sync_policy': sync_policy,
+        'ring_depth': ring_depth,
+        'generator_processes': generator_processes(engine.generator_processes),
+        'status': operation['status'],
+        'files': files,
+        'logical_bytes': logical,
+        'allocated_bytes': operation.get('allocated_size'),
+        'bytes_written': written,
+        'seconds': round(seconds, 4),
+        'mb_per_s': round(written / MIB / seconds, 2) if seconds else None,
+        'files_per_s': round(files / seconds, 1) if seconds else None,
+        'cpu_user': round(user_after - user, 4),
+        'cpu_system': round(system_after - system, 4),
+        'context_switches': (voluntary_after - voluntary) + (involuntary_after - involuntary),
+        'read_syscalls': io_delta('syscr'),
+        'write_syscalls': io_delta('syscw'),
+        'storage_write_bytes': io_delta('write_bytes'),
+        'phases': operation.get('phases'),
+    }
+
+
+# Reports from before a field was measured ran with its default
+CASE_DEFAULTS = {'ring_depth': DEFAULT_RING_DEPTH, 'generator_processes': 0}
+
+
+def case_key(result):
+    return tuple(result.get(field, CASE_DEFAULTS.get(field)) for field in CASE_FIELDS)
+
+
+def run_suite(scenarios, methods, block_sizes, sync_policies, directory=None, seed=0,
+              scale=1.0, repeat=1, report=None, ring_depths=(DEFAULT_RING_DEPTH,),
+              process_counts=(0,)):
+    """Run every combination (best of repeat runs) and return the JSON-ready report"""
+    from . import __version__
+    
+    cases = [(method, block_size, sync_policy, ring_depth, processes) for method in methods
+             for block_size in block_sizes for sync_policy in sync_policies
+             for ring_depth in ring_depths for processes in process_counts]
+    results = []
+    with tempfile.TemporaryDirectory(prefix='certiwipe-bench-', dir=directory) as work:
+        for scenario in scenarios:
+            for method, block_size, sync_policy, ring_depth, processes in cases:
+                runs = [run_case(scenario, method, block_size, sync_policy, work, seed, scale,
+                                 ring_depth, processes) for _ in range(repeat)]
+                best = min(runs, key=lambda run: run['seconds'])
+                best['runs'] = [run['seconds'] for run in runs]
+                results.append(best)
+                if report is not None:
+                    report(best)
+    return {
+        'certiwipe_version': __version__,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': datetime.now().isoformat(),
+        'seed': seed,
+        'scale': scale,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Cases of current that are more than threshold slower than in baseline"""
+    previous = {case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(case_key(result))
+        if before is None or not before['seconds']:
+            continue
+        change = result['seconds'] / before['seconds'] - 1
+        if change > threshold:
+            regressions.append({
+                'case': dict(zip(CASE_FIELDS, case_key(result))),
+                'baseline_seconds': before['seconds'],
+                'seconds': result['seconds'],
+                'change': round(change, 4),
+            })
+    return regressions
+
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
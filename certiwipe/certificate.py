@@ -0,0 +1,157 @@
+"""
+Certificate generation
+Destruction certificates (text and JSON) for finished wipe operations
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import platform
+from datetime import datetime
+
+from .device import TARGET_TYPES
+from .signing import KEY_FILE, canonical, load_key, sign
+from .utils import format_allocation, format_pass_plan, format_verification, get_operator
+
+CERTIFICATE_DIR = 'certificates'
+CERTIFICATE_ITEM_LIMIT = 50    # Items listed by name; the manifest root covers every file
+
+
+def build_certificate(operation):
+    """Collect the certificate data for a finished operation"""
+    return {
+        'certificate_id': str(uuid.uuid4()),
+        'issue_date': datetime.now().isoformat(),
+        'operation_id': operation['id'],
+        'organization': 'IT Asset Recycling Services',
+        'method': operation['method'],
+        'target': operation.get('target'),
+        'pass_plan': operation.get('pass_plan', []),
+        'items': operation['successful_items'][:CERTIFICATE_ITEM_LIMIT],
+        'item_count': len(operation['successful_items']),
+        'manifest': operation.get('manifest'),
+        'total_size': operation['total_size'],
+        'allocated_size': operation.get('allocated_size'),
+        'verification': operation.get('verification'),
+        'operator': operation.get('operator') or get_operator(),
+        'system': platform.platform(),
+        'compliance_standards': ['DOD 5220.22-M', 'NIST SP 800-88']
+    }
+
+
+def certificate_digest(cert_data):
+    """SHA-256 of the complete (signed) certificate data, as kept in the index"""
+    return hashlib.sha256(canonical(cert_data)).hexdigest()
+
+
+def text_certificate_path(json_path):
+    """Printable certificate written next to a certificate_data_*.json file"""
+    directory, name = os.path.split(json_path)
+    name = name.replace('certificate_data_', 'destruction_certificate_', 1)
+    return os.path.join(directory, os.path.splitext(name)[0] + '.txt')
+
+
+def render_certificate(cert_data):
+    """Render the printable certificate text"""
+    target = cert_data.get('target')
+    target_line = f"\nTarget: {TARGET_TYPES.get(target, target)}" if target else ""
+    signature = cert_data.get('signature')
+    if signature:
+        signature_line = f"{signature['value']}\n({signature['algorithm']}, key {signature['key_id']})"
+    else:
+        # Certificates of earlier versions were not signed
+        signature_line = hashlib.sha256(cert_data['certificate_id'].encode()).hexdigest()[:32]
+    certificate = f"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                        CERTIFICATE OF DATA DESTRUCTION                      ║
+║                          IT Asset Recycling Services                        ║
+╠══════════════════════════════════════════════════════════════════════════════╣
+
+Certificate ID: {cert_data['certificate_id']}
+Issue Date: {datetime.fromisoformat(cert_data['issue_date']).strftime('%Y-%m-%d %H:%M:%S')}
+Operation ID: {cert_data['operation_id']}
+
+DESTRUCTION DETAILS
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Method Used: {cert_data['method']}{target_line}
+Overwrite Passes: {len(cert_data['pass_plan'])} ({format_pass_plan(cert_data['pass_plan'])})
+Total Items Destroyed: {cert_data.get('item_count', len(cert_data['items']))}
+Total Data Wiped: {format_allocation(cert_data['total_size'], cert_data.get('allocated_size'))}
+Verification: {format_verification(cert_data.get('verification'))}
+
+COMPLIANCE STANDARDS
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+✓ DOD 5220.22-M Standard
+✓ NIST SP 800-88 Guidelines  
+✓ Secure Multi-Pass Overwriting
+✓ Cryptographically Secure Random Data
+
+ITEMS DESTROYED
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+"""
+    
+    for i, item in enumerate(cert_data['items'], 1):
+        certificate += f"{i:2d}. {os.path.basename(item)}\n"
+    unlisted = cert_data.get('item_count', 0) - len(cert_data['items'])
+    if unlisted > 0:
+        certificate += f"    ... and {unlisted} more item(s)\n"
+    
+    manifest = cert_data.get('manifest')
+    if manifest:
+        certificate += f"""
+FILE MANIFEST
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Files Recorded: {manifest['leaves']}
+Merkle Root ({manifest['algorithm']}):
+  {manifest['root']}
+Any single file can be proven part of this wipe with an inclusion proof
+(certiwipe prove <operation id> <path>).
+"""
+    
+    certificate += f"""
+SYSTEM INFORMATION
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Operator: {cert_data['operator']}
+System: {cert_data['system']}
+Timestamp: {cert_data['issue_date']}
+
+CERTIFICATION
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+This certificate confirms that the above-listed items have been securely 
+destroyed using industry-standard methods. The data is computationally 
+infeasible to recover.
+
+Digital Signature: {signature_line}
+
+╚══════════════════════════════════════════════════════════════════════════════╝
+"""
+    
+    return certificate
+
+
+def write_certificate(operation, output_dir=CERTIFICATE_DIR, key_file=KEY_FILE, history=None):
+    """Write the signed TXT and JSON certificate files, returning (txt, json, data)
+    
+    With a history store the certificate is also added to its certificate
+    index, which the verify command checks certificates against.
+    """
+    cert_data = sign(build_certificate(operation), load_key(key_file))
+    certificate = render_certificate(cert_data)
+    
+    stamp = datetime.fromisoformat(cert_data['issue_date']).strftime('%Y%m%d_%H%M%S')
+    stamp += '_' + cert_data['certificate_id'][:8]  # Unique even within one second
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    cert_filename = os.path.join(output_dir, f"destruction_certificate_{stamp}.txt")
+    json_filename = os.path.join(output_dir, f"certificate_data_{stamp}.json")
+    
+    with open(cert_filename, 'w', encoding='utf-8') as f:
+        f.write(certificate)
+    
+    with open(json_filename, 'w', encoding='utf-8') as f:
+        json.dump(cert_data, f, indent=2)
+    
+    if history is not None:
+        history.add_certificate(cert_data, json_filename)
+    return cert_filename, json_filename, cert_data
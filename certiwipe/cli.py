@@ -0,0 +1,477 @@
+"""
+CertiWipe command line interface
+Headless wipe, dry-run, certify, verify and history commands - never imports tkinter
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+import time
+
+from .benchmark import SCENARIOS
+from .certificate import CERTIFICATE_DIR, write_certificate
+from .device import DEFAULT_TARGET, TARGET_TYPES, target_warning
+from .history import HISTORY_FILE, STATS_DIMENSIONS, HistoryStore
+from .journal import JOURNAL_DIR, JobJournal, pending_journals
+from .manifest import MANIFEST_DIR, WipeManifest, check_proof
+from .methods import DEFAULT_WIPE_METHOD, WIPE_METHODS
+from .metrics import JobProfiler
+from .patterns import DEFAULT_RANDOM_PATTERN, RANDOM_PATTERNS
+from .pipeline import DEFAULT_RING_DEPTH
+from .planner import PROFILE_FILE, ThroughputProfiles, record_estimate, refine_profiles
+from .progress import format_duration
+from .signing import KEY_FILE
+from .sync import DEFAULT_SYNC_POLICY, SYNC_POLICIES, create_sync_policy
+from .utils import (format_allocation, format_estimate, format_pass_plan, format_phases,
+                    format_runtime, format_size, format_verification)
+from .verify import DEFAULT_VERIFY_MODE, VERIFY_MODES
+from .writer import AUTO_STORAGE_TYPE, MIB, STORAGE_BLOCK_SIZES
+
+
+def print_progress(progress, stream):
+    """Print progress events on one updating line until the job finishes"""
+    while True:
+        event = progress.events.get()
+        line = f"{format_size(event['bytes_written'])}"
+        if event['total_bytes']:
+            line += f" / {format_size(event['total_bytes'])}"
+            if event['scan_complete']:
+                line += f" ({100.0 * event['bytes_written'] / event['total_bytes']:.1f}%)"
+        line += f"  {format_size(event['rate'])}/s"
+        if event['eta'] is not None:
+            line += f"  ETA {format_duration(event['eta'])}"
+        if event['passes']:
+            line += f"  pass {event['pass']}/{event['passes']}"
+        stream.write(f"\r{line:<79}")
+        stream.flush()
+        if event['type'] == 'finished':
+            stream.write("\n")
+            return
+
+
+def cmd_wipe(args, history):
+    """Securely wipe files and folders, or whole devices and disk images"""
+    from .engine import WipeEngine, dry_run
+    
+    if args.random_source == 'urandom' and args.verify != 'off':
+        print("urandom passes cannot be verified - use --random-source keystream or numpy.",
+              file=sys.stderr)
+        return 1
+    items = [os.path.abspath(item) for item in args.items]
+    plan = None
+    if not args.yes:
+        # Walked only to be confirmed - with --yes the wipe is the only traversal
+        plan = dry_run(items, args.method, args.target, not args.include_holes,
+                       ThroughputProfiles(args.profile_file), args.storage_type)
+        print(target_warning(args.target, len(items)))
+        print(f"Method: {args.method}")
+        print(f"Plan: {format_estimate(plan['estimated_seconds'], plan['bytes_to_write'])}")
+        print("This action CANNOT be undone!")
+        if input("Type 'yes' to proceed: ").strip().lower() != 'yes':
+            print("Aborted.")
+            return 1
+    
+    sync_options = {'batch_files': args.batch_files} if args.sync == 'batched' else {}
+    engine = WipeEngine(args.method, storage_type=args.storage_type,
+                        sync_policy=create_sync_policy(args.sync, **sync_options),
+                        verify=args.verify, target=args.target,
+                        skip_holes=not args.include_holes,
+                        block_size=args.block_size * MIB if args.block_size else None,
+                        ring_depth=args.ring_depth,
+                        generator_processes=(os.cpu_count() if args.processes is None
+                                             else args.processes),
+                        random_source=args.random_source)
+    operation = engine.new_operation(items)
+    if plan is not None:
+        record_estimate(operation, plan)
+    engine.journal = JobJournal.for_operation(operation, args.journal_dir)
+    engine.manifest = WipeManifest.for_operation(operation, args.manifest_dir)
+    return run_operation(args, engine, operation, history)
+
+
+def cmd_resume(args, history):
+    """Resume an interrupted wipe from its journal"""
+    from .engine import WipeEngine
+    
+    journals = pending_journals(args.journal_dir)
+    if args.operation_id:
+        journals = [path for path in journals
+                    if os.path.basename(path).startswith(args.operation_id)]
+    if not journals:
+        print("No interrupted wipe operation to resume.", file=sys.stderr)
+        return 1
+    
+    journal = JobJournal.load(journals[-1])
+    operation = journal.operation
+    print(f"Resuming operation {operation['id']} ({operation['method']}, "
+          f"{len(journal.items_done)}/{len(operation['items'])} item(s) done)")
+    engine = WipeEngine.resume(journal,
+                               manifest=WipeManifest.for_operation(operation, args.manifest_dir))
+    return run_operation(args, engine, operation, history)
+
+
+def export_metrics(args, engine, operation):
+    """Write the job's phase metrics and profile if asked to - never fails the job"""
+    try:
+        if args.metrics_file:
+            engine.metrics.export(args.metrics_file, {'method': operation['method'],
+                                                      'sync_policy': engine.sync_policy.name})
+        if engine.profiler is not None:
+            engine.profiler.dump()
+    except OSError as e:
+        print(f"Could not write metrics: {e}", file=sys.stderr)
+
+
+def run_operation(args, engine, operation, history):
+    """Run a journaled wipe, record it in the history and print the result"""
+    show_progress = args.progress if args.progress is not None else sys.stderr.isatty()
+    if args.cprofile:
+        engine.profiler = JobProfiler(args.cprofile)
+    if show_progress:
+        printer = threading.Thread(target=print_progress, args=(engine.progress, sys.stderr),
+                                   daemon=True)
+        printer.start()
+    try:
+        engine.run(operation)
+    except Exception as e:
+        if show_progress:
+            printer.join()
+        print(f"Wipe operation failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        export_metrics(args, engine, operation)
+    if show_progress:
+        printer.join()
+    history.append(operation)
+    engine.journal.discard()
+    profiles = ThroughputProfiles(args.profile_file)
+    if refine_profiles(operation, profiles):
+        profiles.save()
+    
+    print(f"Operation ID: {operation['id']}")
+    print(f"Status: {operation['status']}")
+    print(f"Successfully wiped: {len(operation['successful_items'])} item(s)")
+    for item, error in operation['failed_items']:
+        print(f"Failed: {item}: {error}", file=sys.stderr)
+    wiped = format_allocation(operation['total_size'], operation.get('allocated_size'))
+    print(f"Total data wiped: {wiped}")
+    if 'verification' in operation:
+        print(f"Verification: {format_verification(operation['verification'])}")
+    print(f"Duration: {format_runtime(operation)}")
+    if operation.get('phases'):
+        print(f"Time by phase: {format_phases(operation['phases'])}")
+    return 0 if operation['status'] == 'Completed' else 1
+
+
+def cmd_dry_run(args, history):
+    """Show what a wipe would do without touching anything"""
+    from .engine import dry_run
+    
+    plan = dry_run([os.path.abspath(item) for item in args.items], args.method, args.target,
+                   not args.include_holes, ThroughputProfiles(args.profile_file),
+                   args.storage_type)
+    if args.json:
+        print(json.dumps(plan, indent=2))
+        return 0
+    
+    for entry in plan['items']:
+        print(f"{entry['type']:10} {format_size(entry['size']):>10}  {entry['path']}")
+    print(f"Method: {plan['method']} - {len(plan['pass_plan'])} pass(es): "
+          f"{format_pass_plan(plan['pass_plan'])}")
+    print(f"Total data: {format_allocation(plan['total_size'], plan['allocated_size'])} "
+          f"in {plan['files']} file(s)")
+    for device in plan['devices']:
+        print(f"Device {os.major(device['device'])}:{os.minor(device['device'])} "
+              f"({device['storage_type'] or 'unknown type'}): "
+              f"{format_estimate(device['estimated_seconds'], device['bytes_to_write'])}")
+    print(f"Estimate: {format_estimate(plan['estimated_seconds'], plan['bytes_to_write'])}")
+    return 0
+
+
+def cmd_certify(args, history):
+    """Generate a destruction certificate for an operation"""
+    if args.operation_id:
+        operation = history.get(args.operation_id)
+    else:
+        operation = history.latest()
+    if operation is None or 'successful_items' not in operation:
+        print("No matching wipe operation to certify.", file=sys.stderr)
+        return 1
+    
+    cert_filename, json_filename, cert_data = write_certificate(operation, args.output_dir,
+                                                               args.key_file, history)
+    print(f"Certificate ID: {cert_data['certificate_id']}")
+    print(f"Signed with key {cert_data['signature']['key_id']}")
+    print(f"Files created:\n  {cert_filename}\n  {json_filename}")
+    return 0
+
+
+def cmd_verify(args, history):
+    """Verify certificates against their signature and the wipe history"""
+    from .audit import verify_certificates
+    from .signing import load_key
+    
+    try:
+        key = load_key(args.key_file, create=False)
+    except FileNotFoundError:
+        print(f"Signing key not found: {args.key_file}", file=sys.stderr)
+        return 1
+    
+    started = time.perf_counter()
+    results = verify_certificates(args.paths, key, history, args.workers)
+    elapsed = time.perf_counter() - started
+    failed = [result for result in results if result['problems']]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in failed:
+            print(f"FAILED {result['path']}: {'; '.join(result['problems'])}")
+        print(f"{len(results)} certificate(s) checked in {elapsed:.2f} s: "
+              f"{len(results) - len(failed)} valid, {len(failed)} failed")
+    return 1 if failed or not results else 0
+
+
+def cmd_prove(args, history):
+    """Print an inclusion proof that a file was wiped by an operation"""
+    operation = history.get(args.operation_id)
+    if operation is None or not operation.get('manifest'):
+        print("No matching wipe operation with a file manifest.", file=sys.stderr)
+        return 1
+    
+    try:
+        proof = WipeManifest.from_summary(operation['manifest']).prove(os.path.abspath(args.path))
+    except FileNotFoundError:
+        print(f"Manifest file is missing: {operation['manifest']['file']}", file=sys.stderr)
+        return 1
+    if proof is None:
+        print(f"{args.path} is not in the manifest of operation {operation['id']}", file=sys.stderr)
+        return 1
+    
+    proof['operation_id'] = operation['id']
+    print(json.dumps(proof, indent=2))
+    if not check_proof(proof, operation['manifest']['root']):
+        print("Proof does not match the recorded Merkle root!", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_history(args, history):
+    """List recent wipe operations"""
+    operations = history.recent(args.limit)
+    if args.json:
+        print(json.dumps(operations, indent=2))
+        return 0
+    
+    for op in reversed(operations):
+        print(f"{op['timestamp'][:19]}  {op['status']:<11} {op['method']:<16} "
+              f"{len(op['items']):>5} item(s) {format_size(op.get('total_size', 0)):>10}  {op['id']}")
+    return 0
+
+
+def add_target_argument(parser):
+    parser.add_argument('--target', choices=list(TARGET_TYPES), default=DEFAULT_TARGET,
+                        help="'device' overwrites whole block devices or disk images in place, "
+                             "'free-space' wipes the free space of the volumes holding the "
+                             "given folders (default: %(default)s)")
+
+
+def add_progress_arguments(parser):
+    parser.add_argument('--progress', action='store_true', default=None,
+                        help="show live progress (default: when stderr is a terminal)")
+    parser.add_argument('--no-progress', dest='progress', action='store_false')
+
+
+def add_instrumentation_arguments(parser):
+    parser.add_argument('--metrics-file', metavar='FILE',
+                        help="export per-phase metrics: Prometheus textfile for .prom, else JSON")
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help="profile the job with cProfile and write pstats to FILE")
+
+
+def cmd_stats(args, history):
+    """Show wipe statistics, overall or by method, status, day or operator"""
+    rollup = history.stats(args.by)
+    if args.json:
+        print(json.dumps(rollup, indent=2))
+        return 0
+    
+    for key, counters in rollup.items():
+        success_rate = counters['completed'] / counters['operations'] * 100
+        print(f"{key or 'All operations':<24} {counters['operations']:>8} op(s) "
+              f"{success_rate:>6.1f}% completed {counters['items']:>8} item(s) "
+              f"{format_size(counters['total_size']):>10}")
+    return 0
+
+
+def cmd_benchmark(args, history):
+    """Benchmark the wipe engine on synthetic trees and write the results as JSON"""
+    from .benchmark import compare, load_report, run_suite
+    
+    def report(result):
+        print(f"{result['scenario']:<13} {result['method']:<11} "
+              f"{(result['block_size'] or 0) // MIB or 'auto':>4} {result['sync_policy']:<9} "
+              f"ring {result['ring_depth']:<2} procs {result['generator_processes']:<2} "
+              f"{result['mb_per_s']:>9.1f} MB/s {result['files_per_s']:>9.1f} files/s "
+              f"cpu {result['cpu_user'] + result['cpu_system']:.2f} s", file=sys.stderr)
+    
+    block_sizes = [size * MIB for size in args.block_size] if args.block_size else [None]
+    results = run_suite(args.scenario, args.method, block_sizes, args.sync, args.dir,
+                        args.seed, args.scale, args.repeat, report, args.ring_depth,
+                        args.processes)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    
+    if args.compare:
+        regressions = compare(load_report(args.compare), results, args.threshold / 100)
+        for regression in regressions:
+            case = regression['case']
+            print(f"REGRESSION {case['scenario']} {case['method']} {case['sync_policy']} "
+                  f"ring {case['ring_depth']} procs {case['generator_processes']}: "
+                  f"{regression['baseline_seconds']:.3f} s -> {regression['seconds']:.3f} s "
+                  f"({regression['change']:+.0%})", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='certiwipe',
+                                     description="Secure data wiping with destruction certificates")
+    parser.add_argument('--history-file', default=HISTORY_FILE,
+                        help=f"wipe history database (default: {HISTORY_FILE})")
+    parser.add_argument('--journal-dir', default=JOURNAL_DIR,
+                        help=f"where running jobs keep their resume journal (default: {JOURNAL_DIR})")
+    parser.add_argument('--manifest-dir', default=MANIFEST_DIR,
+                        help=f"where per-file wipe manifests are kept (default: {MANIFEST_DIR})")
+    parser.add_argument('--profile-file', default=PROFILE_FILE,
+                        help=f"measured device throughput for estimates (default: {PROFILE_FILE})")
+    parser.add_argument('--key-file', default=KEY_FILE,
+                        help=f"certificate signing key, created on first use (default: {KEY_FILE})")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+    
+    wipe_parser = commands.add_parser('wipe', help=cmd_wipe.__doc__)
+    wipe_parser.add_argument('items', nargs='+', help="files or folders (or devices/images) to wipe")
+    wipe_parser.add_argument('-m', '--method', choices=list(WIPE_METHODS), default=DEFAULT_WIPE_METHOD)
+    wipe_parser.add_argument('--storage-type', choices=[AUTO_STORAGE_TYPE] + list(STORAGE_BLOCK_SIZES),
+                             default=AUTO_STORAGE_TYPE)
+    wipe_parser.add_argument('--sync', choices=list(SYNC_POLICIES), default=DEFAULT_SYNC_POLICY,
+                             help="durability policy (default: %(default)s)")
+    wipe_parser.add_argument('--batch-files', type=int, default=256,
+                             help="files per barrier with --sync batched")
+    wipe_parser.add_argument('--block-size', type=int, metavar='MIB',
+                             help="write buffer size in MiB (default: per storage type)")
+    wipe_parser.add_argument('--ring-depth', type=int, default=DEFAULT_RING_DEPTH,
+                             help="buffers of random data generated ahead of the writes, "
+                                  "0 to generate inline (default: %(default)s)")
+    wipe_parser.add_argument('--processes', type=int, default=None,
+                             help="processes generating random data into shared memory "
+                                  "(default: one per CPU, 0 for threads only)")
+    wipe_parser.add_argument('--random-source', choices=list(RANDOM_PATTERNS),
+                             default=DEFAULT_RANDOM_PATTERN,
+                             help="generator of the random passes: keystream (SHAKE-128), numpy "
+                                  "(PCG64, faster, not cryptographic) or urandom (cannot be "
+                                  "verified) (default: %(default)s)")
+    wipe_parser.add_argument('--verify', choices=list(VERIFY_MODES), default=DEFAULT_VERIFY_MODE,
+                             help="read back the final pass (default: %(default)s)")
+    add_target_argument(wipe_parser)
+    wipe_parser.add_argument('--include-holes', action='store_true',
+                             help="also overwrite the holes of sparse files (allocates them)")
+    wipe_parser.add_argument('-y', '--yes', action='store_true',
+                             help="do not ask for confirmation (and skip the pre-flight plan)")
+    add_progress_arguments(wipe_parser)
+    add_instrumentation_arguments(wipe_parser)
+    wipe_parser.set_defaults(handler=cmd_wipe)
+    
+    resume_parser = commands.add_parser('resume', help=cmd_resume.__doc__)
+    resume_parser.add_argument('operation_id', nargs='?',
+                               help="operation id or prefix (default: most recent)")
+    add_progress_arguments(resume_parser)
+    add_instrumentation_arguments(resume_parser)
+    resume_parser.set_defaults(handler=cmd_resume)
+    
+    dry_run_parser = commands.add_parser('dry-run', help=cmd_dry_run.__doc__)
+    dry_run_parser.add_argument('items', nargs='+', help="files or folders to inspect")
+    dry_run_parser.add_argument('-m', '--method', choices=list(WIPE_METHODS), default=DEFAULT_WIPE_METHOD)
+    dry_run_parser.add_argument('--storage-type',
+                                choices=[AUTO_STORAGE_TYPE] + list(STORAGE_BLOCK_SIZES),
+                                default=AUTO_STORAGE_TYPE,
+                                help="storage type the wipe would use (default: %(default)s)")
+    add_target_argument(dry_run_parser)
+    dry_run_parser.add_argument('--include-holes', action='store_true',
+                                help="plan to overwrite the holes of sparse files too")
+    dry_run_parser.add_argument('--json', action='store_true', help="machine-readable output")
+    dry_run_parser.set_defaults(handler=cmd_dry_run)
+    
+    certify_parser = commands.add_parser('certify', help=cmd_certify.__doc__)
+    certify_parser.add_argument('operation_id', nargs='?', help="operation id or prefix (default: latest)")
+    certify_parser.add_argument('-o', '--output-dir', default=CERTIFICATE_DIR,
+                                help="where to write the certificate (default: %(default)s)")
+    certify_parser.set_defaults(handler=cmd_certify)
+    
+    verify_parser = commands.add_parser('verify', help=cmd_verify.__doc__)
+    verify_parser.add_argument('paths', nargs='*', default=[CERTIFICATE_DIR],
+                               help="certificate JSON files or folders (default: %(default)s)")
+    verify_parser.add_argument('-j', '--workers', type=int, default=None,
+                               help="parallel worker processes (default: one per CPU)")
+    verify_parser.add_argument('--json', action='store_true', help="machine-readable output")
+    verify_parser.set_defaults(handler=cmd_verify)
+    
+    prove_parser = commands.add_parser('prove', help=cmd_prove.__doc__)
+    prove_parser.add_argument('operation_id', help="operation id or prefix")
+    prove_parser.add_argument('path', help="path of a wiped file")
+    prove_parser.set_defaults(handler=cmd_prove)
+    
+    history_parser = commands.add_parser('history', help=cmd_history.__doc__)
+    history_parser.add_argument('-n', '--limit', type=int, default=20)
+    history_parser.add_argument('--json', action='store_true', help="machine-readable output")
+    history_parser.set_defaults(handler=cmd_history)
+    
+    benchmark_parser = commands.add_parser('benchmark', help=cmd_benchmark.__doc__)
+    benchmark_parser.add_argument('--scenario', nargs='+', choices=list(SCENARIOS),
+                                  default=list(SCENARIOS))
+    benchmark_parser.add_argument('-m', '--method', nargs='+', choices=list(WIPE_METHODS),
+                                  default=list(WIPE_METHODS))
+    benchmark_parser.add_argument('--block-size', nargs='+', type=int, metavar='MIB',
+                                  help="write block sizes in MiB (default: per storage type)")
+    benchmark_parser.add_argument('--sync', nargs='+', choices=list(SYNC_POLICIES),
+                                  default=[DEFAULT_SYNC_POLICY])
+    benchmark_parser.add_argument('--ring-depth', nargs='+', type=int,
+                                  default=[DEFAULT_RING_DEPTH],
+                                  help="pipeline ring depths to compare (0: generate inline)")
+    benchmark_parser.add_argument('--processes', nargs='+', type=int, default=[0],
+                                  help="generator process counts to compare "
+                                       "(default: 0, generation in threads)")
+    benchmark_parser.add_argument('--scale', type=float, default=1.0,
+                                  help="multiply file counts and sizes (default: %(default)s)")
+    benchmark_parser.add_argument('--seed', type=int, default=0)
+    benchmark_parser.add_argument('--repeat', type=int, default=1,
+                                  help="runs per case, the fastest is kept")
+    benchmark_parser.add_argument('--dir', help="where to build the trees (default: system temp)")
+    benchmark_parser.add_argument('-o', '--output', help="write the JSON report here")
+    benchmark_parser.add_argument('--compare', metavar='BASELINE',
+                                  help="report cases slower than in a previous JSON report")
+    benchmark_parser.add_argument('--threshold', type=float, default=10,
+                                  help="slowdown in percent counted as a regression")
+    benchmark_parser.set_defaults(handler=cmd_benchmark)
+    
+    stats_parser = commands.add_parser('stats', help=cmd_stats.__doc__)
+    stats_parser.add_argument('--by', choices=list(STATS_DIMENSIONS), default='all',
+                              help="rollup to show (default: %(default)s)")
+    stats_parser.add_argument('--json', action='store_true', help="machine-readable output")
+    stats_parser.set_defaults(handler=cmd_stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args, HistoryStore(args.history_file))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,883 @@
+"""
+Secure wipe engine
+Importable API used by the dashboard, the CLI and library callers
+"""
+
+import os
+import stat
+import hashlib
+import threading
+import uuid
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from .device import DEFAULT_TARGET, DEVICE_BLOCK_SIZE, TARGET_TYPES, open_target, target_size
+from .extents import allocated_bytes, bytes_before, data_extents
+from .freespace import FILL_DIR_PREFIX, create_fill_file, fill_sizes, remove_fill_directory
+from .methods import DEFAULT_WIPE_METHOD, get_pass_plan
+from .metrics import WipeMetrics
+from .patterns import DEFAULT_RANDOM_PATTERN, RANDOM_PATTERNS, derive_seed
+from .pipeline import (DEFAULT_RING_DEPTH, PIPELINE_MIN_SIZE, GeneratorPool,
+                       SharedMemoryPipeline, WritePipeline, generator_processes)
+from .planner import plan_wipe
+from .progress import ProgressReporter
+from .scheduler import ITEM_WORKERS, WipeScheduler
+from .sync import DEFAULT_SYNC_POLICY, OPEN_FLAGS, create_sync_policy, fdatasync
+from .traversal import scan_tree
+from .utils import get_operator
+from .verify import DEFAULT_VERIFY_MODE, VerificationError, Verifier
+from .writer import (AUTO_STORAGE_TYPE, allocate_aligned_buffer, block_size_for_storage,
+                     clamp_block_size, direct_bounds, overwrite_direct, overwrite_range)
+
+# Small-file fast path settings
+SMALL_FILE_SIZE = 64 * 1024       # Files up to this size are wiped in per-directory batches
+SMALL_FILE_BATCH = 128            # Files per batch (all held open until the barrier)
+SMALL_FILE_FD_SHARE = 0.5         # Share of RLIMIT_NOFILE that batches may hold open at once
+DEFAULT_FD_BUDGET = 256           # Where the limit cannot be read
+
+
+def descriptor_budget():
+    """Descriptors the small-file batches of a job may hold open at once
+    
+    A share of the soft RLIMIT_NOFILE, so that the rest is left to large
+    files, pipelines, the journal, the manifest and the caller.
+    """
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, OSError, ValueError):
+        return DEFAULT_FD_BUDGET
+    if soft == resource.RLIM_INFINITY:
+        return DEFAULT_FD_BUDGET * 16
+    return max(2, int(soft * SMALL_FILE_FD_SHARE))
+
+
+class WipeEngine:
+    """Securely wipe files and folders with one method and sync policy
+    
+    new_operation() creates the operation record for a list of items and
+    run() wipes them, filling in the results. The engine has no UI of its
+    own - the dashboard and the CLI are both thin clients of it.
+    
+    Only the allocated extents of sparse files are overwritten unless
+    skip_holes is turned off; holes hold no data and writing them would
+    allocate the whole logical size.
+    
+    With target='device' every item is a whole block device or disk image
+    instead, overwritten in place and left in place (see wipe_device()).
+    With target='free-space' every item is a directory whose volume has its
+    free space wiped (see wipe_free_space()).
+    
+    Random passes come from random_source: the SHAKE-128 keystream by
+    default, NumPy's PCG64 ('numpy', faster, not cryptographic) or the OS
+    CSPRNG ('urandom', which cannot be verified).
+    
+    Every phase of the hot path (scan, open, generate, write, sync, verify,
+    unlink) is timed into metrics, and with a profiler (a JobProfiler) every
+    task runs under cProfile.
+    """
+    
+    def __init__(self, method=DEFAULT_WIPE_METHOD, storage_type=AUTO_STORAGE_TYPE,
+                 sync_policy=DEFAULT_SYNC_POLICY, max_workers=None, progress=None,
+                 verify=DEFAULT_VERIFY_MODE, journal=None, manifest=None, target=DEFAULT_TARGET,
+                 skip_holes=True, block_size=None, ring_depth=DEFAULT_RING_DEPTH,
+                 generator_processes=None, random_source=DEFAULT_RANDOM_PATTERN, metrics=None,
+                 profiler=None):
+        if target not in TARGET_TYPES:
+            raise ValueError(f"Unknown target type: {target}")
+        if random_source not in RANDOM_PATTERNS:
+            raise ValueError(f"Unknown random source: {random_source}")
+        self.plan = get_pass_plan(method)
+        self.target = target
+        self.skip_holes = skip_holes
+        self.storage_type = storage_type
+        self.block_size = block_size  # Write block size, instead of the storage type's
+        self.ring_depth = ring_depth  # Buffers generated ahead of the writes (0: inline)
+        self.generator_processes = generator_processes  # Keystream processes (None: no pool)
+        self.random_source = random_source  # Generator of random passes (RANDOM_PATTERNS)
+        if isinstance(sync_policy, str):
+            sync_policy = create_sync_policy(sync_policy)
+        self.sync_policy = sync_policy
+        if isinstance(verify, str):
+            verify = Verifier(verify)
+        self.verifier = verify
+        if random_source == 'urandom' and verify.enabled:
+            raise ValueError("urandom passes cannot be regenerated for verification")
+        self.max_workers = max_workers
+        self.progress = progress or ProgressReporter()  # Event stream for UIs and callers
+        self.metrics = metrics or WipeMetrics()  # Per-phase counters and latency histograms
+        self.profiler = profiler  # Optional JobProfiler (cProfile hook) for the job
+        self.journal = journal  # Optional JobJournal for checkpoints and resume
+        self.manifest = manifest  # Optional WipeManifest of every wiped file
+        self.job_seed = os.urandom(32)  # Parent seed for the random passes of a job
+        self.allocated_size = 0  # Data bytes (holes excluded) overwritten by the job
+        self._thread_state = threading.local()  # Per-thread reusable write buffer
+        self._generator_pool = None
+        self._lock = threading.Lock()
+        # Small-file batches of every worker share one budget of open descriptors
+        self._descriptors = _DescriptorBudget(descriptor_budget())
+        self.small_file_batch = min(SMALL_FILE_BATCH, self._descriptors.limit - 1)
+    
+    @classmethod
+    def resume(cls, journal, progress=None, manifest=None):
+        """Rebuild the engine of an interrupted job from its loaded journal"""
+        settings = journal.settings
+        engine = cls(settings['method'], storage_type=settings['storage_type'],
+                     sync_policy=create_sync_policy(settings['sync_policy'],
+                                                    **settings['sync_options']),
+                     progress=progress, verify=settings['verify'], journal=journal,
+                     manifest=manifest, target=settings.get('target', DEFAULT_TARGET),
+                     skip_holes=settings.get('skip_holes', False),
+                     block_size=settings.get('block_size'),
+                     ring_depth=settings.get('ring_depth', DEFAULT_RING_DEPTH),
+                     generator_processes=settings.get('generator_processes'),
+                     random_source=settings.get('random_source', DEFAULT_RANDOM_PATTERN))
+        engine.job_seed = journal.job_seed  # Regenerates the interrupted passes
+        return engine
+    
+    @property
+    def method(self):
+        return self.plan.method
+    
+    def settings(self):
+        """Everything needed to recreate this engine for a resumed job"""
+        return {
+            'method': self.plan.method,
+            'storage_type': self.storage_type,
+            'sync_policy': self.sync_policy.name,
+            'sync_options': self.sync_policy.settings(),
+            'verify': self.verifier.mode,
+            'target': self.target,
+            'skip_holes': self.skip_holes,
+            'block_size': self.block_size,
+            'ring_depth': self.ring_depth,
+            'generator_processes': self.generator_processes,
+            'random_source': self.random_source,
+        }
+    
+    def new_operation(self, items):
+        """Create the operation record for wiping items"""
+        return {
+            'id': str(uuid.uuid4()),
+            'timestamp': datetime.now().isoformat(),
+            'items': list(items),
+            'method': self.plan.method,
+            'pass_plan': self.plan.describe(),
+            'storage_type': self.storage_type,
+            'sync_policy': self.sync_policy.describe(),
+            'verify_mode': self.verifier.mode,
+            'random_source': self.random_source,
+            'target': self.target,
+            'operator': get_operator(),
+            'status': 'In Progress'
+        }
+    
+    def run(self, operation):
+        """Wipe the operation's items and record the results in it"""
+        self.progress.begin(len(operation['items']), len(self.plan))
+        self.metrics.begin()
+        self.verifier.reset()
+        self.allocated_size = 0
+        if self.journal is not None:
+            if self.journal.header is None:
+                self.journal.start(operation, self.job_seed, self.settings())
+            else:
+                self.journal.reopen()
+                self.allocated_size = sum(self.journal.files_allocated.values())
+                operation['resumed'] = operation.get('resumed', 0) + 1
+        if self.manifest is not None:
+            self.manifest.open()
+        try:
+            total_size = 0
+            successful_items = []
+            failed_items = []
+            
+            with WipeScheduler(partial(self.run_task, self.wipe_file),
+                               max_workers=self.max_workers,
+                               storage_type=self.storage_type) as scheduler:
+                with ThreadPoolExecutor(max_workers=ITEM_WORKERS) as item_pool:
+                    results = list(item_pool.map(
+                        lambda item: self.run_task(self.wipe_item, item, scheduler),
+                        operation['items']))
+            
+            # Results come back in selection order
+            for item, size, error in results:
+                if error is not None:
+                    failed_items.append((item, error))
+                elif size is not None:
+                    total_size += size
+                    successful_items.append(item)
+            
+            operation['status'] = 'Completed' if not failed_items else 'Partial'
+            operation['total_size'] = total_size
+            operation['allocated_size'] = self.allocated_size
+            operation['successful_items'] = successful_items
+            operation['failed_items'] = failed_items
+            operation['duration'] = round(self.progress.snapshot()['elapsed'], 3)
+            operation['phases'] = self.metrics.summary()
+            if self.verifier.enabled:
+                operation['verification'] = self.verifier.summary()
+            if self.manifest is not None:
+                operation['manifest'] = self.manifest.summary()
+            return operation
+        
+        except Exception as e:
+            operation['status'] = 'Failed'
+            operation['error'] = str(e)
+            raise
+        
+        finally:
+            if self.manifest is not None:
+                self.manifest.close()
+            if self.journal is not None:
+                self.journal.close()  # Discarded by the caller once the history has it
+            if self._generator_pool is not None:
+                self._generator_pool.shutdown()
+                self._generator_pool = None
+            self.progress.finish(operation['status'])
+    
+    def wipe(self, items):
+        """Create an operation for items, run it and return the record"""
+        return self.run(self.new_operation(items))
+    
+    def run_task(self, function, *args, **kwargs):
+        """Call one unit of work (item, file, batch) under the profiler, if any"""
+        if self.profiler is None:
+            return function(*args, **kwargs)
+        return self.profiler.run(function, *args, **kwargs)
+    
+    def wipe_item(self, item, scheduler):
+        """Wipe one selected item, returning (item, size, error)"""
+        journal = self.journal
+        if journal is None:
+            return self._wipe_item(item, scheduler)
+        if item in journal.items_done:
+            self.progress.item_scanned()
+            size, error = journal.items_done[item]
+            return item, size, error
+        
+        item, size, error = self._wipe_item(item, scheduler)
+        resumed = journal.wiped_bytes(item)
+        if error is None and resumed is not None:
+            size = (size or 0) + resumed  # Files finished before the interruption
+        journal.item_done(item, size, error)
+        return item, size, error
+    
+    def _wipe_item(self, item, scheduler):
+        scanned = []
+        
+        def item_scanned():
+            # Once every item is discovered the progress total is final
+            if not scanned:
+                scanned.append(True)
+                self.progress.item_scanned()
+        
+        try:
+            if self.target == 'device':
+                return item, self.wipe_device(item, on_sized=item_scanned), None
+            if self.target == 'free-space':
+                return item, self.wipe_free_space(item, scheduler, on_sized=item_scanned), None
+            info = os.stat(item)
+            if stat.S_ISREG(info.st_mode):
+                if self.remove_finished(item):
+                    return item, None, None  # Its size comes from the journal
+                self.progress.add_total(info.st_size * len(self.plan))
+                item_scanned()
+                scheduler.submit(item, info.st_dev, file_size=info.st_size).result()
+                with self.metrics.phase('sync'):
+                    self.sync_policy.flush()
+                return item, info.st_size, None
+            elif stat.S_ISDIR(info.st_mode):
+                return item, self.wipe_folder(item, scheduler, on_scanned=item_scanned), None
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            return item, None, str(e)
+        finally:
+            item_scanned()
+        return item, None, None
+    
+    def get_write_buffer(self, file_path, file_size, aligned=False, min_block_size=0):
+        """Return a view of this thread's reusable write buffer sized for the file"""
+        block_size = self.block_size or block_size_for_storage(self.storage_type, file_path)
+        block_size = clamp_block_size(max(block_size, min_block_size))
+        if aligned:
+            buffer = getattr(self._thread_state, 'aligned_buffer', None)
+            if buffer is None or len(buffer) < block_size:
+                buffer = self._thread_state.aligned_buffer = allocate_aligned_buffer(block_size)
+            return memoryview(buffer)[:block_size]
+        
+        buffer = getattr(self._thread_state, 'buffer', None)
+        if buffer is None or len(buffer) < block_size:
+            buffer = self._thread_state.buffer = bytearray(block_size)
+        return memoryview(buffer)[:max(1, min(block_size, file_size))]
+    
+    def wipe_file(self, file_path, file_size=None, preallocated=False):
+        """Securely wipe a single file
+        
+        preallocated files (free-space fill files) are written in full: their
+        unwritten extents look like holes to SEEK_DATA.
+        """
+        if self.remove_finished(file_path):
+            return
+        if file_size is None:
+            try:
+                file_size = os.stat(file_path).st_size
+            except FileNotFoundError:
+                return
+        
+        seed = derive_seed(self.job_seed, file_path)
+        patterns = self.plan.compile(seed, self.random_source)
+        policy = self.sync_policy
+        progress = self.progress
+        journal = self.journal
+        metrics = self.metrics
+        
+        resume_pass, resume_offset = (0, 0) if journal is None else journal.resume_point(file_path)
+        
+        with metrics.phase('open'):
+            fd, direct = policy.open_file(file_path, file_size)
+        try:
+            if preallocated:
+                extents = [(0, file_size)] if file_size else []
+            else:
+                extents = self.data_extents(fd, file_size)
+            # Scanning counted every pass over the logical size
+            progress.add_total(self.bytes_to_write(extents, len(patterns), resume_pass,
+                                                   resume_offset) - file_size * len(patterns))
+            buffer = self.get_write_buffer(file_path, file_size, aligned=direct)
+            self.overwrite_passes(file_path, fd, direct, file_size, extents, patterns, buffer,
+                                  resume_pass, resume_offset,
+                                  partial(policy.after_pass, fd, direct), durable=direct)
+            with metrics.phase('sync'):
+                policy.after_file(fd, direct)
+            if self.verifier.enabled and patterns:
+                # A failed check raises before the file is removed
+                with metrics.phase('verify', file_size):
+                    self.verifier.verify_file(file_path, file_size, patterns[-1], seed, extents)
+            info = os.fstat(fd)
+        finally:
+            os.close(fd)
+        
+        allocated = allocated_bytes(extents)
+        self.record_file(file_path, file_size, allocated, info, seed)
+        # Journaled as finished only once the policy's barrier has made it durable
+        with metrics.phase('unlink'):
+            policy.remove(file_path, info.st_dev,
+                          partial(self.file_done, file_path, file_size, allocated))
+    
+    def remove_finished(self, file_path):
+        """Remove a file the journal has as finished, returning True if it was
+        
+        Its passes were complete before the job was interrupted and only the
+        removal may be missing (e.g. still waiting for a batched barrier),
+        so it is neither overwritten again nor counted twice.
+        """
+        if self.journal is None or file_path not in self.journal.files_done:
+            return False
+        with self.metrics.phase('unlink'):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+        return True
+    
+    def is_small_file(self, info):
+        """Whether a scanned file can go through wipe_small_files()
+        
+        Sparse files keep the extent-aware path even when they are small.
+        """
+        if info.st_size > SMALL_FILE_SIZE:
+            return False
+        return not self.skip_holes or getattr(info, 'st_blocks', 0) * 512 >= info.st_size
+    
+    def wipe_small_files(self, dir_path, batch):
+        """Securely wipe a batch of small (name, stat) files of one directory
+        
+        Every file is opened and unlinked relative to one directory
+        descriptor and each pass is a single write per file. The batch is
+        flushed together by the sync policy's barrier() after every pass or
+        only after the last one, as the policy asks.
+        Files that fail are left in place and the first error is raised once
+        the rest of the batch is done.
+        
+        All workers together never hold more descriptors open than the
+        job's budget (see descriptor_budget()): a batch waits until its
+        files and directory fit.
+        """
+        policy = self.sync_policy
+        progress = self.progress
+        metrics = self.metrics
+        passes = len(self.plan)
+        error = None
+        files = []
+        descriptors = len(batch) + 1  # The files and their directory
+        self._descriptors.acquire(descriptors)
+        try:
+            dir_fd = os.open(dir_path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+        except OSError:
+            self._descriptors.release(descriptors)
+            raise
+        try:
+            for name, info in batch:
+                try:
+                    with metrics.phase('open'):
+                        fd = os.open(name, OPEN_FLAGS, dir_fd=dir_fd)
+                except FileNotFoundError:
+                    progress.add_total(-info.st_size * passes)
+                    continue
+                except OSError as e:
+                    error = error or e
+                    continue
+                file_path = os.path.join(dir_path, name)
+                seed = derive_seed(self.job_seed, file_path)
+                patterns = self.plan.compile(seed, self.random_source)
+                files.append((name, file_path, info, fd, seed, patterns))
+            
+            try:
+                buffer = self.get_write_buffer(dir_path, SMALL_FILE_SIZE)
+                for index in range(passes):
+                    if files:
+                        progress.start_pass(files[0][1], index + 1)
+                    for _, _, info, fd, _, patterns in files:
+                        overwrite_range(fd, info.st_size, patterns[index], buffer,
+                                        progress=progress.advance, metrics=metrics)
+                    if policy.pass_barriers or index == passes - 1:
+                        with metrics.phase('sync'):
+                            policy.barrier([file[3] for file in files], dir_fd)
+            finally:
+                for file in files:
+                    os.close(file[3])
+            
+            done = []
+            for name, file_path, info, _, seed, patterns in files:
+                try:
+                    if self.verifier.enabled and patterns:
+                        with metrics.phase('verify', info.st_size):
+                            self.verifier.verify_file(file_path, info.st_size, patterns[-1],
+                                                      seed)
+                    self.record_file(file_path, info.st_size, info.st_size, info, seed)
+                    with metrics.phase('unlink'):
+                        os.unlink(name, dir_fd=dir_fd)
+                except FileNotFoundError:
+                    pass
+                except (OSError, VerificationError) as e:
+                    error = error or e
+                    continue
+                done.append((file_path, info.st_size, info.st_size))
+        finally:
+            os.close(dir_fd)
+            self._descriptors.release(descriptors)
+        
+        with self._lock:
+            self.allocated_size += sum(size for _, size, _ in done)
+        if self.journal is not None and done:
+            self.journal.batch_done(done)
+        progress.file_done(len(done))
+        if error is not None:
+            raise error
+    
+    def data_extents(self, fd, size):
+        """Ranges to overwrite: the allocated extents, or everything without skip_holes"""
+        if self.skip_holes:
+            return data_extents(fd, size)
+        return [(0, size)] if size > 0 else []
+    
+    def bytes_to_write(self, extents, passes, resume_pass=0, resume_offset=0):
+        """Bytes the remaining passes write over extents"""
+        allocated = allocated_bytes(extents)
+        return (passes - resume_pass) * allocated - bytes_before(extents, resume_offset)
+    
+    def file_done(self, file_path, size, allocated):
+        with self._lock:
+            self.allocated_size += allocated
+        if self.journal is not None:
+            self.journal.file_done(file_path, size, allocated)
+        self.progress.file_done()
+    
+    def overwrite_passes(self, file_path, fd, direct, size, extents, patterns, buffer,
+                         resume_pass, resume_offset, after_pass, durable):
+        """Write every pass (from the resume point) over the extents of a file or device
+        
+        Generated passes of large files are filled ahead of the writes by a
+        WritePipeline (see start_pipeline()).
+        """
+        progress = self.progress
+        journal = self.journal
+        metrics = self.metrics
+        if journal is None:
+            on_block = progress.advance
+        else:
+            checkpoint = journal.file_tracker(file_path, fd, durable=durable)
+            
+            def on_block(count):
+                progress.advance(count)
+                checkpoint.advance(count)
+        
+        passes = []  # (pass index, pattern, [(start, end)]) from the resume point on
+        for index, pattern in enumerate(patterns):
+            if index < resume_pass:
+                continue
+            resume_at = resume_offset if index == resume_pass else 0
+            passes.append((index, pattern, [(max(start, resume_at), start + length)
+                                            for start, length in extents
+                                            if start + length > resume_at]))
+        
+        pipeline = self.start_pipeline(size, passes, direct, len(buffer))
+        try:
+            for index, pattern, ranges in passes:
+                progress.start_pass(file_path, index + 1)
+                generated = pipeline if pipeline is not None and not pattern.period else None
+                for start, end in ranges:
+                    if journal is not None:
+                        checkpoint.start_pass(index, start)  # Checkpoints are file offsets
+                    if direct:
+                        overwrite_direct(fd, file_path, size, pattern, buffer, on_block, start,
+                                         end, generated, metrics)
+                    elif generated is not None:
+                        generated.write(fd, start, end, on_block)
+                    else:
+                        overwrite_range(fd, end - start, pattern, buffer, start=start,
+                                        progress=on_block, metrics=metrics)
+                with metrics.phase('sync'):
+                    after_pass()
+        finally:
+            if pipeline is not None:
+                pipeline.close()
+    
+    def start_pipeline(self, size, passes, direct, buffer_size):
+        """Start a WritePipeline with every generated range of passes scheduled
+        
+        With a generator pool the ring is shared memory filled by its
+        processes, at least one buffer per process so that all of them can
+        work on one file. Returns None - the passes are generated inline -
+        without ring_depth, below PIPELINE_MIN_SIZE or when every pass is a
+        cached fixed pattern.
+        """
+        if not self.ring_depth or size < PIPELINE_MIN_SIZE:
+            return None
+        generated = [(pattern, start, end) for _, pattern, ranges in passes
+                     if not pattern.period for start, end in ranges]
+        if not generated:
+            return None
+        pool = self.generator_pool()
+        if pool is not None:
+            pipeline = SharedMemoryPipeline(pool, max(self.ring_depth, pool.processes),
+                                            buffer_size, self.metrics)
+        else:
+            pipeline = WritePipeline(self.ring_depth, buffer_size, self.metrics)
+        for pattern, start, end in generated:
+            if direct:
+                start, end = direct_bounds(size, start, end)  # The tail is written inline
+            if end > start:
+                pipeline.schedule(pattern, start, end)
+        return pipeline
+    
+    def generator_pool(self):
+        """The job's GeneratorPool, started on first use (None without processes)"""
+        with self._lock:
+            if self._generator_pool is None:
+                processes = generator_processes(self.generator_processes)
+                if processes:
+                    self._generator_pool = GeneratorPool(processes)
+            return self._generator_pool
+    
+    def record_file(self, file_path, size, allocated, info, seed):
+        """Add a wiped file or device to the manifest"""
+        if self.manifest is not None:
+            self.manifest.add({
+                'path': file_path,
+                'size': size,
+                'allocated': allocated,
+                'inode': info.st_ino,
+                'method': self.plan.method,
+                'pass_plan': self.plan.describe(),
+                'wiped_at': datetime.now().isoformat(),
+                'verified': self.verifier.mode if self.verifier.enabled else None,
+                # Commits to the exact overwrite streams without revealing the seed
+                'pattern_digest': hashlib.sha256(seed).hexdigest(),
+            })
+    
+    def wipe_device(self, device_path, on_sized=None):
+        """Overwrite a whole block device or disk image in place, returning its size
+        
+        The size comes from seeking to the end, which works for block devices
+        (whose st_size is 0) as well as image files. Writes go through O_DIRECT
+        from an aligned buffer of at least DEVICE_BLOCK_SIZE, and every pass
+        ends with one flush. The device or image itself is never removed.
+        """
+        journal = self.journal
+        if journal is not None and device_path in journal.files_done:
+            return None  # Finished before the job was interrupted
+        
+        seed = derive_seed(self.job_seed, device_path)
+        patterns = self.plan.compile(seed, self.random_source)
+        with self.metrics.phase('open'):
+            fd, direct = open_target(device_path)
+        try:
+            size = target_size(fd)
+            extents = self.data_extents(fd, size)  # Sparse images keep their holes
+            resume_pass, resume_offset = ((0, 0) if journal is None
+                                          else journal.resume_point(device_path))
+            self.progress.add_total(self.bytes_to_write(extents, len(patterns), resume_pass,
+                                                        resume_offset))
+            if on_sized is not None:
+                on_sized()
+            
+            buffer = self.get_write_buffer(device_path, size, aligned=direct,
+                                           min_block_size=DEVICE_BLOCK_SIZE)
+            self.overwrite_passes(device_path, fd, direct, size, extents, patterns, buffer,
+                                  resume_pass, resume_offset, partial(fdatasync, fd),
+                                  durable=False)
+            if self.verifier.enabled and patterns:
+                with self.metrics.phase('verify', size):
+                    self.verifier.verify_file(device_path, size, patterns[-1], seed, extents)
+            info = os.fstat(fd)
+        finally:
+            os.close(fd)
+        
+        allocated = allocated_bytes(extents)
+        self.record_file(device_path, size, allocated, info, seed)
+        self.file_done(device_path, size, allocated)
+        return size
+    
+    def wipe_free_space(self, path, scheduler, on_sized=None):
+        """Wipe the free space of the volume holding path, returning the bytes covered
+        
+        The free space, less a safety reserve, is preallocated as fill files
+        in a hidden directory under path. They go through the scheduler like
+        any other files, so several are written at once with every pass of
+        the method, and are removed once durable. Whatever happens, the fill
+        directory is removed before returning.
+        """
+        if not os.path.isdir(path):
+            raise ValueError(f"Not a directory on the volume to sanitize: {path}")
+        # Named after the job, so a resumed job finds and restarts its own fill files
+        name = FILL_DIR_PREFIX + hashlib.sha256(self.job_seed).hexdigest()[:12]
+        directory = os.path.join(path, name)
+        if self.journal is not None:
+            self.journal.forget(directory)
+        remove_fill_directory(directory)
+        os.mkdir(directory, 0o700)
+        try:
+            fill_files = []
+            for index, size in enumerate(fill_sizes(directory)):
+                fill_path = os.path.join(directory, f"fill-{index:06d}")
+                fill_files.append((fill_path, create_fill_file(fill_path, size)))
+            total_size = sum(size for _, size in fill_files)
+            self.progress.add_total(total_size * len(self.plan))
+            if on_sized is not None:
+                on_sized()
+            
+            device = os.stat(directory).st_dev
+            futures = [scheduler.submit(fill_path, device, file_size=size, preallocated=True)
+                       for fill_path, size in fill_files]
+            wait(futures)  # Never remove fill files that are still being written
+            for future in futures:
+                future.result()
+            with self.metrics.phase('sync'):
+                self.sync_policy.flush()
+            return total_size
+        finally:
+            remove_fill_directory(directory)
+    
+    def wipe_folder(self, folder_path, scheduler=None, on_scanned=None):
+        """Securely wipe a folder and its contents, returning the bytes wiped
+        
+        The tree is read once: every file is sized from its cached scandir
+        stat and handed straight to the scheduler, and every directory is
+        removed as soon as everything below it is gone. Small files are
+        collected per directory and wiped in batches (see wipe_small_files()).
+        """
+        if scheduler is None:
+            with WipeScheduler(partial(self.run_task, self.wipe_file),
+                               max_workers=self.max_workers,
+                               storage_type=self.storage_type) as scheduler:
+                return self.wipe_folder(folder_path, scheduler, on_scanned)
+        
+        folder_path = os.path.normpath(folder_path)
+        metrics = self.metrics
+        tracker = _FolderTracker(self.sync_policy, metrics)
+        small_files = {}  # Directory -> [(name, stat)] not yet submitted
+        
+        def submit_small_files(dir_path):
+            batch = small_files.pop(dir_path)
+            tracker.add(dir_path)
+            future = scheduler.submit_call(batch[0][1].st_dev,
+                                           partial(self.run_task, self.wipe_small_files,
+                                                   dir_path, batch))
+            future.add_done_callback(partial(tracker.done, dir_path))
+        
+        total_size = 0
+        for kind, path, info in metrics.timed('scan', scan_tree(folder_path)):
+            if kind == 'file':
+                if self.remove_finished(path):
+                    continue  # Counted by wipe_item() from the journal
+                total_size += info.st_size
+                self.progress.add_total(info.st_size * len(self.plan))
+                dir_path = os.path.dirname(path)
+                if self.is_small_file(info):
+                    batch = small_files.setdefault(dir_path, [])
+                    batch.append((os.path.basename(path), info))
+                    if len(batch) >= self.small_file_batch:
+                        submit_small_files(dir_path)
+                    continue
+                tracker.add(dir_path)
+                future = scheduler.submit(path, info.st_dev, file_size=info.st_size)
+                future.add_done_callback(partial(tracker.done, dir_path))
+            elif kind == 'enter':
+                tracker.enter(path)
+            elif kind == 'exit':
+                if path in small_files:
+                    submit_small_files(path)
+                tracker.exit(path)
+            elif kind == 'other':
+                # Links, FIFOs and sockets hold no file data - never open them
+                try:
+                    with metrics.phase('unlink'):
+                        os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    tracker.fail(e)
+            else:
+                tracker.fail(info)
+        
+        if on_scanned is not None:
+            on_scanned()
+        tracker.wait()
+        if tracker.error is not None:
+            raise tracker.error
+        return total_size
+
+
+class _DescriptorBudget:
+    """Counting semaphore for open descriptors, taken several at a time
+    
+    acquire(count) waits until all count are free at once, so batches
+    never hold part of the budget while waiting for the rest.
+    """
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self._available = limit
+        self._condition = threading.Condition()
+    
+    def acquire(self, count):
+        count = min(count, self.limit)
+        with self._condition:
+            while self._available < count:
+                self._condition.wait()
+            self._available -= count
+    
+    def release(self, count):
+        count = min(count, self.limit)
+        with self._condition:
+            self._available += count
+            self._condition.notify_all()
+
+
+class _FolderTracker:
+    """Remove directories once every file below them has been wiped
+    
+    Each directory being scanned or holding files in flight has a pending
+    count (one for the scan itself, one per file and per open subdirectory).
+    When it drops to zero the sync policy is flushed - the files are durable
+    and unlinked - and the directory is removed, releasing its parent. The
+    flush and removal run outside the lock, so other workers never wait for
+    a disk flush; the directory stays pending (at zero) until it is gone.
+    """
+    
+    def __init__(self, sync_policy, metrics):
+        self.sync_policy = sync_policy
+        self.metrics = metrics
+        self.error = None
+        self._pending = {}
+        self._condition = threading.Condition()
+    
+    def enter(self, path):
+        with self._condition:
+            self._pending[path] = 1
+            parent = os.path.dirname(path)
+            if parent in self._pending:
+                self._pending[parent] += 1
+    
+    def add(self, dir_path):
+        with self._condition:
+            self._pending[dir_path] += 1
+    
+    def done(self, dir_path, future):
+        error = future.exception()
+        if error is not None:
+            self.fail(error)
+        self._release(dir_path)
+    
+    def exit(self, path):
+        self._release(path)
+    
+    def fail(self, error):
+        with self._condition:
+            self._set_error(error)
+    
+    def wait(self):
+        with self._condition:
+            while self._pending:
+                self._condition.wait()
+    
+    def _set_error(self, error):
+        if self.error is None:
+            self.error = error
+    
+    def _release(self, path):
+        """Drop one pending reference of path, removing directories that are done"""
+        while True:
+            with self._condition:
+                if path not in self._pending:
+                    return
+                self._pending[path] -= 1
+                if self._pending[path]:
+                    return
+            # Nothing below path is pending any more - only this thread removes it
+            self._remove_dir(path)
+            with self._condition:
+                del self._pending[path]
+                self._condition.notify_all()
+            path = os.path.dirname(path)
+    
+    def _remove_dir(self, path):
+        try:
+            with self.metrics.phase('sync'):
+                self.sync_policy.flush()
+        except OSError as e:
+            self.fail(e)
+        try:
+            with self.metrics.phase('unlink'):
+                os.rmdir(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Left behind only when something inside could not be wiped
+            self.fail(e)
+
+
+def dry_run(items, method=DEFAULT_WIPE_METHOD, target=DEFAULT_TARGET, skip_holes=True,
+            profiles=None, storage_type=AUTO_STORAGE_TYPE):
+    """Describe what wiping items would do without touching them (see plan_wipe())"""
+    return plan_wipe(items, method, target, skip_holes, profiles, storage_type)
+
+
+def wipe(items, method=DEFAULT_WIPE_METHOD, history=None, **options):
+    """Wipe items with a new engine and return the operation record
+    
+    options are passed to WipeEngine (storage_type, sync_policy, journal, ...).
+    When a HistoryStore is given the finished operation is appended to it and
+    the job journal, if any, is deleted.
+    """
+    engine = WipeEngine(method, **options)
+    operation = engine.wipe(items)
+    if history is not None:
+        history.append(operation)
+        if engine.journal is not None:
+            engine.journal.discard()
+    return operation
@@ -0,0 +1,102 @@
+"""
+File extents
+Allocated data ranges of sparse files, so holes are never written
+"""
+
+import os
+import stat
+import errno
+import struct
+
+FS_IOC_FIEMAP = 0xC020660B     # Linux ioctl: map a file's extents
+FIEMAP_FLAG_SYNC = 0x1         # Flush delayed allocation before mapping
+FIEMAP_EXTENT_LAST = 0x1
+FIEMAP_HEADER = struct.Struct('=QQIIII')
+FIEMAP_EXTENT = struct.Struct('=QQQQQI12x')
+FIEMAP_BATCH = 256             # Extents fetched per ioctl
+
+
+def _seek_extents(fd, size):
+    """Data ranges from lseek(SEEK_DATA / SEEK_HOLE)"""
+    extents = []
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                break  # Only a hole up to the end of the file
+            raise
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+        extents.append((start, end - start))
+        offset = end
+    os.lseek(fd, 0, os.SEEK_SET)
+    return extents
+
+
+def _fiemap_extents(fd, size):
+    """Data ranges from the FIEMAP ioctl"""
+    import fcntl
+    extents = []
+    offset = 0
+    while offset < size:
+        request = bytearray(FIEMAP_HEADER.size + FIEMAP_BATCH * FIEMAP_EXTENT.size)
+        FIEMAP_HEADER.pack_into(request, 0, offset, size - offset, FIEMAP_FLAG_SYNC, 0,
+                                FIEMAP_BATCH, 0)
+        fcntl.ioctl(fd, FS_IOC_FIEMAP, request)
+        mapped = FIEMAP_HEADER.unpack_from(request)[3]
+        if not mapped:
+            break
+        for index in range(mapped):
+            logical, _, length, _, _, flags = FIEMAP_EXTENT.unpack_from(
+                request, FIEMAP_HEADER.size + index * FIEMAP_EXTENT.size)
+            start = max(logical, offset)
+            end = min(logical + length, size)
+            if end > start:
+                extents.append((start, end - start))
+            offset = max(offset, logical + length)
+            if flags & FIEMAP_EXTENT_LAST:
+                return extents
+    return extents
+
+
+def _merge(extents):
+    merged = []
+    for start, length in sorted(extents):
+        if merged and start <= merged[-1][0] + merged[-1][1]:
+            last_start, last_length = merged[-1]
+            merged[-1] = (last_start, max(last_length, start + length - last_start))
+        else:
+            merged.append((start, length))
+    return merged
+
+
+def data_extents(fd, size):
+    """Sorted (offset, length) ranges of fd that hold data
+    
+    SEEK_DATA/SEEK_HOLE is used where the platform has it, then FIEMAP;
+    if neither works - or fd is a block device - the whole range is data.
+    Filesystems without hole support report a single extent anyway.
+    """
+    if size <= 0:
+        return []
+    if not stat.S_ISBLK(os.fstat(fd).st_mode):
+        if hasattr(os, 'SEEK_DATA'):
+            try:
+                return _merge(_seek_extents(fd, size))
+            except OSError:
+                pass
+        try:
+            return _merge(_fiemap_extents(fd, size))
+        except (ImportError, OSError):
+            pass
+    return [(0, size)]
+
+
+def allocated_bytes(extents):
+    return sum(length for _, length in extents)
+
+
+def bytes_before(extents, offset):
+    """Data bytes of extents that lie below offset"""
+    return sum(max(0, min(start + length, offset) - start) for start, length in extents)
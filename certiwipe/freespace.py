@@ -0,0 +1,69 @@
+"""
+Free-space sanitization
+Preallocated fill files that cover a volume's unallocated space until they are wiped
+"""
+
+import os
+import errno
+import shutil
+
+from .writer import MIB
+
+FILL_DIR_PREFIX = '.certiwipe-fill-'
+FILL_FILE_SIZE = 1024 * MIB          # Fill files are wiped concurrently, one per slot
+FREE_SPACE_RESERVE = 0.01            # Share of the volume always left free
+MIN_FREE_SPACE_RESERVE = 256 * MIB
+
+
+def free_space(path):
+    """(available bytes, volume size, block size) of the filesystem holding path"""
+    info = os.statvfs(path)
+    return info.f_bavail * info.f_frsize, info.f_blocks * info.f_frsize, info.f_frsize
+
+
+def fill_sizes(path, fill_file_size=FILL_FILE_SIZE):
+    """Sizes of the fill files that cover the free space of path, less the reserve
+    
+    The reserve (FREE_SPACE_RESERVE of the volume, at least
+    MIN_FREE_SPACE_RESERVE) keeps the volume from ever reaching 100% while
+    the fill files exist. Sizes are whole filesystem blocks.
+    """
+    available, volume_size, block_size = free_space(path)
+    reserve = max(MIN_FREE_SPACE_RESERVE, int(volume_size * FREE_SPACE_RESERVE))
+    fill = max(0, available - reserve)
+    fill -= fill % block_size
+    sizes = [fill_file_size] * (fill // fill_file_size)
+    if fill % fill_file_size:
+        sizes.append(fill % fill_file_size)
+    return sizes
+
+
+def create_fill_file(file_path, size):
+    """Create and preallocate one fill file, returning the bytes reserved
+    
+    posix_fallocate reserves the blocks without writing them. Filesystems
+    that cannot preallocate get a plain file of the right size instead,
+    which the overwrite passes then allocate block by block.
+    """
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0),
+                 0o600)
+    try:
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except AttributeError:
+            os.ftruncate(fd, size)
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+                raise  # ENOSPC: the free space shrank while we were filling it
+            os.ftruncate(fd, size)
+    except OSError:
+        os.close(fd)
+        os.remove(file_path)
+        raise
+    os.close(fd)
+    return size
+
+
+def remove_fill_directory(directory):
+    """Remove a fill directory and anything left in it"""
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,315 @@
+"""
+Wipe history store
+Operation records in an indexed SQLite database, written once and queried on demand
+"""
+
+import os
+import json
+import threading
+
+HISTORY_FILE = 'wipe_history.db'
+LEGACY_HISTORY_FILE = 'wipe_history.json'    # Whole-file history of earlier versions, migrated once
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    status TEXT NOT NULL,
+    method TEXT NOT NULL,
+    item_count INTEGER NOT NULL,
+    total_size INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    operator TEXT,
+    paths TEXT
+);
+CREATE INDEX IF NOT EXISTS operations_timestamp ON operations (timestamp);
+CREATE INDEX IF NOT EXISTS operations_status ON operations (status, timestamp);
+CREATE INDEX IF NOT EXISTS operations_method ON operations (method, timestamp);
+CREATE TABLE IF NOT EXISTS stats (
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    operations INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    partial INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    total_size INTEGER NOT NULL,
+    PRIMARY KEY (dimension, key)
+);
+CREATE TABLE IF NOT EXISTS certificates (
+    certificate_id TEXT PRIMARY KEY,
+    operation_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    issue_date TEXT NOT NULL,
+    path TEXT
+);
+CREATE INDEX IF NOT EXISTS certificates_operation ON certificates (operation_id);
+"""
+SCHEMA_VERSION = 4
+
+# Statistics rollups: dimension -> SQL expression of its key
+STATS_DIMENSIONS = {
+    'all': "''",
+    'method': "method",
+    'status': "status",
+    'day': "substr(timestamp, 1, 10)",
+    'operator': "COALESCE(operator, 'Unknown')",
+}
+STATS_COLUMNS = ('operations', 'completed', 'partial', 'failed', 'items', 'total_size')
+SUMMARY_COLUMNS = ('id', 'timestamp', 'status', 'method', 'item_count', 'total_size')
+CERTIFICATE_COLUMNS = ('certificate_id', 'operation_id', 'digest', 'issue_date', 'path')
+LOOKUP_BATCH = 500    # Keys per IN (...) query, well below SQLite's variable limit
+
+
+def _joined_paths(operation):
+    """Item paths of an operation as one searchable string"""
+    return '\n'.join(operation['items'])
+
+
+class HistoryStore:
+    """Wipe history backed by a SQLite database
+    
+    Each finished operation is inserted once as its own row; nothing is
+    ever rewritten or loaded in full. The summary columns are indexed for
+    filtering and ordering, the complete record is kept as compact JSON.
+    
+    Issued certificates are indexed by id with a digest of their signed
+    data, so that copies, duplicates and edits can be detected later.
+    
+    Statistics rollups (overall and by method, status, day and operator)
+    are updated in the same transaction as every insert, so reading them
+    is a primary-key lookup however long the history grows.
+    
+    The database is opened on first use (or by load() in the background).
+    An existing wipe_history.json next to it is imported in one transaction
+    and renamed to wipe_history.json.migrated.
+    """
+    
+    def __init__(self, path=HISTORY_FILE, legacy_path=None):
+        self.path = path
+        if legacy_path is None:
+            legacy_path = os.path.join(os.path.dirname(path), LEGACY_HISTORY_FILE)
+        self.legacy_path = legacy_path
+        self._db = None
+        self._lock = threading.RLock()
+    
+    @property
+    def loaded(self):
+        """Whether the database has been opened (and migrated) yet"""
+        return self._db is not None
+    
+    def load(self):
+        """Open the history database, migrating the legacy JSON file if present"""
+        with self._lock:
+            if self._db is None:
+                import sqlite3  # Only needed once history is actually used
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.executescript(_SCHEMA)
+                self._db = db
+                self._upgrade()
+                self._migrate()
+            return self._db
+    
+    def _upgrade(self):
+        """Bring a database written by an older version up to SCHEMA_VERSION"""
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(operations)")]
+        with self._db:
+            if 'operator' not in columns:
+                self._db.execute("ALTER TABLE operations ADD COLUMN operator TEXT")
+                try:
+                    self._db.execute("UPDATE operations SET operator = json_extract(record, '$.operator')")
+                except self._db.OperationalError:
+                    pass  # SQLite without JSON support - older operators stay 'Unknown'
+            if 'paths' not in columns:
+                self._db.execute("ALTER TABLE operations ADD COLUMN paths TEXT")
+                rows = self._db.execute("SELECT rowid, record FROM operations").fetchall()
+                self._db.executemany("UPDATE operations SET paths = ? WHERE rowid = ?",
+                                     ((_joined_paths(json.loads(record)), rowid)
+                                      for rowid, record in rows))
+            if version < 2:
+                self._rebuild_stats()
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def _rebuild_stats(self):
+        """Recompute every rollup from the operations table"""
+        self._db.execute("DELETE FROM stats")
+        for dimension, key in STATS_DIMENSIONS.items():
+            self._db.execute(
+                f"INSERT INTO stats SELECT ?, {key}, COUNT(*), SUM(status = 'Completed'), "
+                "SUM(status = 'Partial'), SUM(status = 'Failed'), SUM(item_count), SUM(total_size) "
+                f"FROM operations GROUP BY {key}", (dimension,))
+    
+    def _migrate(self):
+        """Import the legacy whole-file JSON history once"""
+        if not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                operations = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._db:
+            for operation in operations:
+                self._insert(operation)
+        os.replace(self.legacy_path, self.legacy_path + '.migrated')
+    
+    def _insert(self, operation):
+        """Insert or replace an operation and update the rollups (in a transaction)"""
+        previous = self._db.execute(
+            "SELECT timestamp, status, method, item_count, total_size, operator "
+            "FROM operations WHERE id = ?", (operation['id'],)).fetchone()
+        if previous is not None:
+            self._update_stats(*previous, sign=-1)
+        
+        summary = (operation['timestamp'], operation['status'], operation['method'],
+                   len(operation['items']), operation.get('total_size', 0),
+                   operation.get('operator'))
+        self._db.execute(
+            "INSERT OR REPLACE INTO operations "
+            "(id, timestamp, status, method, item_count, total_size, operator, paths, record) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (operation['id'],) + summary
+            + (_joined_paths(operation), json.dumps(operation, separators=(',', ':'))))
+        self._update_stats(*summary)
+    
+    def _update_stats(self, timestamp, status, method, item_count, total_size, operator, sign=1):
+        """Add (or with sign=-1 remove) one operation to every rollup"""
+        counts = (sign, sign * (status == 'Completed'), sign * (status == 'Partial'),
+                  sign * (status == 'Failed'), sign * item_count, sign * (total_size or 0))
+        keys = {'all': '', 'method': method, 'status': status, 'day': timestamp[:10],
+                'operator': operator or 'Unknown'}
+        for dimension, key in keys.items():
+            self._db.execute(
+                "INSERT INTO stats VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (dimension, key) DO UPDATE SET "
+                + ", ".join(f"{column} = {column} + excluded.{column}" for column in STATS_COLUMNS),
+                (dimension, key) + counts)
+        if sign < 0:
+            self._db.execute("DELETE FROM stats WHERE operations <= 0")
+    
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.load().execute(sql, params).fetchall()
+    
+    def append(self, operation):
+        """Record a finished operation"""
+        with self._lock:
+            db = self.load()
+            with db:
+                self._insert(operation)
+    
+    def get(self, operation_id):
+        """Find an operation by id or unique id prefix"""
+        rows = self._query("SELECT record FROM operations WHERE id >= ? AND id < ? ORDER BY id LIMIT 2",
+                           (operation_id, operation_id + '\uffff'))
+        records = [json.loads(record) for record, in rows]
+        exact = [op for op in records if op['id'] == operation_id]
+        if exact:
+            return exact[0]
+        return records[0] if len(records) == 1 else None
+    
+    def latest(self, status=None):
+        """Most recent operation, optionally with a given status"""
+        operations = self.query(status=status, limit=1)
+        return operations[0] if operations else None
+    
+    def recent(self, limit=20):
+        """The last limit operations, oldest first"""
+        return self.query(limit=limit)[::-1]
+    
+    def _where(self, status=None, method=None, since=None, until=None, path=None):
+        """WHERE clause and parameters for the filters"""
+        clauses = []
+        params = []
+        if path:
+            # Substring of any item path - the one filter that cannot use an index
+            path = path.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            path = f"%{path}%"
+        for clause, value in (("status = ?", status), ("method = ?", method),
+                              ("timestamp >= ?", since), ("timestamp < ?", until),
+                              ("paths LIKE ? ESCAPE '\\'", path)):
+            if value:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+    
+    def query(self, status=None, method=None, since=None, until=None, path=None,
+              limit=50, offset=0):
+        """One page of operations, newest first
+        
+        since and until are ISO timestamps (or date prefixes such as
+        '2024-05-01'); until is exclusive. path matches any part of an item path.
+        """
+        where, params = self._where(status, method, since, until, path)
+        rows = self._query(f"SELECT record FROM operations{where} "
+                           "ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?",
+                           params + [limit, offset])
+        return [json.loads(record) for record, in rows]
+    
+    def summaries(self, status=None, method=None, since=None, until=None, path=None,
+                  limit=50, offset=0):
+        """Like query() but only the indexed summary columns - no JSON is parsed"""
+        where, params = self._where(status, method, since, until, path)
+        rows = self._query("SELECT id, timestamp, status, method, item_count, total_size "
+                           f"FROM operations{where} "
+                           "ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?",
+                           params + [limit, offset])
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows]
+    
+    def count(self, status=None, method=None, since=None, until=None, path=None):
+        """Number of operations matching the filters"""
+        where, params = self._where(status, method, since, until, path)
+        return self._query(f"SELECT COUNT(*) FROM operations{where}", params)[0][0]
+    
+    def _lookup(self, sql, keys):
+        """Rows for many keys, LOOKUP_BATCH keys per query"""
+        keys = list(dict.fromkeys(keys))
+        rows = []
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            rows += self._query(sql.format(', '.join('?' * len(batch))), batch)
+        return rows
+    
+    def get_many(self, operation_ids):
+        """Operations by exact id: id -> record (unknown ids are left out)"""
+        rows = self._lookup("SELECT id, record FROM operations WHERE id IN ({})", operation_ids)
+        return {operation_id: json.loads(record) for operation_id, record in rows}
+    
+    def add_certificate(self, cert_data, path=None):
+        """Index an issued certificate"""
+        from .certificate import certificate_digest
+        with self._lock:
+            db = self.load()
+            with db:
+                db.execute("INSERT OR REPLACE INTO certificates VALUES (?, ?, ?, ?, ?)",
+                           (cert_data['certificate_id'], cert_data['operation_id'],
+                            certificate_digest(cert_data), cert_data['issue_date'], path))
+    
+    def certificates(self, certificate_ids):
+        """Index entries by certificate id: id -> {operation_id, digest, ...}"""
+        rows = self._lookup(f"SELECT {', '.join(CERTIFICATE_COLUMNS)} FROM certificates "
+                            "WHERE certificate_id IN ({})", certificate_ids)
+        return {row[0]: dict(zip(CERTIFICATE_COLUMNS, row)) for row in rows}
+    
+    def totals(self):
+        """Counters over the whole history (operations, completed, total_size, ...)"""
+        return self.stats('all').get('', dict.fromkeys(STATS_COLUMNS, 0))
+    
+    def stats(self, dimension='all'):
+        """Rollup for one dimension (all, method, status, day, operator): key -> counters"""
+        if dimension not in STATS_DIMENSIONS:
+            raise ValueError(f"Unknown statistics dimension: {dimension}")
+        rows = self._query(f"SELECT key, {', '.join(STATS_COLUMNS)} FROM stats "
+                           "WHERE dimension = ? ORDER BY key", (dimension,))
+        return {row[0]: dict(zip(STATS_COLUMNS, row[1:])) for row in rows}
+    
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,208 @@
+"""
+Wipe job journal
+Crash-safe checkpoints so an interrupted wipe resumes instead of starting over
+"""
+
+import os
+import json
+import threading
+
+from .sync import fdatasync
+
+JOURNAL_DIR = 'wipe_journals'
+CHECKPOINT_INTERVAL = 256 * 1024 * 1024    # Bytes written per file between checkpoints
+
+
+class JobJournal:
+    """Append-only journal of one wipe job
+    
+    The first line is the job header (operation record, engine settings and
+    the job seed that regenerates every random pass). After that each line
+    is a compact JSON array:
+        
+        ["c", file, pass, offset]       file is durably overwritten up to here
+        ["f", file, size, allocated]    file finished - its checkpoints are void
+        ["i", item, size, error]        selected item finished
+    
+    Lines are written with a single O_APPEND write and never fsynced: a
+    checkpoint or finished file is only logged after the file data it
+    covers is durable (after the sync policy's barrier for that file), so
+    losing the tail of the journal only means redoing a little work. A torn
+    last line is ignored when loading.
+    """
+    
+    def __init__(self, path, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.header = None
+        self.checkpoints = {}   # file -> (pass index, offset) to resume from
+        self.files_done = {}    # file -> size
+        self.files_allocated = {}   # file -> allocated bytes overwritten
+        self.items_done = {}    # item -> (size, error)
+        self._fd = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def for_operation(cls, operation, directory=JOURNAL_DIR, interval=CHECKPOINT_INTERVAL):
+        """Journal file for an operation in directory"""
+        return cls(os.path.join(directory, f"{operation['id']}.jsonl"), interval)
+    
+    @classmethod
+    def load(cls, path, interval=CHECKPOINT_INTERVAL):
+        """Read an existing journal and replay it into resume state"""
+        journal = cls(path, interval)
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Torn write at the moment of the crash
+                journal._replay(record)
+        if journal.header is None:
+            raise ValueError(f"Not a wipe journal: {path}")
+        return journal
+    
+    def _replay(self, record):
+        if isinstance(record, dict):
+            self.header = record
+        elif record[0] == 'c':
+            self.checkpoints[record[1]] = (record[2], record[3])
+        elif record[0] == 'f':
+            self.checkpoints.pop(record[1], None)
+            self.files_done[record[1]] = record[2]
+            self.files_allocated[record[1]] = record[3] if len(record) > 3 else record[2]
+        elif record[0] == 'i':
+            self.items_done[record[1]] = (record[2], record[3])
+    
+    @property
+    def operation(self):
+        return self.header['operation']
+    
+    @property
+    def job_seed(self):
+        return bytes.fromhex(self.header['job_seed'])
+    
+    @property
+    def settings(self):
+        return self.header['settings']
+    
+    def start(self, operation, job_seed, settings):
+        """Create the journal for a new job"""
+        self.header = {'operation': operation, 'job_seed': job_seed.hex(), 'settings': settings}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+        self._write(self.header)
+        fdatasync(self._fd)
+    
+    def reopen(self):
+        """Compact the replayed state into a fresh journal and keep appending"""
+        records = [self.header]
+        records += [['c', path, index, offset] for path, (index, offset) in self.checkpoints.items()]
+        records += [['f', path, size, self.files_allocated[path]]
+                    for path, size in self.files_done.items()]
+        records += [['i', item, size, error] for item, (size, error) in self.items_done.items()]
+        
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+    
+    def _write(self, *records):
+        lines = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+        with self._lock:
+            os.write(self._fd, lines.encode('ascii'))
+    
+    def checkpoint(self, file_path, pass_index, offset):
+        """Record that file_path is durably overwritten up to offset of pass_index"""
+        self._write(['c', file_path, pass_index, offset])
+    
+    def file_done(self, file_path, size, allocated):
+        self._write(['f', file_path, size, allocated])
+    
+    def batch_done(self, files):
+        """Record several finished (file_path, size, allocated) files in one write"""
+        self._write(*[['f', file_path, size, allocated] for file_path, size, allocated in files])
+    
+    def item_done(self, item, size, error):
+        self._write(['i', item, size, error])
+    
+    def resume_point(self, file_path):
+        """(pass index, offset) an interrupted file continues from"""
+        return self.checkpoints.pop(file_path, (0, 0))
+    
+    def forget(self, directory):
+        """Drop the resume state of every file under directory (it is started over)"""
+        prefix = os.path.join(directory, '')
+        for state in (self.checkpoints, self.files_done, self.files_allocated):
+            for path in [path for path in state if path.startswith(prefix)]:
+                del state[path]
+    
+    def wiped_bytes(self, item):
+        """Bytes of item's files finished before the job was resumed (None if none)"""
+        prefix = os.path.join(item, '')
+        sizes = [size for path, size in self.files_done.items()
+                 if path == item or path.startswith(prefix)]
+        return sum(sizes) if sizes else None
+    
+    def file_tracker(self, file_path, fd, durable):
+        """Per-file checkpoint counter for the write loop"""
+        return FileCheckpoint(self, file_path, fd, durable)
+    
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def discard(self):
+        """Close and delete the journal once the job is safely in the history"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class FileCheckpoint:
+    """Checkpoint one file every journal.interval bytes written
+    
+    Before a checkpoint is logged the file is fdatasynced (unless it is
+    written with O_DSYNC), so the journal never claims more than the disk
+    holds. With the default interval that is one extra flush per 256 MiB.
+    """
+    
+    def __init__(self, journal, file_path, fd, durable):
+        self.journal = journal
+        self.file_path = file_path
+        self.fd = fd
+        self.durable = durable
+        self.pass_index = 0
+        self.offset = 0
+        self._unsaved = 0
+    
+    def start_pass(self, pass_index, offset):
+        self.pass_index = pass_index
+        self.offset = offset
+    
+    def advance(self, nbytes):
+        self.offset += nbytes
+        self._unsaved += nbytes
+        if self._unsaved >= self.journal.interval:
+            if not self.durable:
+                fdatasync(self.fd)
+            self.journal.checkpoint(self.file_path, self.pass_index, self.offset)
+            self._unsaved = 0
+
+
+def pending_journals(directory=JOURNAL_DIR):
+    """Journals of interrupted jobs, oldest first"""
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.is_file() and entry.name.endswith('.jsonl')]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    return [entry.path for entry in entries]
@@ -0,0 +1,221 @@
+"""
+Wipe manifest
+Per-file records hashed into a Merkle tree while the wipe runs
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+MANIFEST_DIR = 'wipe_manifests'
+HASH_SIZE = 32
+
+
+def leaf_hash(record):
+    """Hash of one file record (RFC 6962 leaf, canonical JSON)"""
+    data = json.dumps(record, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(b'\x00' + data).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def _split(size):
+    """Largest power of two smaller than size"""
+    return 1 << ((size - 1).bit_length() - 1)
+
+
+def merkle_root(leaves):
+    """Root of the tree over a list of leaf hashes"""
+    if not leaves:
+        return hashlib.sha256(b'').digest()
+    if len(leaves) == 1:
+        return leaves[0]
+    k = _split(len(leaves))
+    return node_hash(merkle_root(leaves[:k]), merkle_root(leaves[k:]))
+
+
+def inclusion_proof(leaves, index):
+    """Sibling hashes proving leaf index is part of the tree, leaf first"""
+    if len(leaves) <= 1:
+        return []
+    k = _split(len(leaves))
+    if index < k:
+        return inclusion_proof(leaves[:k], index) + [merkle_root(leaves[k:])]
+    return inclusion_proof(leaves[k:], index - k) + [merkle_root(leaves[:k])]
+
+
+def verify_inclusion(leaf, index, size, proof, root):
+    """Check an inclusion proof against a root (RFC 9162 section 2.1.3.2)"""
+    if index >= size:
+        return False
+    fn, sn, digest = index, size - 1, leaf
+    for sibling in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            digest = node_hash(sibling, digest)
+            while not fn & 1 and fn:
+                fn >>= 1
+                sn >>= 1
+        else:
+            digest = node_hash(digest, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and digest == root
+
+
+class MerkleAccumulator:
+    """Running Merkle root over appended leaves in O(log n) memory
+    
+    Only the roots of the perfect subtrees (the 'peaks') are kept; folding
+    them right to left gives the same root as merkle_root() over all leaves.
+    """
+    
+    def __init__(self):
+        self.size = 0
+        self._peaks = []  # (height, hash), tallest first
+    
+    def add(self, leaf):
+        height = 0
+        while self._peaks and self._peaks[-1][0] == height:
+            leaf = node_hash(self._peaks.pop()[1], leaf)
+            height += 1
+        self._peaks.append((height, leaf))
+        self.size += 1
+    
+    def root(self):
+        if not self._peaks:
+            return merkle_root([])
+        digest = self._peaks[-1][1]
+        for _, peak in reversed(self._peaks[:-1]):
+            digest = node_hash(peak, digest)
+        return digest
+
+
+class WipeManifest:
+    """Per-file wipe records and their Merkle tree for one operation
+    
+    Records go to <id>.jsonl and their leaf hashes to <id>.leaves (32 bytes
+    each, in the same order) as files finish. The root is maintained
+    incrementally, so a certificate only has to carry the root and the
+    leaf count - not the file list. Inclusion proofs are built later from
+    the leaves file.
+    """
+    
+    def __init__(self, path):
+        self.path = path    # Without extension
+        self.accumulator = MerkleAccumulator()
+        self._records = None
+        self._leaves = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def for_operation(cls, operation, directory=MANIFEST_DIR):
+        return cls(os.path.join(directory, operation['id']))
+    
+    @classmethod
+    def from_summary(cls, summary):
+        """Manifest of a finished operation from its summary()"""
+        return cls(os.path.splitext(summary['file'])[0])
+    
+    @property
+    def records_path(self):
+        return self.path + '.jsonl'
+    
+    @property
+    def leaves_path(self):
+        return self.path + '.leaves'
+    
+    def open(self):
+        """Open for appending, picking up records already written (resumed jobs)"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Unbuffered: a record reaches the OS before its file is removed
+        self._records = open(self.records_path, 'a+b', buffering=0)
+        self._leaves = open(self.leaves_path, 'a+b', buffering=0)
+        
+        # After a crash the two files may disagree - keep the complete pairs
+        self._records.seek(0)
+        ends = [0]
+        for line in self._records:
+            if line.endswith(b'\n'):
+                ends.append(ends[-1] + len(line))
+        leaves = self.read_leaves()
+        count = min(len(ends) - 1, len(leaves))
+        self._records.truncate(ends[count])
+        self._leaves.truncate(count * HASH_SIZE)
+        for leaf in leaves[:count]:
+            self.accumulator.add(leaf)
+    
+    def add(self, record):
+        """Append one file record, returning its leaf index"""
+        leaf = leaf_hash(record)
+        line = (json.dumps(record, sort_keys=True, separators=(',', ':')) + '\n').encode('ascii')
+        with self._lock:
+            index = self.accumulator.size
+            self.accumulator.add(leaf)
+            self._records.write(line)
+            self._leaves.write(leaf)
+        return index
+    
+    def close(self):
+        with self._lock:
+            for f in (self._records, self._leaves):
+                if f is not None:
+                    f.close()
+            self._records = self._leaves = None
+    
+    def summary(self):
+        """Root and size for the operation record and certificate"""
+        return {
+            'root': self.accumulator.root().hex(),
+            'leaves': self.accumulator.size,
+            'algorithm': 'sha256-rfc6962',
+            'file': self.records_path,
+        }
+    
+    def read_leaves(self):
+        try:
+            with open(self.leaves_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        count = len(data) // HASH_SIZE  # Ignore a torn last hash
+        return [data[i * HASH_SIZE:(i + 1) * HASH_SIZE] for i in range(count)]
+    
+    def find(self, file_path):
+        """(index, record) of the last record for file_path, or None"""
+        found = None
+        needle = json.dumps(file_path)  # As it appears in a record line
+        with open(self.records_path, 'r', encoding='utf-8') as f:
+            for index, line in enumerate(f):
+                if needle in line:
+                    record = json.loads(line)
+                    if record['path'] == file_path:
+                        found = index, record
+        return found
+    
+    def prove(self, file_path):
+        """Inclusion proof that file_path was wiped, or None if it is not listed"""
+        found = self.find(file_path)
+        if found is None:
+            return None
+        index, record = found
+        leaves = self.read_leaves()
+        return {
+            'record': record,
+            'index': index,
+            'leaves': len(leaves),
+            'root': merkle_root(leaves).hex(),
+            'proof': [sibling.hex() for sibling in inclusion_proof(leaves, index)],
+        }
+
+
+def check_proof(proof, root=None):
+    """Verify a proof from WipeManifest.prove(), optionally against a known root"""
+    expected_root = bytes.fromhex(root or proof['root'])
+    return verify_inclusion(leaf_hash(proof['record']), proof['index'], proof['leaves'],
+                            [bytes.fromhex(sibling) for sibling in proof['proof']],
+                            expected_root)
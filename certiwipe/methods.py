@@ -0,0 +1,109 @@
+"""
+Wipe methods
+Each method is compiled into a PassPlan - an ordered list of overwrite passes
+"""
+
+from .patterns import (DEFAULT_RANDOM_PATTERN, INVERT_TABLE, ComplementPattern,
+                       create_random_pattern, derive_seed, repeating_pattern)
+
+
+class WipePass:
+    """One overwrite pass of a wipe method
+    
+    kind is 'random', 'fixed' (value is a byte), 'pattern' (value is a byte
+    sequence) or 'complement' (inverse of the previous pass).
+    """
+    
+    def __init__(self, kind, value=None):
+        if kind not in ('random', 'fixed', 'pattern', 'complement'):
+            raise ValueError(f"Unknown pass type: {kind}")
+        self.kind = kind
+        self.value = value
+    
+    def describe(self):
+        if self.kind == 'fixed':
+            return f"0x{self.value:02X}"
+        if self.kind == 'pattern':
+            return f"0x{bytes(self.value).hex().upper()}"
+        return self.kind
+
+
+class PassPlan:
+    """A wipe method compiled into an ordered list of passes"""
+    
+    def __init__(self, method, passes, standard):
+        self.method = method
+        self.passes = list(passes)
+        self.standard = standard
+    
+    def __len__(self):
+        return len(self.passes)
+    
+    def describe(self):
+        """Pass labels for operation records and certificates"""
+        return [wipe_pass.describe() for wipe_pass in self.passes]
+    
+    def compile(self, seed, random_source=DEFAULT_RANDOM_PATTERN):
+        """Return one pattern generator per pass
+        
+        Random passes get their own random_source generator (see
+        RANDOM_PATTERNS) seeded from seed, so any pass can be regenerated
+        later. Deterministic passes share cached patterns.
+        """
+        patterns = []
+        for index, wipe_pass in enumerate(self.passes):
+            if wipe_pass.kind == 'random':
+                pattern = create_random_pattern(random_source, derive_seed(seed, index))
+            elif wipe_pass.kind == 'fixed':
+                pattern = repeating_pattern(bytes([wipe_pass.value]))
+            elif wipe_pass.kind == 'pattern':
+                pattern = repeating_pattern(bytes(wipe_pass.value))
+            elif not patterns:
+                raise ValueError("A complement pass needs a previous pass")
+            elif patterns[-1].period:
+                pattern = repeating_pattern(patterns[-1].pattern.translate(INVERT_TABLE))
+            else:
+                pattern = ComplementPattern(patterns[-1])
+            patterns.append(pattern)
+        return patterns
+
+
+def _gutmann_passes():
+    """Gutmann's 35 passes: 4 random, 27 MFM/RLL patterns, 4 random"""
+    patterns = [b'\x55', b'\xAA', b'\x92\x49\x24', b'\x49\x24\x92', b'\x24\x92\x49']
+    patterns += [bytes([value * 0x11]) for value in range(16)]
+    patterns += [b'\x92\x49\x24', b'\x49\x24\x92', b'\x24\x92\x49',
+                 b'\x6D\xB6\xDB', b'\xB6\xDB\x6D', b'\xDB\x6D\xB6']
+    passes = [WipePass('random') for _ in range(4)]
+    passes += [WipePass('pattern', pattern) for pattern in patterns]
+    passes += [WipePass('random') for _ in range(4)]
+    return passes
+
+
+# Pass plans for every method offered in the dashboard
+WIPE_METHODS = {
+    'DOD 3-Pass': PassPlan('DOD 3-Pass', [
+        WipePass('fixed', 0x00), WipePass('complement'), WipePass('random'),
+    ], 'DOD 5220.22-M'),
+    'DOD 7-Pass': PassPlan('DOD 7-Pass', [
+        WipePass('fixed', 0x00), WipePass('complement'), WipePass('random'),
+        WipePass('random'),
+        WipePass('fixed', 0x00), WipePass('complement'), WipePass('random'),
+    ], 'DOD 5220.22-M ECE'),
+    'NIST Clear': PassPlan('NIST Clear', [
+        WipePass('random'),
+    ], 'NIST SP 800-88 Clear'),
+    'NIST Purge': PassPlan('NIST Purge', [
+        WipePass('random'), WipePass('complement'), WipePass('random'),
+    ], 'NIST SP 800-88 Purge'),
+    'Gutmann 35-Pass': PassPlan('Gutmann 35-Pass', _gutmann_passes(), 'Gutmann'),
+}
+DEFAULT_WIPE_METHOD = 'DOD 3-Pass'
+
+
+def get_pass_plan(method):
+    """Look up the pass plan for a method name"""
+    try:
+        return WIPE_METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unknown wipe method: {method}") from None
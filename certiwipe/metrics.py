@@ -0,0 +1,226 @@
+"""
+Wipe metrics
+Per-phase counters and latency histograms of the engine's hot paths, and an optional cProfile hook
+"""
+
+import os
+import json
+import bisect
+import threading
+import time
+
+# Phases of a wipe, in export order
+PHASES = (
+    'scan',       # Directory traversal, per entry
+    'open',       # Opening files and devices
+    'generate',   # Pattern generation, per block
+    'stall',      # Writer waiting for a pipeline to generate the next block
+    'write',      # Writes, per block
+    'sync',       # Durability barriers (fdatasync, syncfs)
+    'verify',     # Read-back verification, per file
+    'unlink',     # Removing files and directories
+)
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5,
+                   1.0, 5.0, 10.0)
+METRIC_PREFIX = 'certiwipe'
+
+
+def _escape(value):
+    """A Prometheus label value, with backslashes, quotes and newlines escaped"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _PhaseStats:
+    __slots__ = ('count', 'seconds', 'bytes', 'max', 'buckets')
+    
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class _PhaseTimer:
+    """Context manager that observes the time spent in its block"""
+    __slots__ = ('metrics', 'phase', 'nbytes', 'started')
+    
+    def __init__(self, metrics, phase, nbytes):
+        self.metrics = metrics
+        self.phase = phase
+        self.nbytes = nbytes
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.phase, time.perf_counter() - self.started, self.nbytes)
+
+
+class WipeMetrics:
+    """Thread-safe per-phase counters and latency histograms for one wipe job
+    
+    The engine observe()s every block, barrier and file operation: a
+    count, the seconds and bytes spent and a histogram bucket are updated
+    under a short lock, so instrumentation costs two clock reads per block
+    or file operation - nothing per byte. summary() is what the
+    history record keeps; export() writes a Prometheus textfile (.prom) or
+    a JSON snapshot for dashboards and node_exporter.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.begin()
+    
+    def begin(self):
+        """Reset the counters for a new job"""
+        with self._lock:
+            self._phases = {}
+            self.started = time.time()
+    
+    def observe(self, phase, seconds, nbytes=0):
+        """Record one operation of phase that took seconds (and moved nbytes)"""
+        with self._lock:
+            stats = self._phases.get(phase)
+            if stats is None:
+                stats = self._phases[phase] = _PhaseStats()
+            stats.count += 1
+            stats.seconds += seconds
+            stats.bytes += nbytes
+            if seconds > stats.max:
+                stats.max = seconds
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+    
+    def phase(self, phase, nbytes=0):
+        """Time a block of code: with metrics.phase('sync'): ..."""
+        return _PhaseTimer(self, phase, nbytes)
+    
+    def timed(self, phase, iterable):
+        """Yield from iterable, observing the time every item took to produce"""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(phase, time.perf_counter() - started)
+            yield item
+    
+    def _ordered(self):
+        """(phase, stats) in PHASES order, then any others (lock held)"""
+        names = [name for name in PHASES if name in self._phases]
+        names += sorted(name for name in self._phases if name not in PHASES)
+        return [(name, self._phases[name]) for name in names]
+    
+    def summary(self):
+        """Compact per-phase timings for the operation record"""
+        with self._lock:
+            return {name: {'count': stats.count, 'seconds': round(stats.seconds, 6),
+                           'bytes': stats.bytes, 'max': round(stats.max, 6)}
+                    for name, stats in self._ordered()}
+    
+    def snapshot(self):
+        """Everything measured, including the cumulative histograms"""
+        with self._lock:
+            phases = {}
+            for name, stats in self._ordered():
+                cumulative = 0
+                buckets = []
+                for bound, count in zip(LATENCY_BUCKETS + (None,), stats.buckets):
+                    cumulative += count
+                    buckets.append([bound, cumulative])  # None is +Inf
+                phases[name] = {'count': stats.count, 'seconds': stats.seconds,
+                                'bytes': stats.bytes, 'max': stats.max, 'buckets': buckets}
+            return {'started': self.started, 'phases': phases}
+    
+    def prometheus(self, labels=None):
+        """The snapshot in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        extra = ''.join(f',{key}="{_escape(value)}"'
+                        for key, value in sorted((labels or {}).items()))
+        seconds = f"{METRIC_PREFIX}_phase_seconds"
+        lines = [f"# HELP {seconds} Time spent per wipe phase.", f"# TYPE {seconds} histogram"]
+        for name, stats in snapshot['phases'].items():
+            for bound, count in stats['buckets']:
+                le = '+Inf' if bound is None else repr(bound)
+                lines.append(f'{seconds}_bucket{{phase="{name}"{extra},le="{le}"}} {count}')
+            lines.append(f'{seconds}_sum{{phase="{name}"{extra}}} {stats["seconds"]!r}')
+            lines.append(f'{seconds}_count{{phase="{name}"{extra}}} {stats["count"]}')
+        nbytes = f"{METRIC_PREFIX}_phase_bytes_total"
+        lines += [f"# HELP {nbytes} Bytes moved per wipe phase.", f"# TYPE {nbytes} counter"]
+        for name, stats in snapshot['phases'].items():
+            lines.append(f'{nbytes}{{phase="{name}"{extra}}} {stats["bytes"]}')
+        return '\n'.join(lines) + '\n'
+    
+    def export(self, path, labels=None):
+        """Write the metrics to path: Prometheus text for .prom, JSON otherwise
+        
+        The file is replaced atomically, so a textfile collector never
+        reads half of it.
+        """
+        if path.endswith('.prom'):
+            text = self.prometheus(labels)
+        else:
+            snapshot = self.snapshot()
+            snapshot['labels'] = labels or {}
+            text = json.dumps(snapshot, indent=2)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+
+class JobProfiler:
+    """cProfile hook for one job, merged over every thread that does its work
+    
+    cProfile only sees the thread that enabled it, so every task the engine
+    runs (items, files, small-file batches) is profiled by its thread's own
+    cProfile.Profile and dump() merges them into one pstats file. A task is
+    run unprofiled if its thread is already profiling or another profiler
+    is active (Python 3.12+ allows one at a time, and it sees every thread).
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._profiles = []
+        self._lock = threading.Lock()
+    
+    def run(self, function, *args, **kwargs):
+        """Call function under this thread's profiler"""
+        if getattr(self._local, 'active', False):
+            return function(*args, **kwargs)
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            import cProfile
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        try:
+            profile.enable()
+        except ValueError:
+            return function(*args, **kwargs)
+        self._local.active = True
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._local.active = False
+    
+    def dump(self):
+        """Write the merged statistics (python -m pstats, snakeviz) - False if none"""
+        import pstats
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return False
+        try:
+            stats = pstats.Stats(*profiles)
+        except TypeError:
+            return False  # No profile recorded a call
+        stats.dump_stats(self.path)
+        return True
@@ -0,0 +1,270 @@
+"""
+Overwrite pattern generators
+Bulk random, keystream and fixed/repeating pattern buffers for every pass
+"""
+
+import os
+import hashlib
+import functools
+
+# Overwrite pattern engine settings
+KEYSTREAM_BLOCK_SIZE = 1024 * 1024        # Seekable block size for seeded generators
+PATTERN_CACHE_BLOCK_SIZE = 1024 * 1024    # Cached layout size per deterministic pattern
+DEFAULT_RANDOM_PATTERN = 'keystream'
+
+
+class PatternGenerator:
+    """Base class for overwrite pattern generators
+    
+    Generators fill whole buffers in one call. The offset is the position of
+    the buffer inside the file so that seeded and repeating patterns stay
+    aligned no matter how the caller splits the writes.
+    """
+    name = 'pattern'
+    period = None  # Length of the repeat cycle for deterministic patterns
+    
+    def fill(self, buffer, offset=0):
+        """Fill a writable buffer with pattern bytes starting at offset"""
+        raise NotImplementedError
+    
+    def generate(self, size, offset=0):
+        """Return a new bytearray of pattern bytes"""
+        buffer = bytearray(size)
+        self.fill(buffer, offset)
+        return buffer
+    
+    def describe(self):
+        """Short description used in operation records"""
+        return self.name
+
+
+class RepeatingPattern(PatternGenerator):
+    """Repeat a fixed byte sequence across the whole target"""
+    name = 'repeat'
+    
+    def __init__(self, pattern):
+        if not pattern:
+            raise ValueError("Repeating pattern must not be empty")
+        self.pattern = bytes(pattern)
+        self.period = len(self.pattern)
+        self._tile = b''
+    
+    def _get_tile(self, size):
+        """Return a cached tile covering size bytes from any phase
+        
+        Threads share the pattern, so a tile is built locally and only
+        replaces the cache if it is longer - a thread never returns a tile
+        another thread has just swapped for a shorter one.
+        """
+        needed = size + len(self.pattern)
+        tile = self._tile
+        if len(tile) < needed:
+            tile = self.pattern * -(-needed // len(self.pattern))
+            if len(tile) > len(self._tile):
+                self._tile = tile
+        return tile
+    
+    def fill(self, buffer, offset=0):
+        view = memoryview(buffer).cast('B')
+        size = len(view)
+        phase = offset % len(self.pattern)
+        view[:] = memoryview(self._get_tile(size))[phase:phase + size]
+    
+    def block(self, size, offset=0):
+        """Return a shared read-only block of whole periods starting at offset
+        
+        Blocks are cached across files, so deterministic passes write straight
+        from the cache without refilling any buffer.
+        """
+        size = min(size, PATTERN_CACHE_BLOCK_SIZE)
+        size = max(self.period, size - size % self.period)
+        return _repeating_block(self.pattern, size, offset % self.period)
+    
+    def describe(self):
+        return f"0x{self.pattern.hex().upper()}"
+
+
+@functools.lru_cache(maxsize=128)
+def _repeating_block(pattern, size, phase):
+    tile = pattern * (size // len(pattern) + 1)
+    return tile[phase:phase + size]
+
+
+@functools.lru_cache(maxsize=None)
+def repeating_pattern(pattern):
+    """Shared RepeatingPattern instance for a byte sequence"""
+    return RepeatingPattern(pattern)
+
+
+class FixedBytePattern(RepeatingPattern):
+    """Overwrite with a single byte value (e.g. 0x00 or 0xFF)"""
+    name = 'fixed'
+    
+    def __init__(self, value):
+        super().__init__(bytes([value & 0xFF]))
+        self.value = value & 0xFF
+
+
+class SecureRandomPattern(PatternGenerator):
+    """Operating system CSPRNG output (os.urandom), not reproducible
+    
+    Where /dev/urandom exists the buffer is filled in place with readv, so no
+    intermediate bytes object is created.
+    """
+    name = 'urandom'
+    label = 'OS random (not verifiable)'
+    _device_fd = None
+    
+    @classmethod
+    def _device(cls):
+        if cls._device_fd is None and hasattr(os, 'readv') and os.path.exists('/dev/urandom'):
+            cls._device_fd = os.open('/dev/urandom', os.O_RDONLY)
+        return cls._device_fd
+    
+    def fill(self, buffer, offset=0):
+        view = memoryview(buffer).cast('B')
+        device = self._device()
+        if device is None:
+            view[:] = os.urandom(len(view))
+            return
+        position = 0
+        while position < len(view):
+            position += os.readv(device, [view[position:]])
+
+
+class BlockPattern(PatternGenerator):
+    """Seeded generator that is seekable in KEYSTREAM_BLOCK_SIZE blocks"""
+    
+    def __init__(self, seed=None, block_size=KEYSTREAM_BLOCK_SIZE):
+        self.seed = seed if seed is not None else os.urandom(32)
+        self.block_size = block_size
+    
+    def _block(self, index, length):
+        """Return (at least) the first length bytes of keystream block index"""
+        raise NotImplementedError
+    
+    def fill(self, buffer, offset=0, table=None):
+        """Fill buffer with the stream at offset, mapped through table if given"""
+        view = memoryview(buffer).cast('B')
+        size = len(view)
+        position = 0
+        while position < size:
+            index, start = divmod(offset + position, self.block_size)
+            count = min(self.block_size - start, size - position)
+            block = self._block(index, start + count)
+            if table is not None:
+                block = block[start:start + count].translate(table)  # No copy if whole
+                start = 0
+            view[position:position + count] = memoryview(block)[start:start + count]
+            position += count
+
+
+class KeystreamPattern(BlockPattern):
+    """Cryptographically secure keystream (SHAKE-128 in counter mode)
+    
+    Each block is SHAKE-128(seed || block index), so any range of the stream
+    can be regenerated from the seed alone. SHAKE output is a prefix of any
+    longer output, so only the bytes a write needs are generated - a small
+    file costs a few hundred bytes of keystream, not a whole block.
+    """
+    name = 'keystream'
+    label = 'Keystream (SHAKE-128)'
+    
+    def _block(self, index, length):
+        return hashlib.shake_128(self.seed + index.to_bytes(8, 'little')).digest(length)
+
+
+def _import_numpy():
+    """Import NumPy on first use so it never slows down startup"""
+    try:
+        import numpy
+    except ImportError:  # NumPy is optional - only used for vectorized generation
+        return None
+    return numpy
+
+
+class NumpyRandomPattern(BlockPattern):
+    """NumPy-vectorized PCG64 generator (fast, not cryptographically secure)"""
+    name = 'numpy'
+    label = 'NumPy PCG64 (fast, not cryptographic)'
+    
+    def __init__(self, seed=None, block_size=KEYSTREAM_BLOCK_SIZE):
+        self.np = _import_numpy()
+        if self.np is None:
+            raise RuntimeError("NumPy is not installed")
+        super().__init__(seed, block_size)
+        self._entropy = int.from_bytes(self.seed, 'little')
+    
+    def __getstate__(self):
+        # Modules cannot be pickled - generator processes import NumPy again
+        state = self.__dict__.copy()
+        del state['np']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.np = _import_numpy()
+    
+    def _block(self, index, length):
+        np = self.np
+        # Like SHAKE output, shorter PCG64 output is a prefix of longer output
+        return np.random.Generator(np.random.PCG64([self._entropy, index])).bytes(length)
+
+
+# Registry of random data generators selectable by name
+RANDOM_PATTERNS = {
+    'keystream': KeystreamPattern,
+    'urandom': SecureRandomPattern,
+    'numpy': NumpyRandomPattern,
+}
+
+
+def create_random_pattern(kind=DEFAULT_RANDOM_PATTERN, seed=None):
+    """Create a random data generator, falling back to the keystream
+    
+    Only seeded kinds (keystream, numpy) can be regenerated - for
+    verification and for resumed passes; urandom output never repeats.
+    """
+    if kind not in RANDOM_PATTERNS:
+        raise ValueError(f"Unknown random source: {kind}")
+    if kind == 'numpy' and _import_numpy() is None:
+        kind = 'keystream'
+    if kind == 'urandom':
+        return SecureRandomPattern()
+    return RANDOM_PATTERNS[kind](seed)
+
+
+INVERT_TABLE = bytes(255 - i for i in range(256))
+COMPLEMENT_CHUNK_SIZE = 64 * 1024    # Complemented at a time for non-seekable sources
+
+
+class ComplementPattern(PatternGenerator):
+    """Bitwise complement of another (random) generator's output"""
+    name = 'complement'
+    
+    def __init__(self, source):
+        self.source = source
+    
+    def fill(self, buffer, offset=0):
+        view = memoryview(buffer).cast('B')
+        if isinstance(self.source, BlockPattern):
+            # Each keystream block is complemented as it is generated
+            self.source.fill(view, offset, INVERT_TABLE)
+            return
+        # bytes.translate cannot work in place, so bound its copies to a chunk
+        for position in range(0, len(view), COMPLEMENT_CHUNK_SIZE):
+            chunk = view[position:position + COMPLEMENT_CHUNK_SIZE]
+            self.source.fill(chunk, offset + position)
+            chunk[:] = chunk.tobytes().translate(INVERT_TABLE)
+
+
+def derive_seed(seed, *parts):
+    """Derive a child seed from a parent seed and labels (file path, pass)"""
+    digest = hashlib.sha256(seed)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8', 'surrogateescape')
+        elif isinstance(part, int):
+            part = part.to_bytes(8, 'little')
+        digest.update(len(part).to_bytes(4, 'little') + part)
+    return digest.digest()
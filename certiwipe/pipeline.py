@@ -0,0 +1,247 @@
+"""
+Write pipeline
+Generator threads or processes fill a ring of buffers with pattern bytes while the wipe thread
+writes them
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+from .writer import MIB, allocate_aligned_buffer, positional_write
+
+# Pipeline settings
+DEFAULT_RING_DEPTH = 4            # Buffers in flight per file; 0 generates inline
+PIPELINE_MIN_SIZE = 32 * MIB      # Smaller files are not worth a generator thread
+
+
+def _write_all(fd, chunk, offset):
+    # pwrite may write less than requested - continue from where it stopped
+    done = 0
+    while done < len(chunk):
+        done += positional_write(fd, chunk[done:], offset + done)
+
+
+class WritePipeline:
+    """Double-buffered pattern generation for one file or device
+    
+    The writer schedule()s every generated range in the order it will
+    write them, then write()s them range by range. A generator thread
+    fills free ring buffers ahead of the writer and blocks once all depth
+    buffers are filled and not yet written, so memory stays at depth buffers
+    and sustained throughput is that of the slower side instead of both
+    added up. The generator runs across pass boundaries, filling the next
+    pass while the writer waits for its barrier.
+    
+    Buffers are page-aligned, so O_DIRECT writers can use them as they are.
+    With metrics, generation, writes and the writer's waits for the
+    generator ('stall') are observed per buffer.
+    """
+    
+    def __init__(self, depth, buffer_size, metrics=None):
+        self.depth = depth
+        self.metrics = metrics
+        self._free = queue.Queue()
+        self._ready = queue.Queue()
+        self._jobs = queue.Queue()
+        for _ in range(depth):
+            self._free.put(allocate_aligned_buffer(buffer_size))
+        self._thread = threading.Thread(target=self._generate, name='wipe-fill', daemon=True)
+        self._thread.start()
+    
+    def schedule(self, pattern, start, end):
+        """Queue [start, end) of pattern for generation"""
+        self._jobs.put((pattern, start, end))
+    
+    def _generate(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            pattern, offset, end = job
+            while offset < end:
+                buffer = self._free.get()
+                if buffer is None:
+                    return
+                count = min(len(buffer), end - offset)
+                started = time.perf_counter()
+                try:
+                    pattern.fill(memoryview(buffer)[:count], offset)
+                except BaseException as e:
+                    self._ready.put(e)
+                    return
+                if self.metrics is not None:
+                    self.metrics.observe('generate', time.perf_counter() - started, count)
+                self._ready.put((buffer, offset, count))
+                offset += count
+    
+    def write(self, fd, start, end, progress=None):
+        """Write the next scheduled range, which must be [start, end), to fd"""
+        metrics = self.metrics
+        offset = start
+        while offset < end:
+            started = time.perf_counter()
+            item = self._ready.get()
+            if isinstance(item, BaseException):
+                raise item
+            buffer, position, count = item
+            if position != offset:
+                raise RuntimeError(f"Pipeline out of order: {position} != {offset}")
+            ready = time.perf_counter()
+            _write_all(fd, memoryview(buffer)[:count], offset)
+            if metrics is not None:
+                metrics.observe('stall', ready - started)
+                metrics.observe('write', time.perf_counter() - ready, count)
+            self._free.put(buffer)
+            offset += count
+            if progress is not None:
+                progress(count)
+        return end - start
+    
+    def close(self):
+        """Stop the generator thread, also if ranges are left unwritten"""
+        self._jobs.put(None)
+        self._free.put(None)
+        self._thread.join()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def generator_processes(processes=None):
+    """Worker processes for keystream generation - none unless asked for
+    
+    The pool is opt-in (None means no pool): its forkserver or spawn
+    workers import the caller's __main__ module again, so a script that
+    starts a wipe without an `if __name__ == '__main__':` guard would run
+    it once more in every worker. A single process would only add overhead
+    to the generator thread, so anything below 2 means no pool - as does
+    Python before 3.8, which has no multiprocessing.shared_memory.
+    """
+    if processes is None or processes < 2:
+        return 0
+    import importlib.util
+    if importlib.util.find_spec('multiprocessing.shared_memory') is None:
+        return 0
+    return processes
+
+
+def _fill_shared(name, pattern, offset, count):
+    """Fill count bytes of a shared memory block with pattern (in a worker process)
+    
+    Returns the seconds generation took, for the parent's metrics.
+    """
+    from multiprocessing import shared_memory
+    block = shared_memory.SharedMemory(name)
+    try:
+        started = time.perf_counter()
+        with block.buf[:count] as view:
+            pattern.fill(view, offset)
+        return time.perf_counter() - started
+    finally:
+        block.close()
+
+
+class GeneratorPool:
+    """Worker processes that fill shared memory blocks with pattern bytes
+    
+    Seeded patterns are pickled with their seed only and every worker
+    generates exactly the bytes the wipe thread would, so verification
+    regenerates the same streams in the parent. forkserver (or spawn) is
+    used because wipe threads are already running when the pool starts;
+    both import the main module again, which must therefore be guarded
+    with `if __name__ == '__main__':`.
+    """
+    
+    def __init__(self, processes):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(processes,
+                                             mp_context=multiprocessing.get_context(method))
+    
+    def fill(self, name, pattern, offset, count):
+        """Future for filling a shared memory block with pattern bytes from offset"""
+        return self._executor.submit(_fill_shared, name, pattern, offset, count)
+    
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+class SharedMemoryPipeline(WritePipeline):
+    """WritePipeline whose ring is filled in parallel by a GeneratorPool
+    
+    The ring buffers are multiprocessing.shared_memory blocks: a worker
+    fills one in place and the writer writes straight from it, so pattern
+    bytes are never pickled or copied between processes. Up to depth
+    buffers are generated at once and written in order, so generation
+    scales with the processes up to the ring depth.
+    """
+    
+    def __init__(self, pool, depth, buffer_size, metrics=None):
+        from multiprocessing import shared_memory
+        self.depth = depth
+        self.metrics = metrics
+        self.pool = pool
+        self.buffer_size = buffer_size
+        self._blocks = [shared_memory.SharedMemory(create=True, size=buffer_size)
+                        for _ in range(depth)]
+        self._free = deque(self._blocks)
+        self._filling = deque()  # (block, offset, count, future) in write order
+        self._jobs = deque()
+    
+    def schedule(self, pattern, start, end):
+        self._jobs.append((pattern, start, end))
+        self._submit()
+    
+    def _submit(self):
+        """Hand free blocks to the workers for the next scheduled bytes"""
+        while self._free and self._jobs:
+            pattern, start, end = self._jobs.popleft()
+            count = min(self.buffer_size, end - start)
+            if start + count < end:
+                self._jobs.appendleft((pattern, start + count, end))
+            block = self._free.popleft()
+            self._filling.append((block, start, count,
+                                  self.pool.fill(block.name, pattern, start, count)))
+    
+    def write(self, fd, start, end, progress=None):
+        metrics = self.metrics
+        offset = start
+        while offset < end:
+            block, position, count, future = self._filling.popleft()
+            started = time.perf_counter()
+            generation = future.result()
+            if position != offset:
+                raise RuntimeError(f"Pipeline out of order: {position} != {offset}")
+            ready = time.perf_counter()
+            with block.buf[:count] as chunk:
+                _write_all(fd, chunk, offset)
+            if metrics is not None:
+                metrics.observe('generate', generation, count)
+                metrics.observe('stall', ready - started)
+                metrics.observe('write', time.perf_counter() - ready, count)
+            self._free.append(block)
+            self._submit()
+            offset += count
+            if progress is not None:
+                progress(count)
+        return end - start
+    
+    def close(self):
+        """Wait for blocks still being filled, then free the shared memory"""
+        self._jobs.clear()
+        for _, _, _, future in self._filling:
+            try:
+                future.result()
+            except Exception:
+                pass  # Already raised to the writer, or the writer stopped first
+        self._filling.clear()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,223 @@
+"""
+Pre-flight planner
+What a wipe will write on which device, and how long that takes going by earlier runs
+"""
+
+import os
+import json
+import stat
+from datetime import datetime
+
+from .device import DEFAULT_TARGET, device_size
+from .freespace import fill_sizes
+from .methods import DEFAULT_WIPE_METHOD, get_pass_plan
+from .traversal import scan_tree
+from .writer import AUTO_STORAGE_TYPE, MIB, storage_type_for_device
+
+PROFILE_FILE = 'throughput_profiles.json'
+PROFILE_WEIGHT = 0.3               # Share of the latest run in a refined profile
+
+# Assumed rates for devices without a measured profile
+DEFAULT_THROUGHPUT = {
+    'HDD': 120 * MIB,
+    'SSD': 400 * MIB,
+    'NVMe': 1200 * MIB,
+    'USB / SD Card': 25 * MIB,
+    'Network Share': 60 * MIB,
+}
+DEFAULT_DEVICE_THROUGHPUT = 150 * MIB
+DEFAULT_FILE_PASS_SECONDS = 0.001  # Open, barrier and unlink cost per file and pass
+
+
+def _allocated(info):
+    """Data bytes of a file from its stat (st_blocks), never more than its size"""
+    blocks = getattr(info, 'st_blocks', None)
+    return info.st_size if blocks is None else min(info.st_size, blocks * 512)
+
+
+def _plan_item(item, target, skip_holes):
+    """(entry, {device: [logical, allocated, files]}) for one selected item"""
+    devices = {}
+    
+    def add(device, size, allocated, files=1):
+        totals = devices.setdefault(device, [0, 0, 0])
+        totals[0] += size
+        totals[1] += allocated if skip_holes else size
+        totals[2] += files
+    
+    if target == 'device' and os.path.exists(item):
+        info = os.stat(item)
+        size = device_size(item)
+        if stat.S_ISBLK(info.st_mode):
+            add(info.st_rdev, size, size)
+        else:
+            add(info.st_dev, size, _allocated(info))
+        kind = 'device'
+    elif target == 'free-space' and os.path.isdir(item):
+        sizes = fill_sizes(item)
+        add(os.stat(item).st_dev, sum(sizes), sum(sizes), len(sizes))
+        kind = 'free space'
+    elif os.path.isfile(item):
+        info = os.stat(item)
+        add(info.st_dev, info.st_size, _allocated(info))
+        kind = 'file'
+    elif os.path.isdir(item):
+        for event, _, info in scan_tree(item):
+            if event == 'file':
+                add(info.st_dev, info.st_size, _allocated(info))
+        kind = 'folder'
+    else:
+        kind = 'missing'
+    
+    entry = {
+        'path': item,
+        'type': kind,
+        'size': sum(totals[0] for totals in devices.values()),
+        'allocated': sum(totals[1] for totals in devices.values()),
+        'files': sum(totals[2] for totals in devices.values()),
+    }
+    return entry, devices
+
+
+def plan_wipe(items, method=DEFAULT_WIPE_METHOD, target=DEFAULT_TARGET, skip_holes=True,
+              profiles=None, storage_type=AUTO_STORAGE_TYPE):
+    """Walk the selection and describe what wiping it would do, without touching it
+    
+    Logical and allocated bytes are summed per device (st_dev) and multiplied
+    by the pass plan. With profiles every device gets an estimated duration;
+    devices are wiped side by side, so the job takes as long as the slowest.
+    """
+    plan = get_pass_plan(method)
+    passes = len(plan)
+    entries = []
+    devices = {}
+    for item in items:
+        entry, item_devices = _plan_item(item, target, skip_holes)
+        entries.append(entry)
+        for device, (size, allocated, files) in item_devices.items():
+            totals = devices.setdefault(device, [0, 0, 0])
+            totals[0] += size
+            totals[1] += allocated
+            totals[2] += files
+    
+    device_plans = []
+    for device, (size, allocated, files) in devices.items():
+        device_plan = {
+            'device': device,
+            'storage_type': (storage_type if storage_type not in (None, AUTO_STORAGE_TYPE)
+                             else storage_type_for_device(device)),
+            'bytes_to_write': allocated * passes,
+            'file_passes': files * passes,
+        }
+        if profiles is not None:
+            device_plan['estimated_seconds'] = profiles.estimate(
+                device, device_plan['storage_type'], device_plan['bytes_to_write'],
+                device_plan['file_passes'])
+        device_plans.append(device_plan)
+    
+    return {
+        'method': plan.method,
+        'pass_plan': plan.describe(),
+        'target': target,
+        'items': entries,
+        'total_size': sum(entry['size'] for entry in entries),
+        'allocated_size': sum(entry['allocated'] for entry in entries),
+        'files': sum(entry['files'] for entry in entries),
+        'bytes_to_write': sum(device_plan['bytes_to_write'] for device_plan in device_plans),
+        'devices': device_plans,
+        'estimated_seconds': (max((device['estimated_seconds'] for device in device_plans),
+                                  default=0.0) if profiles is not None else None),
+    }
+
+
+class ThroughputProfiles:
+    """Measured write rate and per-file cost of each device, cached in a JSON file
+    
+    A device (by st_dev) without a profile is estimated from its storage
+    type. Every completed single-device job refines its device's profile
+    with refine(), so estimates converge on what the hardware really does.
+    """
+    
+    def __init__(self, path=PROFILE_FILE):
+        self.path = path
+        self.devices = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.devices = json.load(f).get('devices', {})
+        except (OSError, ValueError, AttributeError):
+            pass  # No profiles yet (or an unreadable file) - start over
+    
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'devices': self.devices}, f, indent=2)
+        os.replace(temp_path, self.path)
+    
+    def profile(self, device, storage_type=None):
+        """(bytes per second, seconds per file pass) of a device"""
+        profile = self.devices.get(str(device))
+        if profile is not None:
+            return profile['bytes_per_second'], profile['seconds_per_file_pass']
+        return (DEFAULT_THROUGHPUT.get(storage_type, DEFAULT_DEVICE_THROUGHPUT),
+                DEFAULT_FILE_PASS_SECONDS)
+    
+    def estimate(self, device, storage_type, bytes_to_write, file_passes):
+        """Seconds to write bytes_to_write over file_passes file passes"""
+        rate, file_cost = self.profile(device, storage_type)
+        return bytes_to_write / rate + file_passes * file_cost
+    
+    def refine(self, device, storage_type, bytes_written, file_passes, seconds):
+        """Blend a measured run into the device's profile
+        
+        One run cannot separate the write rate from the per-file cost, so
+        the term that dominated the estimate is corrected and the other
+        one is kept.
+        """
+        if seconds <= 0:
+            return
+        rate, file_cost = self.profile(device, storage_type)
+        profile = self.devices.get(str(device), {'runs': 0})
+        if bytes_written / rate >= file_passes * file_cost:
+            remaining = seconds - file_passes * file_cost
+            measured = bytes_written / max(remaining, seconds * 0.1)
+            rate = measured if not profile['runs'] else (
+                (1 - PROFILE_WEIGHT) * rate + PROFILE_WEIGHT * measured)
+        else:
+            remaining = seconds - bytes_written / rate
+            measured = max(remaining, seconds * 0.1) / file_passes
+            file_cost = measured if not profile['runs'] else (
+                (1 - PROFILE_WEIGHT) * file_cost + PROFILE_WEIGHT * measured)
+        profile.update({
+            'storage_type': storage_type,
+            'bytes_per_second': rate,
+            'seconds_per_file_pass': file_cost,
+            'runs': profile['runs'] + 1,
+            'updated': datetime.now().isoformat(),
+        })
+        self.devices[str(device)] = profile
+
+
+def record_estimate(operation, plan):
+    """Store a plan's estimate in the operation record, next to its actual duration"""
+    operation['estimate'] = {
+        'seconds': plan['estimated_seconds'],
+        'bytes_to_write': plan['bytes_to_write'],
+        'devices': plan['devices'],
+    }
+
+
+def refine_profiles(operation, profiles):
+    """Refine the device profile from a finished operation, returning True if it changed
+    
+    Only completed jobs on a single device that ran without interruption
+    are used - the duration of any other job cannot be attributed.
+    """
+    estimate = operation.get('estimate')
+    if (estimate is None or operation.get('status') != 'Completed' or operation.get('resumed')
+            or len(estimate['devices']) != 1 or not operation.get('duration')):
+        return False
+    device_plan = estimate['devices'][0]
+    profiles.refine(device_plan['device'], device_plan['storage_type'],
+                    device_plan['bytes_to_write'], device_plan['file_passes'],
+                    operation['duration'])
+    return True
@@ -0,0 +1,150 @@
+"""
+Progress reporting
+Coalesced byte-level progress events from the wipe engine to any UI
+"""
+
+import queue
+import threading
+import time
+
+PROGRESS_INTERVAL = 0.25    # Seconds between published progress events
+RATE_SMOOTHING = 0.3        # Weight of the newest sample in the MB/s average
+MAX_QUEUED_EVENTS = 64
+
+
+class ProgressReporter:
+    """Thread-safe progress publisher for one wipe job
+    
+    Writer threads call advance() after every block. That only adds to a
+    counter under a lock; a snapshot event is put on `events` at most every
+    `interval` seconds, so the UI can never slow the write loop down. If the
+    consumer falls behind, the oldest snapshots are dropped - each event is
+    complete on its own.
+    
+    Event dicts carry: type ('progress' or 'finished'), bytes_written,
+    total_bytes (work discovered so far), scan_complete, file, pass, passes,
+    files_done, rate (bytes/s), eta (seconds, None until the total is
+    known) and elapsed.
+    """
+    
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        self.interval = interval
+        self.events = queue.Queue(maxsize=MAX_QUEUED_EVENTS)
+        self._lock = threading.Lock()
+        self.begin()
+    
+    def begin(self, item_count=0, passes=0):
+        """Reset the counters for a new job"""
+        with self._lock:
+            self.item_count = item_count
+            self.passes = passes
+            self.items_scanned = 0
+            self.total_bytes = 0
+            self.bytes_written = 0
+            self.files_done = 0
+            self.current_file = None
+            self.current_pass = 0
+            self.rate = 0.0
+            self.started = self._last_time = time.monotonic()
+            self._last_bytes = 0
+    
+    @property
+    def scan_complete(self):
+        return self.items_scanned >= self.item_count
+    
+    def add_total(self, nbytes):
+        """Add newly discovered work (bytes to write, all passes)"""
+        with self._lock:
+            self.total_bytes += nbytes
+    
+    def item_scanned(self):
+        """One selected item has been fully discovered"""
+        with self._lock:
+            self.items_scanned += 1
+    
+    def start_pass(self, file_path, pass_number):
+        with self._lock:
+            self.current_file = file_path
+            self.current_pass = pass_number
+    
+    def file_done(self, count=1):
+        with self._lock:
+            self.files_done += count
+    
+    def advance(self, nbytes):
+        """Record bytes written (called from the write loop)"""
+        with self._lock:
+            self.bytes_written += nbytes
+            now = time.monotonic()
+            if now - self._last_time < self.interval:
+                return
+            self._update_rate(now)
+            event = self._snapshot('progress', now)
+        self._publish(event)
+    
+    def finish(self, status):
+        """Publish the final event of the job"""
+        with self._lock:
+            now = time.monotonic()
+            self._update_rate(now)
+            event = self._snapshot('finished', now)
+            event['status'] = status
+        self._publish(event)
+    
+    def snapshot(self):
+        """Current state as an event dict, without publishing it"""
+        with self._lock:
+            return self._snapshot('progress', time.monotonic())
+    
+    def _update_rate(self, now):
+        elapsed = now - self._last_time
+        if elapsed > 0:
+            sample = (self.bytes_written - self._last_bytes) / elapsed
+            self.rate = sample if not self.rate else (
+                RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * self.rate)
+        self._last_time = now
+        self._last_bytes = self.bytes_written
+    
+    def _snapshot(self, event_type, now):
+        eta = None
+        if self.scan_complete and self.rate > 0:
+            eta = max(0.0, (self.total_bytes - self.bytes_written) / self.rate)
+        return {
+            'type': event_type,
+            'bytes_written': self.bytes_written,
+            'total_bytes': self.total_bytes,
+            'scan_complete': self.scan_complete,
+            'file': self.current_file,
+            'pass': self.current_pass,
+            'passes': self.passes,
+            'files_done': self.files_done,
+            'rate': self.rate,
+            'eta': eta,
+            'elapsed': now - self.started,
+        }
+    
+    def _publish(self, event):
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    pass
+    
+    def drain(self):
+        """Return all queued events (non-blocking), oldest first"""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+
+def format_duration(seconds):
+    """Format seconds as H:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
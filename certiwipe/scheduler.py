@@ -0,0 +1,116 @@
+"""
+Parallel wipe scheduler
+Concurrent file wipes with a per-device (st_dev) concurrency limit
+"""
+
+import os
+import threading
+from collections import deque
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .writer import AUTO_STORAGE_TYPE, storage_type_for_device
+
+# Parallel scheduler settings
+DEFAULT_WIPE_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+ITEM_WORKERS = 4                  # Selected items processed side by side
+MAX_PENDING_FILES = 1024          # Backpressure for very large folders
+
+# Files wiped at the same time on one device, per storage type
+DEVICE_CONCURRENCY = {
+    'HDD': 1,
+    'SSD': 4,
+    'NVMe': 8,
+    'USB / SD Card': 1,
+    'Network Share': 2,
+}
+DEFAULT_DEVICE_CONCURRENCY = 2
+
+
+class _DeviceQueue:
+    """Pending jobs and in-flight count for one st_dev"""
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.pending = deque()
+
+
+class WipeScheduler:
+    """Wipe files concurrently with a per-device concurrency limit
+    
+    Files are grouped by st_dev and each device has at most `limit` files in
+    flight, so spinning disks see sequential I/O while SSDs and separate
+    volumes are driven in parallel. Pool threads never block waiting for a
+    device slot - queued files are dispatched as running ones finish.
+    """
+    
+    def __init__(self, wipe_file, max_workers=None, storage_type=None,
+                 max_pending=MAX_PENDING_FILES):
+        self.wipe_file = wipe_file
+        self.storage_type = storage_type
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or DEFAULT_WIPE_WORKERS,
+                                           thread_name_prefix='wipe')
+        self._lock = threading.Lock()
+        self._devices = {}
+        self._pending = threading.Semaphore(max_pending)
+    
+    def device_limit(self, device):
+        """Concurrency limit for a device based on its storage type"""
+        storage_type = self.storage_type
+        if storage_type in (None, AUTO_STORAGE_TYPE) and device is not None:
+            storage_type = storage_type_for_device(device)
+        return DEVICE_CONCURRENCY.get(storage_type, DEFAULT_DEVICE_CONCURRENCY)
+    
+    def submit(self, path, device=None, **options):
+        """Queue a file for wiping and return a Future for its result
+        
+        options are passed on to wipe_file (e.g. a file_size already known).
+        """
+        if device is None:
+            try:
+                device = os.stat(path).st_dev
+            except OSError:
+                device = None
+        return self.submit_call(device, partial(self.wipe_file, path, **options))
+    
+    def submit_call(self, device, function):
+        """Queue any wipe job (e.g. a batch of small files) against device's limit"""
+        future = Future()
+        self._pending.acquire()
+        with self._lock:
+            queue = self._devices.get(device)
+            if queue is None:
+                queue = self._devices[device] = _DeviceQueue(self.device_limit(device))
+            queue.pending.append((function, future))
+            self._dispatch(queue)
+        return future
+    
+    def _dispatch(self, queue):
+        """Start queued jobs while the device has free slots (lock held)"""
+        while queue.active < queue.limit and queue.pending:
+            function, future = queue.pending.popleft()
+            queue.active += 1
+            self.executor.submit(self._run, queue, function, future)
+    
+    def _run(self, queue, function, future):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function())
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            self._pending.release()
+            with self._lock:
+                queue.active -= 1
+                self._dispatch(queue)
+    
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
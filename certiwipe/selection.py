@@ -0,0 +1,157 @@
+"""
+Selection model
+Deduplicated file and folder selections that collapse items covered by a selected folder
+"""
+
+import os
+
+from .traversal import get_folder_size
+
+# Outcome of Selection.add()
+ADDED = 'added'
+DUPLICATE = 'duplicate'
+COVERED = 'covered'   # Below a folder that is already selected
+
+_SELECTED = None      # Trie key of a selected node (never a path component)
+
+
+def _parts(path):
+    return filter(None, path.split(os.sep))
+
+
+def item_size(path, is_folder):
+    """Size of a selected file, or of the files in a selected folder (None if unreadable)"""
+    try:
+        return get_folder_size(path) if is_folder else os.stat(path).st_size
+    except OSError:
+        return None
+
+
+class Selection:
+    """Ordered set of selected files and folders, backed by a path trie
+    
+    Duplicates are found in O(1) and everything else in O(depth). An item
+    below a folder that is already selected is not added (COVERED), and a
+    new folder absorbs every selected item below it, so nothing is ever
+    wiped twice. Sizes are filled in separately with set_size(), e.g. from
+    a background thread, and only items still selected are counted.
+    """
+    
+    def __init__(self):
+        self._items = {}   # path -> is_folder, in selection order
+        self._root = {}    # path components -> child nodes; _SELECTED -> path
+        self._order = None  # Cached list(self._items) for positional access
+        self.sizes = {}
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __iter__(self):
+        return iter(list(self._items))
+    
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._items
+    
+    def is_folder(self, path):
+        return self._items[path]
+    
+    def add(self, path, is_folder=False):
+        """Select path, returning (ADDED, DUPLICATE or COVERED, absorbed paths)"""
+        path = os.path.abspath(path)
+        if path in self._items:
+            return DUPLICATE, []
+        node = self._root
+        for part in _parts(path):
+            if _SELECTED in node:
+                return COVERED, []
+            node = node.setdefault(part, {})
+        
+        absorbed = []
+        if is_folder:
+            absorbed = self._selected_below(node)
+            for child in absorbed:
+                del self._items[child]
+                self.sizes.pop(child, None)
+            node.clear()
+        node[_SELECTED] = path
+        self._items[path] = is_folder
+        self._order = None
+        return ADDED, absorbed
+    
+    def add_many(self, paths, is_folder=False):
+        """Select several paths, returning (added, duplicates, covered, absorbed) counts"""
+        counts = {ADDED: 0, DUPLICATE: 0, COVERED: 0}
+        absorbed = 0
+        for path in paths:
+            outcome, below = self.add(path, is_folder)
+            counts[outcome] += 1
+            absorbed += len(below)
+        return counts[ADDED], counts[DUPLICATE], counts[COVERED], absorbed
+    
+    def _selected_below(self, node):
+        selected = []
+        stack = [child for key, child in node.items() if key is not _SELECTED]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key is _SELECTED:
+                    selected.append(child)
+                else:
+                    stack.append(child)
+        return selected
+    
+    def remove(self, path):
+        """Deselect path (if selected)"""
+        path = os.path.abspath(path)
+        if self._items.pop(path, None) is None:
+            return
+        self.sizes.pop(path, None)
+        self._order = None
+        node = self._root
+        trail = []
+        for part in _parts(path):
+            trail.append((node, part))
+            node = node[part]
+        del node[_SELECTED]
+        # Prune the branch as far up as it is empty
+        for parent, part in reversed(trail):
+            if parent[part]:
+                break
+            del parent[part]
+    
+    def clear(self):
+        self._items.clear()
+        self._root.clear()
+        self.sizes.clear()
+        self._order = None
+    
+    def items(self):
+        """Selected paths in selection order"""
+        if self._order is None:
+            self._order = list(self._items)
+        return self._order
+    
+    def page(self, offset, count):
+        """(path, is_folder, size) of count selected items from offset (size None until known)"""
+        return [(path, self._items[path], self.sizes.get(path))
+                for path in self.items()[offset:offset + count]]
+    
+    def unmeasured(self):
+        """Selected items without a size yet, as (path, is_folder)"""
+        return [(path, is_folder) for path, is_folder in self._items.items()
+                if path not in self.sizes]
+    
+    def set_size(self, path, size):
+        if path in self._items:
+            self.sizes[path] = size
+    
+    def total_size(self):
+        """(bytes of the measured items, number still unmeasured)"""
+        total = pending = 0
+        for path in self._items:
+            size = self.sizes.get(path)
+            if path not in self.sizes:
+                pending += 1
+            elif size is not None:
+                total += size
+        return total, pending
@@ -0,0 +1,64 @@
+"""
+Certificate signing
+HMAC-SHA256 signatures with a locally managed key, verifiable offline
+"""
+
+import os
+import hmac
+import json
+import hashlib
+
+KEY_FILE = 'certiwipe.key'
+SIGNATURE_ALGORITHM = 'HMAC-SHA256'
+
+
+def load_key(path=KEY_FILE, create=True):
+    """Read the signing key, creating a new random one (mode 0600) if needed"""
+    try:
+        with open(path, 'rb') as f:
+            return bytes.fromhex(f.read().decode('ascii').strip())
+    except FileNotFoundError:
+        if not create:
+            raise
+    key = os.urandom(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(key.hex() + '\n')
+    return key
+
+
+def key_id(key):
+    """Short public identifier of a key (never reveals the key itself)"""
+    return hashlib.sha256(b'certiwipe key id' + key).hexdigest()[:16]
+
+
+def canonical(data):
+    """Canonical JSON bytes that signatures and digests are computed over"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def sign(cert_data, key):
+    """Add a signature over everything else in cert_data"""
+    unsigned = {name: value for name, value in cert_data.items() if name != 'signature'}
+    cert_data['signature'] = {
+        'algorithm': SIGNATURE_ALGORITHM,
+        'key_id': key_id(key),
+        'value': hmac.new(key, canonical(unsigned), hashlib.sha256).hexdigest(),
+    }
+    return cert_data
+
+
+def check_signature(cert_data, key):
+    """Return None if cert_data is correctly signed with key, else the problem"""
+    signature = cert_data.get('signature')
+    if not isinstance(signature, dict):
+        return "not signed"
+    if signature.get('algorithm') != SIGNATURE_ALGORITHM:
+        return f"unsupported signature algorithm {signature.get('algorithm')}"
+    if signature.get('key_id') != key_id(key):
+        return f"signed with another key ({signature.get('key_id')})"
+    unsigned = {name: value for name, value in cert_data.items() if name != 'signature'}
+    expected = hmac.new(key, canonical(unsigned), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, str(signature.get('value'))):
+        return "signature does not match - certificate was modified"
+    return None
@@ -0,0 +1,244 @@
+"""
+Durability policies
+When overwritten data is forced to disk, and when files may be unlinked
+"""
+
+import os
+import threading
+import functools
+
+from .writer import DIRECT_IO_MIN_SIZE, MIB
+
+
+@functools.lru_cache(maxsize=None)
+def _libc_syncfs():
+    """Return libc syncfs() where available (Linux), else None"""
+    try:
+        import ctypes
+        return ctypes.CDLL(None, use_errno=True).syncfs
+    except (ImportError, OSError, AttributeError, TypeError):
+        return None
+
+
+fdatasync = getattr(os, 'fdatasync', os.fsync)
+
+# Files are opened without following symlinks: one swapped in after the scan
+# must never redirect the overwrite to its target
+OPEN_FLAGS = os.O_WRONLY | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_NOFOLLOW', 0)
+
+
+def syncfs(fd):
+    """Flush the whole filesystem that fd lives on"""
+    libc_syncfs = _libc_syncfs()
+    if libc_syncfs is None:
+        os.sync()
+    elif libc_syncfs(fd) != 0:
+        import ctypes
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+
+
+def sync_batch(fds, dir_fd):
+    """One barrier for a batch of open files of the directory dir_fd
+    
+    A single syncfs of the directory's filesystem covers the whole batch;
+    where syncfs is not available every file gets its own fdatasync.
+    """
+    if _libc_syncfs() is None:
+        for fd in fds:
+            fdatasync(fd)
+    else:
+        syncfs(dir_fd)
+
+
+class SyncPolicy:
+    """Durability strategy for overwritten files
+    
+    The default flushes every pass with fdatasync. Subclasses trade some of
+    those barriers for throughput. A file is only unlinked once its data is
+    known to be on disk, because dropping an inode can discard dirty pages
+    that were never written back.
+    """
+    name = 'per-pass'
+    label = 'Sync every pass'
+    pass_barriers = True  # Small-file batches are flushed after every pass too
+    
+    def open_file(self, file_path, file_size):
+        """Open a file for overwriting, never through a symlink, returning (fd, direct)"""
+        return os.open(file_path, OPEN_FLAGS), False
+    
+    def after_pass(self, fd, direct):
+        fdatasync(fd)
+    
+    def after_file(self, fd, direct):
+        pass
+    
+    def barrier(self, fds, dir_fd):
+        """Make a small-file batch of one directory durable (its open files)"""
+        sync_batch(fds, dir_fd)
+    
+    def remove(self, file_path, device, on_durable=None):
+        """Remove an overwritten file once its data is durable
+        
+        on_durable() is called once the barrier covering the file has
+        completed, just before the file is removed - the journal only
+        records a finished file from there.
+        """
+        if on_durable is not None:
+            on_durable()
+        os.remove(file_path)
+    
+    def flush(self):
+        """Complete any deferred barriers and removals"""
+    
+    def settings(self):
+        """Constructor options, so the same policy can be recreated by name"""
+        return {}
+    
+    def describe(self):
+        return self.name
+
+
+class PerFileSync(SyncPolicy):
+    """One fdatasync after the final pass of each file"""
+    name = 'per-file'
+    label = 'Sync once per file'
+    pass_barriers = False
+    
+    def after_pass(self, fd, direct):
+        pass
+    
+    def after_file(self, fd, direct):
+        fdatasync(fd)
+    
+    def barrier(self, fds, dir_fd):
+        for fd in fds:
+            fdatasync(fd)
+
+
+class BatchedSync(SyncPolicy):
+    """One syncfs per device for every batch_files files or per folder
+    
+    Overwritten files stay in place until the barrier that covers them, then
+    are reported durable and removed together. Without syncfs or sync() it
+    degrades to per-file.
+    """
+    name = 'batched'
+    label = 'Batched (per folder / N files)'
+    pass_barriers = False
+    
+    def __init__(self, batch_files=256):
+        self.batch_files = batch_files
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._can_syncfs = _libc_syncfs() is not None or hasattr(os, 'sync')
+    
+    def after_pass(self, fd, direct):
+        pass
+    
+    def after_file(self, fd, direct):
+        if not self._can_syncfs:
+            fdatasync(fd)
+    
+    def remove(self, file_path, device, on_durable=None):
+        if not self._can_syncfs:
+            super().remove(file_path, device, on_durable)
+            return
+        with self._lock:
+            pending = self._pending.setdefault(device, [])
+            pending.append((file_path, on_durable))
+            if len(pending) < self.batch_files:
+                return
+            batch = self._pending.pop(device)
+        self._commit(batch)
+    
+    def flush(self):
+        with self._lock:
+            batches = list(self._pending.values())
+            self._pending.clear()
+        errors = []
+        for batch in batches:
+            try:
+                self._commit(batch)
+            except OSError as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+    
+    def _commit(self, batch):
+        """syncfs the device holding batch, then report and remove its files"""
+        dir_fd = os.open(os.path.dirname(batch[0][0]) or '.', os.O_RDONLY)
+        try:
+            syncfs(dir_fd)
+        finally:
+            os.close(dir_fd)
+        errors = []
+        for file_path, on_durable in batch:
+            try:
+                if on_durable is not None:
+                    on_durable()
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+    
+    def settings(self):
+        return {'batch_files': self.batch_files}
+    
+    def describe(self):
+        return f"{self.name} ({self.batch_files} files)"
+
+
+class DirectIOSync(SyncPolicy):
+    """O_DIRECT | O_DSYNC writes for large files, bypassing the page cache
+    
+    Each write is durable when it returns, so no extra barriers are needed.
+    Files below min_size, and filesystems that reject O_DIRECT, fall back to
+    one fdatasync per file (one syncfs per batch for small files).
+    """
+    name = 'direct'
+    label = 'Direct I/O (O_DIRECT/O_DSYNC)'
+    pass_barriers = False
+    
+    def __init__(self, min_size=DIRECT_IO_MIN_SIZE):
+        self.min_size = min_size
+    
+    def open_file(self, file_path, file_size):
+        flags = OPEN_FLAGS
+        direct_flags = getattr(os, 'O_DIRECT', 0) | getattr(os, 'O_DSYNC', 0)
+        if file_size >= self.min_size and hasattr(os, 'O_DIRECT'):
+            try:
+                return os.open(file_path, flags | direct_flags), True
+            except OSError:
+                pass  # e.g. EINVAL on tmpfs - use the page cache instead
+        return os.open(file_path, flags), False
+    
+    def after_pass(self, fd, direct):
+        pass
+    
+    def after_file(self, fd, direct):
+        if not direct:
+            fdatasync(fd)
+    
+    def settings(self):
+        return {'min_size': self.min_size}
+    
+    def describe(self):
+        return f"{self.name} (>= {self.min_size // MIB} MiB)"
+
+
+SYNC_POLICIES = {
+    policy.name: policy for policy in (SyncPolicy, PerFileSync, BatchedSync, DirectIOSync)
+}
+DEFAULT_SYNC_POLICY = 'per-pass'
+
+
+def create_sync_policy(name=DEFAULT_SYNC_POLICY, **options):
+    """Create a sync policy by name (per-pass, per-file, batched, direct)"""
+    try:
+        return SYNC_POLICIES[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown sync policy: {name}") from None
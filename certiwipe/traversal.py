@@ -0,0 +1,62 @@
+"""
+Tree traversal
+Single-pass os.scandir walk shared by sizing, wiping and directory removal
+"""
+
+import os
+import stat
+
+
+def scan_tree(root):
+    """Walk root once, yielding (kind, path, info) events
+    
+    kind is one of:
+      'enter' - a directory is about to be scanned (pre-order)
+      'file'  - a regular file; info is its cached DirEntry stat result
+      'other' - anything else that is not a directory (symlinks, FIFOs,
+                sockets, devices); info is its lstat result
+      'exit'  - everything below the directory has been yielded (post-order)
+      'error' - a directory could not be scanned; info is the OSError
+    
+    Only one scandir iterator per tree level is open at a time and entries
+    are never collected, so memory stays bounded by the depth of the tree.
+    Symbolic links are reported, never followed.
+    """
+    try:
+        iterator = os.scandir(root)
+    except OSError as e:
+        yield 'error', root, e
+        return
+    
+    yield 'enter', root, None
+    stack = [(root, iterator)]
+    try:
+        while stack:
+            path, iterator = stack[-1]
+            for entry in iterator:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        try:
+                            child = os.scandir(entry.path)
+                        except OSError as e:
+                            yield 'error', entry.path, e
+                            continue
+                        yield 'enter', entry.path, None
+                        stack.append((entry.path, child))
+                        break
+                    info = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue  # Removed while we were scanning
+                yield ('file' if stat.S_ISREG(info.st_mode) else 'other'), entry.path, info
+            else:
+                iterator.close()
+                stack.pop()
+                yield 'exit', path, None
+    finally:
+        for _, iterator in stack:
+            iterator.close()
+
+
+def get_folder_size(folder_path):
+    """Get total size of the regular files in a folder"""
+    return sum(info.st_size for kind, _, info in scan_tree(folder_path) if kind == 'file')
@@ -0,0 +1,91 @@
+"""
+Shared helpers
+Formatting and environment lookups used by the CLI, the dashboard and certificates
+"""
+
+import os
+import getpass
+
+from .progress import format_duration
+
+
+def format_size(size_bytes):
+    """Format file size in human readable format"""
+    if size_bytes == 0:
+        return "0 B"
+    
+    units = ['B', 'KB', 'MB', 'GB', 'TB']
+    i = 0
+    while size_bytes >= 1024 and i < len(units) - 1:
+        size_bytes /= 1024
+        i += 1
+    
+    return f"{size_bytes:.1f} {units[i]}"
+
+
+def format_pass_plan(pass_plan):
+    """Compact pass plan text, e.g. '0x00, complement, random x4'"""
+    groups = []
+    for label in pass_plan:
+        if groups and groups[-1][0] == label:
+            groups[-1][1] += 1
+        else:
+            groups.append([label, 1])
+    return ', '.join(label if count == 1 else f"{label} x{count}" for label, count in groups)
+
+
+def format_verification(verification):
+    """One-line summary of a read-back verification result"""
+    if not verification:
+        return "Not performed"
+    return (f"{verification['mode']} read-back of {verification['files']} file(s), "
+            f"{format_size(verification['bytes_verified'])} checked at "
+            f"{format_size(verification['throughput'])}/s, "
+            f"{verification['mismatches']} mismatch(es)")
+
+
+def format_allocation(total_size, allocated_size):
+    """Allocated bytes overwritten versus the logical size of what was wiped"""
+    if allocated_size is None or allocated_size >= total_size:
+        return format_size(total_size)
+    holes = max(0, total_size - allocated_size)
+    return (f"{format_size(allocated_size)} allocated of {format_size(total_size)} logical "
+            f"({format_size(holes)} in holes, not written)")
+
+
+def format_estimate(seconds, bytes_to_write):
+    """Pre-flight summary of a planned wipe, e.g. '3.2 GB to write, about 0:04:10'"""
+    text = f"{format_size(bytes_to_write)} to write"
+    if seconds is not None:
+        text += f", about {format_duration(seconds)}"
+    return text
+
+
+def format_runtime(operation):
+    """Actual duration of an operation, next to its pre-flight estimate if it had one"""
+    text = format_duration(operation.get('duration', 0))
+    estimate = operation.get('estimate')
+    if estimate and estimate.get('seconds') is not None:
+        text += f" (estimated {format_duration(estimate['seconds'])})"
+    return text
+
+
+def format_phases(phases, limit=4):
+    """The phases a wipe spent most time in, e.g. 'write 12.4s, sync 3.1s'
+    
+    Phases run side by side in worker threads, so the times can add up to
+    more than the duration.
+    """
+    slowest = sorted(phases.items(), key=lambda phase: phase[1]['seconds'], reverse=True)
+    return ', '.join(f"{name} {stats['seconds']:.1f}s" for name, stats in slowest[:limit])
+
+
+def get_operator():
+    """Name of the user running the wipe (works without a controlling terminal)"""
+    try:
+        return os.getlogin()
+    except (AttributeError, OSError):
+        try:
+            return getpass.getuser()
+        except Exception:
+            return 'System'
@@ -0,0 +1,221 @@
+"""
+Read-back verification
+Check that the final overwrite pass landed, without keeping a copy of the data
+"""
+
+import os
+import math
+import random
+import threading
+import time
+
+# Verification modes and their dashboard labels
+VERIFY_MODES = {
+    'off': 'No verification',
+    'sample': 'Sampled read-back',
+    'full': 'Full read-back',
+}
+DEFAULT_VERIFY_MODE = 'off'
+
+VERIFY_BLOCK_SIZE = 1024 * 1024    # Read and compare window
+SAMPLE_BLOCK_SIZE = 64 * 1024      # Size of each sampled window
+SAMPLE_FRACTION = 0.05             # Share of every file read back when sampling
+MIN_SAMPLE_BLOCKS = 8
+
+
+class VerificationError(Exception):
+    """Data read back does not match the final overwrite pass"""
+
+
+def positional_read(fd, buffer, offset):
+    """Read into buffer at offset, using os.preadv where the platform has it"""
+    if hasattr(os, 'preadv'):
+        return os.preadv(fd, [buffer], offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.readv(fd, [buffer])
+
+
+def sample_offsets(size, block_size, fraction, seed):
+    """Offsets of the windows checked by statistical sampling
+    
+    The first and last windows are always included; the rest are spread at
+    random over the file, reproducibly from seed.
+    """
+    blocks = -(-size // block_size)
+    count = min(blocks, max(MIN_SAMPLE_BLOCKS, math.ceil(blocks * fraction)))
+    if count >= blocks:
+        return [index * block_size for index in range(blocks)]
+    chosen = {0, blocks - 1}
+    chosen.update(random.Random(seed).sample(range(1, blocks - 1), count - 2))
+    return [index * block_size for index in sorted(chosen)]
+
+
+def clip_ranges(ranges, extents):
+    """Parts of sorted (offset, length) ranges that fall inside sorted data extents"""
+    clipped = []
+    first = 0
+    for offset, length in ranges:
+        end = offset + length
+        while first < len(extents) and sum(extents[first]) <= offset:
+            first += 1
+        for start, extent_length in extents[first:]:
+            if start >= end:
+                break
+            low = max(offset, start)
+            high = min(end, start + extent_length)
+            if high > low:
+                clipped.append((low, high - low))
+    return clipped
+
+
+def map_to_extents(ranges, extents):
+    """File ranges of sorted (offset, length) ranges given in data space
+    
+    Data space is the data extents laid back to back, so a range there is
+    always data and one that crosses an extent boundary is split.
+    """
+    mapped = []
+    index = 0
+    base = 0  # Data-space offset of extents[index]
+    for offset, length in ranges:
+        end = offset + length
+        while index < len(extents) and base + extents[index][1] <= offset:
+            base += extents[index][1]
+            index += 1
+        position, extent, extent_base = offset, index, base
+        while position < end and extent < len(extents):
+            start, extent_length = extents[extent]
+            low = position - extent_base
+            high = min(end - extent_base, extent_length)
+            mapped.append((start + low, high - low))
+            position = extent_base + high
+            extent_base += extent_length
+            extent += 1
+    return mapped
+
+
+def _drop_cache(fd, size):
+    """Evict clean cached pages so the read-back comes from the device"""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+class Verifier:
+    """Read back the final pass of each file and compare it with its pattern
+    
+    The expected bytes are regenerated from the pass pattern (keystreams
+    from their seed) one window at a time into a reusable buffer, so nothing
+    is ever held for the whole file. 'full' checks every byte, 'sample' a
+    random SAMPLE_FRACTION of windows plus the first and last one.
+    
+    Data that is already durable is read from the device; with the batched
+    policy it may still be served from the page cache. Counters cover the
+    whole job and are reported by summary().
+    """
+    
+    def __init__(self, mode=DEFAULT_VERIFY_MODE, sample_fraction=SAMPLE_FRACTION):
+        if mode not in VERIFY_MODES:
+            raise ValueError(f"Unknown verification mode: {mode}")
+        self.mode = mode
+        self.sample_fraction = sample_fraction
+        self._lock = threading.Lock()
+        self._thread_state = threading.local()  # Per-thread read/expected buffers
+        self.reset()
+    
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+    
+    def reset(self):
+        """Clear the counters for a new job"""
+        with self._lock:
+            self.files = 0
+            self.bytes_verified = 0
+            self.mismatches = 0
+            self.seconds = 0.0
+    
+    def verify_file(self, file_path, size, pattern, seed, extents=None):
+        """Compare file_path with pattern, raising VerificationError on a mismatch
+        
+        With extents (of a sparse file) only the data ranges are checked,
+        and samples are drawn from the data alone, so the sample fraction
+        applies to the allocated bytes rather than mostly landing in holes.
+        """
+        started = time.perf_counter()
+        if self.mode == 'full':
+            ranges = [(offset, VERIFY_BLOCK_SIZE) for offset in range(0, size, VERIFY_BLOCK_SIZE)]
+            if extents is not None:
+                ranges = clip_ranges(ranges, extents)
+        elif extents is not None:
+            data_size = sum(length for _, length in extents)
+            ranges = map_to_extents(
+                [(offset, min(SAMPLE_BLOCK_SIZE, data_size - offset)) for offset in
+                 sample_offsets(data_size, SAMPLE_BLOCK_SIZE, self.sample_fraction, seed)],
+                extents)
+        else:
+            ranges = [(offset, SAMPLE_BLOCK_SIZE) for offset in
+                      sample_offsets(size, SAMPLE_BLOCK_SIZE, self.sample_fraction, seed)]
+        
+        verified = 0
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            _drop_cache(fd, size)
+            for offset, length in ranges:
+                verified += self._check(fd, pattern, offset, min(length, size - offset))
+        except VerificationError as e:
+            with self._lock:
+                self.mismatches += 1
+            raise VerificationError(f"{file_path}: {e}") from None
+        finally:
+            os.close(fd)
+        
+        with self._lock:
+            self.files += 1
+            self.bytes_verified += verified
+            self.seconds += time.perf_counter() - started
+        return verified
+    
+    def _buffers(self):
+        buffers = getattr(self._thread_state, 'buffers', None)
+        if buffers is None:
+            buffers = self._thread_state.buffers = (bytearray(VERIFY_BLOCK_SIZE),
+                                                    bytearray(VERIFY_BLOCK_SIZE))
+        return buffers
+    
+    def _check(self, fd, pattern, offset, count):
+        """Compare count bytes at offset with the pattern"""
+        actual, expected = self._buffers()
+        view = memoryview(actual)[:count]
+        done = 0
+        while done < count:
+            read = positional_read(fd, view[done:], offset + done)
+            if not read:
+                raise VerificationError(f"file ends at byte {offset + done}")
+            done += read
+        pattern.fill(memoryview(expected)[:count], offset)
+        
+        # bytearray comparison is a memcmp; memoryview comparison is per item
+        if count == len(actual):
+            matches = actual == expected
+        else:
+            matches = actual[:count] == expected[:count]
+        if not matches:
+            bad = next(i for i in range(count) if actual[i] != expected[i])
+            raise VerificationError(f"mismatch at byte {offset + bad}")
+        return count
+    
+    def summary(self):
+        """Verification results for the operation record"""
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'files': self.files,
+                'bytes_verified': self.bytes_verified,
+                'mismatches': self.mismatches,
+                'seconds': round(self.seconds, 3),
+                'throughput': round(self.bytes_verified / self.seconds) if self.seconds else 0,
+            }
+
@@ -0,0 +1,165 @@
+"""
+Write path
+Large-block positional writes from reusable (optionally aligned) buffers
+"""
+
+import os
+import mmap
+import stat
+import time
+import functools
+
+# Write path settings
+MIB = 1024 * 1024
+MIN_BLOCK_SIZE = 1 * MIB
+MAX_BLOCK_SIZE = 64 * MIB
+DEFAULT_BLOCK_SIZE = 4 * MIB
+
+# Preferred write block size per storage type
+STORAGE_BLOCK_SIZES = {
+    'HDD': 16 * MIB,
+    'SSD': 4 * MIB,
+    'NVMe': 8 * MIB,
+    'USB / SD Card': 1 * MIB,
+    'Network Share': 2 * MIB,
+}
+AUTO_STORAGE_TYPE = 'Auto Detect'
+
+
+def clamp_block_size(block_size):
+    """Keep a block size inside the supported 1-64 MiB range"""
+    return max(MIN_BLOCK_SIZE, min(MAX_BLOCK_SIZE, int(block_size)))
+
+
+def detect_storage_type(path):
+    """Best-effort storage type detection from Linux sysfs"""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    # A device node lives on devtmpfs - look at the device it refers to
+    return storage_type_for_device(info.st_rdev if stat.S_ISBLK(info.st_mode) else info.st_dev)
+
+
+@functools.lru_cache(maxsize=None)
+def storage_type_for_device(device):
+    """Detect the storage type of a st_dev device number (cached)"""
+    try:
+        sys_path = os.path.realpath(f"/sys/dev/block/{os.major(device)}:{os.minor(device)}")
+        if not os.path.isdir(sys_path):
+            return None
+        # Partitions keep their queue settings on the parent disk
+        if not os.path.isdir(os.path.join(sys_path, 'queue')):
+            sys_path = os.path.dirname(sys_path)
+        name = os.path.basename(sys_path)
+        if name.startswith('nvme'):
+            return 'NVMe'
+        with open(os.path.join(sys_path, 'removable')) as f:
+            if f.read().strip() == '1':
+                return 'USB / SD Card'
+        with open(os.path.join(sys_path, 'queue', 'rotational')) as f:
+            return 'HDD' if f.read().strip() == '1' else 'SSD'
+    except (OSError, AttributeError):
+        return None
+
+
+def block_size_for_storage(storage_type, path=None):
+    """Return the write block size for a storage type (auto-detected from path)"""
+    if storage_type in (None, AUTO_STORAGE_TYPE) and path is not None:
+        storage_type = detect_storage_type(path)
+    return STORAGE_BLOCK_SIZES.get(storage_type, DEFAULT_BLOCK_SIZE)
+
+
+def positional_write(fd, data, offset):
+    """Write data at offset, using os.pwrite where the platform has it"""
+    if hasattr(os, 'pwrite'):
+        return os.pwrite(fd, data, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.write(fd, data)
+
+
+def overwrite_range(fd, size, pattern, buffer, start=0, refill=False, progress=None,
+                    metrics=None):
+    """Overwrite size bytes of fd from start, reusing one preallocated buffer
+    
+    Random patterns refill the buffer in place for every block. Deterministic
+    patterns write the same cached block (a whole number of periods) over and
+    over, without touching the buffer - unless refill is set because the
+    caller needs every write to come from its own (aligned) buffer.
+    progress, if given, is called with the byte count of every block, and
+    metrics (a WipeMetrics) observes its generation and write time.
+    """
+    view = memoryview(buffer)
+    cached = bool(pattern.period) and not refill
+    if cached:
+        view = memoryview(pattern.block(len(view), start))
+    block_size = len(view)
+    
+    written = 0
+    while written < size:
+        count = min(block_size, size - written)
+        chunk = view[:count]
+        started = time.perf_counter()
+        if not cached:
+            pattern.fill(chunk, start + written)
+        filled = time.perf_counter()
+        # pwrite may write less than requested - continue from where it stopped
+        done = 0
+        while done < count:
+            done += positional_write(fd, chunk[done:], start + written + done)
+        if metrics is not None:
+            if not cached:
+                metrics.observe('generate', filled - started, count)
+            metrics.observe('write', time.perf_counter() - filled, count)
+        written += count
+        if progress is not None:
+            progress(count)
+    return written
+
+
+# Direct I/O settings
+DIRECT_IO_ALIGNMENT = 4096
+DIRECT_IO_MIN_SIZE = 64 * MIB     # Smaller files go through the page cache
+
+
+def allocate_aligned_buffer(size):
+    """Allocate a page-aligned buffer (anonymous mmap) usable with O_DIRECT"""
+    size = max(DIRECT_IO_ALIGNMENT, size - size % DIRECT_IO_ALIGNMENT)
+    return mmap.mmap(-1, size)
+
+
+def direct_bounds(size, start, end):
+    """Aligned [start, end) that O_DIRECT writes of [start, end) cover in a size-byte file"""
+    aligned_size = size - size % DIRECT_IO_ALIGNMENT
+    aligned_start = min(start - start % DIRECT_IO_ALIGNMENT, aligned_size)
+    aligned_end = min(-(-end // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT, aligned_size)
+    return aligned_start, aligned_end
+
+
+def overwrite_direct(fd, file_path, size, pattern, buffer, progress=None, start=0, end=None,
+                     pipeline=None, metrics=None):
+    """Overwrite [start, end) of a file opened with O_DIRECT, widened to alignment
+    
+    The aligned body is written through fd from the aligned buffer - or from
+    pipeline, which must have it scheduled - and the unaligned tail (if any)
+    goes through a second O_DSYNC descriptor, which must be the same file as
+    fd (the path is opened again). end defaults to the end of the file.
+    """
+    end = size if end is None else end
+    aligned_size = size - size % DIRECT_IO_ALIGNMENT
+    start, aligned_end = direct_bounds(size, start, end)
+    if aligned_end > start:
+        if pipeline is not None:
+            pipeline.write(fd, start, aligned_end, progress)
+        else:
+            overwrite_range(fd, aligned_end - start, pattern, buffer, start=start, refill=True,
+                            progress=progress, metrics=metrics)
+    if end > aligned_size:
+        tail_fd = os.open(file_path, os.O_WRONLY | getattr(os, 'O_DSYNC', 0))
+        try:
+            if not os.path.samestat(os.fstat(tail_fd), os.fstat(fd)):
+                raise OSError(f"{file_path} was replaced while it was being wiped")
+            overwrite_range(tail_fd, end - aligned_size, pattern, buffer, start=aligned_size,
+                            progress=progress, metrics=metrics)
+        finally:
+            os.close(tail_fd)
@@ -4,16 +4,40 @@ Professional IT Asset Recycling Dashboard - Fixed Version
 Secure Data Wiping with Working Certificate Generation
 """
 
-import os
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, filedialog, messagebox
 import threading
-import random
-import json
-from datetime import datetime
-import uuid
-import platform
-import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from certiwipe.certificate import write_certificate
+from certiwipe.device import DEFAULT_TARGET, TARGET_TYPES, target_warning
+from certiwipe.engine import WipeEngine, dry_run
+from certiwipe.history import HistoryStore
+from certiwipe.journal import JobJournal, pending_journals
+from certiwipe.manifest import WipeManifest
+from certiwipe.methods import DEFAULT_WIPE_METHOD, WIPE_METHODS
+from certiwipe.patterns import DEFAULT_RANDOM_PATTERN, RANDOM_PATTERNS
+from certiwipe.planner import ThroughputProfiles, record_estimate, refine_profiles
+from certiwipe.progress import PROGRESS_INTERVAL, ProgressReporter, format_duration
+from certiwipe.selection import Selection, item_size
+from certiwipe.sync import DEFAULT_SYNC_POLICY, SYNC_POLICIES
+from certiwipe.utils import (format_allocation, format_estimate, format_phases, format_runtime,
+                             format_size, format_verification)
+from certiwipe.verify import DEFAULT_VERIFY_MODE, VERIFY_MODES
+from certiwipe.writer import AUTO_STORAGE_TYPE, STORAGE_BLOCK_SIZES
+
+# History view settings
+ALL_FILTER = 'All'
+HISTORY_ROW_HEIGHT = 22        # Pixels per Treeview row
+HISTORY_HEADING_HEIGHT = 26
+HISTORY_FILTER_DELAY = 300     # Milliseconds after the last keystroke before querying
+HISTORY_STATUS_ICONS = {'Completed': "✅", 'Partial': "⚠️", 'Failed': "❌"}
+
+# Selection list settings
+SELECTION_SIZE_BATCH = 2000    # Items sized in the background per UI update
 
 class ITAssetRecyclingDashboard:
     def __init__(self):
@@ -23,20 +47,44 @@ class ITAssetRecyclingDashboard:
         self.window.configure(bg="#f8f9fa")
         
         # Data
-        self.selected_items = []
-        self.wipe_history = []
+        self.selection = Selection()  # Deduplicated, folder-collapsed selected items
+        
+        # Selection list state - the listbox only holds the visible rows
+        self.selection_executor = ThreadPoolExecutor(max_workers=1)  # Sizes items in the background
+        self.plan_executor = ThreadPoolExecutor(max_workers=1)  # Never queues behind sizing
+        self.selection_generation = 0  # Bumped on clear, so late sizes are dropped
+        self.selection_pending = set()  # Items queued for sizing
+        self.selection_offset = 0
+        self.selection_page_rows = 6
+        self.history = HistoryStore()  # Opened (and migrated) in the background after startup
+        self.profiles = ThroughputProfiles()  # Measured device throughput for wipe estimates
+        self.engine = None
+        self.progress = None
+        self.progress_job = None  # Pending after() id of the progress poll
+        
+        # History view state - only one page of rows is ever queried
+        self.history_executor = ThreadPoolExecutor(max_workers=1)  # Serializes history queries
+        self.history_query_filters = {}
+        self.history_refresh_job = None
+        self.history_request = 0
+        self.history_offset = 0
+        self.history_total = None
+        self.history_page_rows = 8
         self.current_operation = None
         self.certificate_ready = False  # Flag to track if certificate can be generated
         
-        # Load existing history
-        self.load_history()
-        
         # Setup UI
         self.setup_styles()
         self.setup_dashboard()
         
         # Center window
         self.center_window()
+        
+        # Load existing history without blocking the first paint
+        threading.Thread(target=self.load_history, daemon=True).start()
+        
+        # Offer to resume a wipe that was interrupted by a crash or reboot
+        self.window.after(500, self.check_interrupted_wipes)
     
     def center_window(self):
         """Center the window on screen"""
@@ -172,13 +220,14 @@ class ITAssetRecyclingDashboard:
         list_container = tk.Frame(items_frame, bg='#f8f9fa', relief='solid', bd=1)
         list_container.pack(fill='both', expand=True, pady=(0, 10))
         
-        # Scrollbar
-        scrollbar = tk.Scrollbar(list_container, bg='#e9ecef', troughcolor='#f8f9fa')
-        scrollbar.pack(side='right', fill='y', padx=(0, 2), pady=2)
+        # Virtual scrollbar: it spans the whole selection while the listbox
+        # only ever holds the rows that are visible
+        self.items_scroll = tk.Scrollbar(list_container, bg='#e9ecef', troughcolor='#f8f9fa',
+                                         command=self.scroll_selection)
+        self.items_scroll.pack(side='right', fill='y', padx=(0, 2), pady=2)
         
         # Listbox with modern styling
         self.items_listbox = tk.Listbox(list_container, 
-                                       yscrollcommand=scrollbar.set,
                                        bg='#ffffff', fg='#495057',
                                        selectbackground='#007bff',
                                        selectforeground='white',
@@ -188,7 +237,14 @@ class ITAssetRecyclingDashboard:
                                        borderwidth=0,
                                        highlightthickness=0)
         self.items_listbox.pack(side='left', fill='both', expand=True, padx=2, pady=2)
-        scrollbar.config(command=self.items_listbox.yview)
+        self.items_listbox.bind('<Configure>', self.resize_selection)
+        self.items_listbox.bind('<MouseWheel>', lambda event: self.scroll_selection(
+            'scroll', -event.delta // 120, 'units'))
+        self.items_listbox.bind('<Button-4>', lambda event: self.scroll_selection('scroll', -1, 'units'))
+        self.items_listbox.bind('<Button-5>', lambda event: self.scroll_selection('scroll', 1, 'units'))
+        
+        self.items_count_label = ttk.Label(items_frame, text="No items selected", style='Card.TLabel')
+        self.items_count_label.pack(anchor='e', pady=(0, 5))
         
         # Clear button
         clear_btn = tk.Button(items_frame, 
@@ -207,12 +263,56 @@ class ITAssetRecyclingDashboard:
         
         ttk.Label(method_section, text="Wiping Method:", style='Card.TLabel').pack(anchor='w', pady=(0, 8))
         
-        self.method_var = tk.StringVar(value="DOD 3-Pass")
+        self.method_var = tk.StringVar(value=DEFAULT_WIPE_METHOD)
         method_combo = ttk.Combobox(method_section, textvariable=self.method_var,
-                                   values=["DOD 3-Pass", "DOD 7-Pass", "NIST Clear", "NIST Purge", "Gutmann 35-Pass"],
+                                   values=list(WIPE_METHODS),
                                    state="readonly", width=30, font=('Segoe UI', 10))
         method_combo.pack(pady=(0, 10))
         
+        ttk.Label(method_section, text="Storage Type:", style='Card.TLabel').pack(anchor='w', pady=(0, 8))
+        
+        self.storage_var = tk.StringVar(value=AUTO_STORAGE_TYPE)
+        storage_combo = ttk.Combobox(method_section, textvariable=self.storage_var,
+                                    values=[AUTO_STORAGE_TYPE] + list(STORAGE_BLOCK_SIZES),
+                                    state="readonly", width=30, font=('Segoe UI', 10))
+        storage_combo.pack(pady=(0, 10))
+        
+        ttk.Label(method_section, text="Durability:", style='Card.TLabel').pack(anchor='w', pady=(0, 8))
+        
+        self.sync_labels = {policy.label: name for name, policy in SYNC_POLICIES.items()}
+        self.sync_var = tk.StringVar(value=SYNC_POLICIES[DEFAULT_SYNC_POLICY].label)
+        sync_combo = ttk.Combobox(method_section, textvariable=self.sync_var,
+                                 values=list(self.sync_labels),
+                                 state="readonly", width=30, font=('Segoe UI', 10))
+        sync_combo.pack(pady=(0, 10))
+        
+        ttk.Label(method_section, text="Verification:", style='Card.TLabel').pack(anchor='w', pady=(0, 8))
+        
+        self.verify_labels = {label: mode for mode, label in VERIFY_MODES.items()}
+        self.verify_var = tk.StringVar(value=VERIFY_MODES[DEFAULT_VERIFY_MODE])
+        verify_combo = ttk.Combobox(method_section, textvariable=self.verify_var,
+                                   values=list(self.verify_labels),
+                                   state="readonly", width=30, font=('Segoe UI', 10))
+        verify_combo.pack(pady=(0, 10))
+        
+        ttk.Label(method_section, text="Random Data:", style='Card.TLabel').pack(anchor='w', pady=(0, 8))
+        
+        self.random_labels = {pattern.label: name for name, pattern in RANDOM_PATTERNS.items()}
+        self.random_var = tk.StringVar(value=RANDOM_PATTERNS[DEFAULT_RANDOM_PATTERN].label)
+        random_combo = ttk.Combobox(method_section, textvariable=self.random_var,
+                                   values=list(self.random_labels),
+                                   state="readonly", width=30, font=('Segoe UI', 10))
+        random_combo.pack(pady=(0, 10))
+        
+        ttk.Label(method_section, text="Target:", style='Card.TLabel').pack(anchor='w', pady=(0, 8))
+        
+        self.target_labels = {label: target for target, label in TARGET_TYPES.items()}
+        self.target_var = tk.StringVar(value=TARGET_TYPES[DEFAULT_TARGET])
+        target_combo = ttk.Combobox(method_section, textvariable=self.target_var,
+                                   values=list(self.target_labels),
+                                   state="readonly", width=30, font=('Segoe UI', 10))
+        target_combo.pack(pady=(0, 10))
+        
         # Progress section
         self.progress_section = ttk.Frame(control_card, style='Card.TFrame')
         self.progress_section.pack(fill='x', pady=(0, 20))
@@ -304,6 +404,37 @@ class ITAssetRecyclingDashboard:
         # Header
         ttk.Label(history_card, text="📋 Wipe History", style='Header.TLabel').pack(pady=(0, 15))
         
+        # Filters - every change re-runs the indexed query
+        filter_frame = ttk.Frame(history_card, style='Card.TFrame')
+        filter_frame.pack(fill='x', pady=(0, 10))
+        
+        self.history_search_var = tk.StringVar()
+        self.history_method_var = tk.StringVar(value=ALL_FILTER)
+        self.history_status_var = tk.StringVar(value=ALL_FILTER)
+        self.history_since_var = tk.StringVar()
+        self.history_until_var = tk.StringVar()
+        
+        ttk.Label(filter_frame, text="Path:", style='Card.TLabel').grid(row=0, column=0, sticky='w')
+        ttk.Entry(filter_frame, textvariable=self.history_search_var, width=24).grid(
+            row=0, column=1, columnspan=3, sticky='ew', padx=(5, 10))
+        ttk.Combobox(filter_frame, textvariable=self.history_method_var,
+                     values=[ALL_FILTER] + list(WIPE_METHODS), state="readonly", width=16).grid(
+            row=0, column=4, sticky='ew')
+        ttk.Label(filter_frame, text="From:", style='Card.TLabel').grid(row=1, column=0, sticky='w', pady=(5, 0))
+        ttk.Entry(filter_frame, textvariable=self.history_since_var, width=11).grid(
+            row=1, column=1, sticky='w', padx=(5, 5), pady=(5, 0))
+        ttk.Label(filter_frame, text="To:", style='Card.TLabel').grid(row=1, column=2, sticky='w', pady=(5, 0))
+        ttk.Entry(filter_frame, textvariable=self.history_until_var, width=11).grid(
+            row=1, column=3, sticky='w', padx=(5, 10), pady=(5, 0))
+        ttk.Combobox(filter_frame, textvariable=self.history_status_var,
+                     values=[ALL_FILTER, 'Completed', 'Partial', 'Failed'], state="readonly", width=16).grid(
+            row=1, column=4, sticky='ew', pady=(5, 0))
+        filter_frame.columnconfigure(1, weight=1)
+        
+        for var in (self.history_search_var, self.history_method_var, self.history_status_var,
+                    self.history_since_var, self.history_until_var):
+            var.trace_add('write', lambda *args: self.schedule_history_refresh())
+        
         # History table container
         table_frame = tk.Frame(history_card, bg='#f8f9fa', relief='solid', bd=1)
         table_frame.pack(fill='both', expand=True)
@@ -311,16 +442,16 @@ class ITAssetRecyclingDashboard:
         # Create treeview with modern styling
         style = ttk.Style()
         style.configure("Modern.Treeview", background="#ffffff", foreground="#495057", 
-                       fieldbackground="#ffffff", font=('Segoe UI', 9))
+                       fieldbackground="#ffffff", font=('Segoe UI', 9), rowheight=HISTORY_ROW_HEIGHT)
         style.configure("Modern.Treeview.Heading", background="#f8f9fa", foreground="#495057",
                        font=('Segoe UI', 10, 'bold'))
         
-        # Treeview with scrollbar
-        tree_scroll = tk.Scrollbar(table_frame, bg='#e9ecef')
-        tree_scroll.pack(side='right', fill='y', padx=(0, 2), pady=2)
+        # Treeview with a virtual scrollbar: it spans the whole result set while
+        # the tree only ever holds the rows that are visible
+        self.history_scroll = tk.Scrollbar(table_frame, bg='#e9ecef', command=self.scroll_history)
+        self.history_scroll.pack(side='right', fill='y', padx=(0, 2), pady=2)
         
         self.history_tree = ttk.Treeview(table_frame, 
-                                        yscrollcommand=tree_scroll.set,
                                         columns=('timestamp', 'item', 'method', 'status'),
                                         show='headings',
                                         style="Modern.Treeview",
@@ -338,7 +469,14 @@ class ITAssetRecyclingDashboard:
         self.history_tree.column('status', width=60)
         
         self.history_tree.pack(side='left', fill='both', expand=True, padx=2, pady=2)
-        tree_scroll.config(command=self.history_tree.yview)
+        self.history_tree.bind('<Configure>', self.resize_history)
+        self.history_tree.bind('<MouseWheel>',
+                               lambda event: self.scroll_history('scroll', -event.delta // 120, 'units'))
+        self.history_tree.bind('<Button-4>', lambda event: self.scroll_history('scroll', -1, 'units'))
+        self.history_tree.bind('<Button-5>', lambda event: self.scroll_history('scroll', 1, 'units'))
+        
+        self.history_count_label = ttk.Label(history_card, text="", style='Card.TLabel')
+        self.history_count_label.pack(anchor='e', pady=(5, 0))
         
         self.refresh_history()
     
@@ -349,33 +487,117 @@ class ITAssetRecyclingDashboard:
             filetypes=[("All files", "*.*")]
         )
         
-        for file in files:
-            if file not in self.selected_items:
-                self.selected_items.append(file)
-                self.items_listbox.insert(tk.END, f"📄 {os.path.basename(file)}")
+        _, duplicates, covered, _ = self.selection.add_many(files)
+        self.selection_changed()
         
-        self.update_buttons()
+        notes = []
+        if covered:
+            notes.append(f"{covered} file(s) are inside a folder that is already selected.")
+        if duplicates:
+            notes.append(f"{duplicates} file(s) were already selected.")
+        if notes:
+            messagebox.showinfo("Selection", "\n".join(notes) + "\n\nThey were not added again.")
     
     def select_folder(self):
         """Select a folder"""
         folder = filedialog.askdirectory(title="Select folder to securely wipe")
+        if not folder:
+            return
         
-        if folder and folder not in self.selected_items:
-            self.selected_items.append(folder)
-            self.items_listbox.insert(tk.END, f"📁 {os.path.basename(folder)}")
+        outcome, absorbed = self.selection.add(folder, is_folder=True)
+        self.selection_changed()
         
-        self.update_buttons()
+        if outcome == 'covered':
+            messagebox.showinfo("Selection", "This folder is inside a folder that is already selected.")
+        elif absorbed:
+            messagebox.showinfo("Selection", f"{len(absorbed)} selected item(s) inside this folder "
+                                             "are now covered by it.")
     
     def clear_selection(self):
         """Clear all selections"""
-        self.selected_items.clear()
-        self.items_listbox.delete(0, tk.END)
+        self.selection.clear()
+        self.selection_generation += 1
+        self.selection_pending.clear()
+        self.selection_offset = 0
+        self.selection_changed()
+    
+    def selection_changed(self):
+        """Show the selection and size its new items in the background"""
+        generation = self.selection_generation
+        items = [item for item in self.selection.unmeasured()
+                 if item[0] not in self.selection_pending]
+        self.selection_pending.update(path for path, _ in items)
+        
+        def measure():
+            for start in range(0, len(items), SELECTION_SIZE_BATCH):
+                sizes = [(path, item_size(path, is_folder))
+                         for path, is_folder in items[start:start + SELECTION_SIZE_BATCH]]
+                self.window.after(0, lambda sizes=sizes: self.selection_measured(generation, sizes))
+        
+        if items:
+            self.selection_executor.submit(measure)
+        self.show_selection()
         self.update_buttons()
     
+    def selection_measured(self, generation, sizes):
+        """Store sizes computed in the background (dropped if the selection was cleared)"""
+        if generation != self.selection_generation:
+            return
+        for path, size in sizes:
+            self.selection_pending.discard(path)
+            self.selection.set_size(path, size)
+        self.show_selection()
+    
+    def show_selection(self):
+        """Put the visible rows of the selection into the listbox"""
+        total_items = len(self.selection)
+        self.selection_offset = max(0, min(self.selection_offset,
+                                           total_items - self.selection_page_rows))
+        rows = self.selection.page(self.selection_offset, self.selection_page_rows)
+        
+        self.items_listbox.delete(0, tk.END)
+        for path, is_folder, size in rows:
+            text = f"{'📁' if is_folder else '📄'} {os.path.basename(path) or path}"
+            if size is not None:
+                text += f"  ({format_size(size)})"
+            self.items_listbox.insert(tk.END, text)
+        
+        if total_items:
+            self.items_scroll.set(self.selection_offset / total_items,
+                                  min(1.0, (self.selection_offset + len(rows)) / total_items))
+            total_size, unmeasured = self.selection.total_size()
+            text = f"{total_items:,} item(s), {format_size(total_size)}"
+            if unmeasured:
+                text += f" - sizing {unmeasured:,} more..."
+            self.items_count_label.config(text=text)
+        else:
+            self.items_scroll.set(0.0, 1.0)
+            self.items_count_label.config(text="No items selected")
+    
+    def scroll_selection(self, action, amount, unit=None):
+        """Scrollbar and mouse wheel handler for the virtual selection list"""
+        if action == 'moveto':
+            offset = int(float(amount) * len(self.selection))
+        elif unit == 'pages':
+            offset = self.selection_offset + int(amount) * self.selection_page_rows
+        else:
+            offset = self.selection_offset + int(amount)
+        if offset != self.selection_offset:
+            self.selection_offset = offset
+            self.show_selection()
+    
+    def resize_selection(self, event):
+        """Show as many selected items as fit in the listbox"""
+        line_height = tkfont.Font(font=self.items_listbox['font']).metrics('linespace') + 1
+        rows = max(1, event.height // line_height)
+        if rows != self.selection_page_rows:
+            self.selection_page_rows = rows
+            self.show_selection()
+    
     def update_buttons(self):
         """Update button states with visual feedback"""
         # Update wipe button
-        if self.selected_items:
+        if self.selection:
             self.wipe_btn.config(state='normal', bg='#dc3545')
         else:
             self.wipe_btn.config(state='disabled', bg='#6c757d')
@@ -397,24 +619,78 @@ class ITAssetRecyclingDashboard:
     
     def start_secure_wipe(self):
         """Start the secure wiping process"""
-        if not self.selected_items:
+        if not self.selection:
             messagebox.showwarning("No Selection", "Please select files or folders to wipe.")
             return
+        if (self.random_labels[self.random_var.get()] == 'urandom'
+                and self.verify_labels[self.verify_var.get()] != 'off'):
+            messagebox.showwarning("Cannot Verify",
+                                   "OS random data cannot be read back and verified. "
+                                   "Choose another random data source or turn verification off.")
+            return
+        
+        # Plan the wipe in the background - walking large folders takes a while
+        self.wipe_btn.config(state='disabled', text='🔄 PLANNING WIPE...')
+        self.status_label.config(text="🔄 Estimating wipe duration...", style='Warning.TLabel')
+        items = self.selection.items()
+        method = self.method_var.get()
+        target = self.target_labels[self.target_var.get()]
+        storage_type = self.storage_var.get()
+        
+        def plan():
+            try:
+                result = dry_run(items, method, target, profiles=self.profiles,
+                                 storage_type=storage_type)
+            except Exception as e:
+                error_msg = str(e)
+                self.window.after(0, lambda: self.wipe_error(error_msg))
+                return
+            self.window.after(0, lambda: self.confirm_wipe(result))
+        
+        self.plan_executor.submit(plan)
+    
+    def confirm_wipe(self, plan):
+        """Ask for confirmation, showing the pre-flight estimate"""
+        self.reset_ui()
         
         # Enhanced confirmation dialog
+        warning = target_warning(plan['target'], len(plan['items']))
         result = messagebox.askyesno(
             "⚠️ Confirm Secure Wipe",
-            f"WARNING: This will permanently delete {len(self.selected_items)} item(s)\n\n"
-            f"Method: {self.method_var.get()}\n"
+            f"{warning}\n\n"
+            f"Method: {plan['method']}\n"
+            f"Estimate: {format_estimate(plan['estimated_seconds'], plan['bytes_to_write'])}\n"
             f"This action CANNOT be undone!\n\n"
             f"Are you absolutely sure you want to proceed?",
             icon="warning"
         )
         
         if result:
-            self.perform_wipe()
+            self.perform_wipe(plan=plan)
     
-    def perform_wipe(self):
+    def check_interrupted_wipes(self):
+        """Resume the most recent interrupted wipe if the user agrees"""
+        journals = pending_journals()
+        if not journals:
+            return
+        try:
+            journal = JobJournal.load(journals[-1])
+        except (OSError, ValueError):
+            return
+        
+        operation = journal.operation
+        remaining = len(operation['items']) - len(journal.items_done)
+        if messagebox.askyesno(
+            "⏯️ Resume Interrupted Wipe",
+            f"A wipe operation was interrupted before it finished.\n\n"
+            f"Started: {operation['timestamp'][:19]}\n"
+            f"Method: {operation['method']}\n"
+            f"Items remaining: {remaining} of {len(operation['items'])}\n\n"
+            f"Resume it from the last checkpoint?"
+        ):
+            self.perform_wipe(journal)
+    
+    def perform_wipe(self, journal=None, plan=None):
         """Perform the actual wiping operation with UI updates"""
         # Reset certificate flag
         self.certificate_ready = False
@@ -428,129 +704,119 @@ class ITAssetRecyclingDashboard:
         self.progress_label.config(text="Performing secure wipe... Please wait")
         self.status_label.config(text="🔄 Wiping in progress...", style='Warning.TLabel')
         
-        # Create operation record
-        operation_id = str(uuid.uuid4())
-        self.current_operation = {
-            'id': operation_id,
-            'timestamp': datetime.now().isoformat(),
-            'items': self.selected_items.copy(),
-            'method': self.method_var.get(),
-            'status': 'In Progress'
-        }
+        # Create engine and operation record (or pick up an interrupted one)
+        self.progress = ProgressReporter()
+        if journal is not None:
+            self.engine = WipeEngine.resume(journal, progress=self.progress,
+                                            manifest=WipeManifest.for_operation(journal.operation))
+            self.current_operation = journal.operation
+        else:
+            self.engine = WipeEngine(self.method_var.get(),
+                                     storage_type=self.storage_var.get(),
+                                     sync_policy=self.sync_labels[self.sync_var.get()],
+                                     progress=self.progress,
+                                     verify=self.verify_labels[self.verify_var.get()],
+                                     target=self.target_labels[self.target_var.get()],
+                                     generator_processes=os.cpu_count(),
+                                     random_source=self.random_labels[self.random_var.get()])
+            if plan is not None:
+                # Wipe exactly what was estimated and confirmed
+                self.current_operation = self.engine.new_operation(
+                    [entry['path'] for entry in plan['items']])
+                record_estimate(self.current_operation, plan)
+            else:
+                self.current_operation = self.engine.new_operation(self.selection.items())
+            self.engine.journal = JobJournal.for_operation(self.current_operation)
+            self.engine.manifest = WipeManifest.for_operation(self.current_operation)
         
         # Start wiping in separate thread
         thread = threading.Thread(target=self.wipe_worker)
         thread.daemon = True
         thread.start()
+        self.progress_job = self.window.after(int(PROGRESS_INTERVAL * 1000), self.poll_progress)
+    
+    def poll_progress(self):
+        """Show the latest progress event from the wipe engine"""
+        self.progress_job = None
+        events = self.progress.drain()
+        if events:
+            self.show_progress(events[-1])
+            if events[-1]['type'] == 'finished':
+                return
+        self.progress_job = self.window.after(int(PROGRESS_INTERVAL * 1000), self.poll_progress)
+    
+    def show_progress(self, event):
+        """Update the progress bar and label from a progress event"""
+        total = event['total_bytes']
+        if event['scan_complete'] and total:
+            # The amount of work is known - switch to a real percentage
+            if self.progress_bar['mode'] != 'determinate':
+                self.progress_bar.stop()
+                self.progress_bar.config(mode='determinate', maximum=100)
+            self.progress_bar['value'] = min(100.0, 100.0 * event['bytes_written'] / total)
+        
+        text = f"Written {format_size(event['bytes_written'])}"
+        if total:
+            text += f" of {format_size(total)}"
+        text += f" at {format_size(event['rate'])}/s"
+        if event['eta'] is not None:
+            text += f" - {format_duration(event['eta'])} left"
+        if event['file']:
+            text += (f"\nPass {event['pass']}/{event['passes']}: "
+                     f"{os.path.basename(event['file'])}")
+        self.progress_label.config(text=text)
+    
+    def stop_progress(self):
+        """Stop polling and hide the progress bar"""
+        if self.progress_job is not None:
+            self.window.after_cancel(self.progress_job)
+            self.progress_job = None
+        self.progress_bar.stop()
+        self.progress_bar.config(mode='indeterminate', value=0)
+        self.progress_bar.pack_forget()
     
     def wipe_worker(self):
         """Worker thread for wiping operations"""
         try:
-            total_size = 0
-            successful_items = []
-            failed_items = []
+            self.engine.run(self.current_operation)
             
-            for item in self.selected_items:
-                try:
-                    if os.path.isfile(item):
-                        size = os.path.getsize(item)
-                        self.secure_wipe_file(item)
-                        total_size += size
-                        successful_items.append(item)
-                    elif os.path.isdir(item):
-                        size = self.get_folder_size(item)
-                        self.secure_wipe_folder(item)
-                        total_size += size
-                        successful_items.append(item)
-                except Exception as e:
-                    failed_items.append((item, str(e)))
-            
-            # Update operation record
-            self.current_operation['status'] = 'Completed' if not failed_items else 'Partial'
-            self.current_operation['total_size'] = total_size
-            self.current_operation['successful_items'] = successful_items
-            self.current_operation['failed_items'] = failed_items
-            
-            # Save to history
-            self.wipe_history.append(self.current_operation)
-            self.save_history()
+            # Save to history - only then is the resume journal obsolete
+            self.history.append(self.current_operation)
+            self.engine.journal.discard()
+            if refine_profiles(self.current_operation, self.profiles):
+                self.profiles.save()
             
             # Update UI in main thread
             self.window.after(0, self.wipe_completed)
             
         except Exception as e:
-            self.current_operation['status'] = 'Failed'
-            self.current_operation['error'] = str(e)
-            self.window.after(0, lambda: self.wipe_error(str(e)))
-    
-    def secure_wipe_file(self, file_path):
-        """Securely wipe a single file"""
-        if not os.path.exists(file_path):
-            return
-        
-        file_size = os.path.getsize(file_path)
-        passes = 3 if 'DOD 3' in self.method_var.get() else 7
-        
-        with open(file_path, 'r+b') as f:
-            for pass_num in range(passes):
-                f.seek(0)
-                bytes_written = 0
-                
-                while bytes_written < file_size:
-                    chunk_size = min(4096, file_size - bytes_written)
-                    random_data = bytes([random.randint(0, 255) for _ in range(chunk_size)])
-                    f.write(random_data)
-                    bytes_written += chunk_size
-                
-                f.flush()
-                os.fsync(f.fileno())
-        
-        os.remove(file_path)
-    
-    def secure_wipe_folder(self, folder_path):
-        """Securely wipe a folder and its contents"""
-        for root, dirs, files in os.walk(folder_path, topdown=False):
-            for file in files:
-                file_path = os.path.join(root, file)
-                self.secure_wipe_file(file_path)
-            
-            for dir_name in dirs:
-                dir_path = os.path.join(root, dir_name)
-                try:
-                    os.rmdir(dir_path)
-                except:
-                    pass
-        
-        try:
-            os.rmdir(folder_path)
-        except:
-            pass
-    
-    def get_folder_size(self, folder_path):
-        """Get total size of a folder"""
-        total_size = 0
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                try:
-                    total_size += os.path.getsize(os.path.join(root, file))
-                except:
-                    pass
-        return total_size
+            error_msg = str(e)
+            self.window.after(0, lambda: self.wipe_error(error_msg))
     
     def wipe_completed(self):
         """Handle successful wipe completion - FIXED"""
-        self.progress_bar.stop()
-        self.progress_bar.pack_forget()
+        self.stop_progress()
         
         successful = len(self.current_operation['successful_items'])
         failed = len(self.current_operation.get('failed_items', []))
+        verification = ""
+        if 'verification' in self.current_operation:
+            verification = f"🔍 Verified: {format_verification(self.current_operation['verification'])}\n"
+        wiped = format_allocation(self.current_operation['total_size'],
+                                  self.current_operation.get('allocated_size'))
+        phases = ""
+        if self.current_operation.get('phases'):
+            phases = f"🔬 Time by phase: {format_phases(self.current_operation['phases'])}\n"
         
         messagebox.showinfo(
             "✅ Wipe Completed Successfully",
             f"Secure wipe completed!\n\n"
             f"✓ Successfully wiped: {successful} item(s)\n"
             f"✗ Failed: {failed} item(s)\n"
-            f"📊 Total data wiped: {self.format_size(self.current_operation['total_size'])}\n\n"
+            f"📊 Total data wiped: {wiped}\n"
+            f"{verification}"
+            f"⏱️ Duration: {format_runtime(self.current_operation)}\n"
+            f"{phases}\n"
             f"📜 Certificate is ready for generation."
         )
         
@@ -570,8 +836,7 @@ class ITAssetRecyclingDashboard:
     
     def wipe_error(self, error_msg):
         """Handle wipe error"""
-        self.progress_bar.stop()
-        self.progress_bar.pack_forget()
+        self.stop_progress()
         
         messagebox.showerror("❌ Wipe Error", f"Wipe operation failed!\n\nError: {error_msg}")
         self.reset_ui()
@@ -579,8 +844,8 @@ class ITAssetRecyclingDashboard:
     def reset_ui(self):
         """Reset UI to ready state"""
         self.wipe_btn.config(
-            state='normal' if self.selected_items else 'disabled', 
-            bg='#dc3545' if self.selected_items else '#6c757d',
+            state='normal' if self.selection else 'disabled', 
+            bg='#dc3545' if self.selection else '#6c757d',
             text='🔥 START SECURE WIPE'
         )
         self.select_file_btn.config(state='normal')
@@ -595,76 +860,8 @@ class ITAssetRecyclingDashboard:
             return
         
         try:
-            cert_data = {
-                'certificate_id': str(uuid.uuid4()),
-                'issue_date': datetime.now().isoformat(),
-                'operation_id': self.current_operation['id'],
-                'organization': 'IT Asset Recycling Services',
-                'method': self.current_operation['method'],
-                'items': self.current_operation['successful_items'],
-                'total_size': self.current_operation['total_size'],
-                'operator': os.getlogin() if hasattr(os, 'getlogin') else 'System',
-                'system': platform.platform(),
-                'compliance_standards': ['DOD 5220.22-M', 'NIST SP 800-88']
-            }
-            
-            certificate = f"""
-╔══════════════════════════════════════════════════════════════════════════════╗
-║                        CERTIFICATE OF DATA DESTRUCTION                      ║
-║                          IT Asset Recycling Services                        ║
-╠══════════════════════════════════════════════════════════════════════════════╣
-
-Certificate ID: {cert_data['certificate_id']}
-Issue Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Operation ID: {cert_data['operation_id']}
-
-DESTRUCTION DETAILS
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Method Used: {cert_data['method']}
-Total Items Destroyed: {len(cert_data['items'])}
-Total Data Wiped: {self.format_size(cert_data['total_size'])}
-
-COMPLIANCE STANDARDS
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-✓ DOD 5220.22-M Standard
-✓ NIST SP 800-88 Guidelines  
-✓ Secure Multi-Pass Overwriting
-✓ Cryptographically Secure Random Data
-
-ITEMS DESTROYED
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-"""
-            
-            for i, item in enumerate(cert_data['items'], 1):
-                certificate += f"{i:2d}. {os.path.basename(item)}\n"
-            
-            certificate += f"""
-SYSTEM INFORMATION
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Operator: {cert_data['operator']}
-System: {cert_data['system']}
-Timestamp: {cert_data['issue_date']}
-
-CERTIFICATION
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-This certificate confirms that the above-listed items have been securely 
-destroyed using industry-standard methods. The data is computationally 
-infeasible to recover.
-
-Digital Signature: {hashlib.sha256(cert_data['certificate_id'].encode()).hexdigest()[:32]}
-
-╚══════════════════════════════════════════════════════════════════════════════╝
-"""
-            
-            # Save files
-            cert_filename = f"destruction_certificate_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            json_filename = f"certificate_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            
-            with open(cert_filename, 'w', encoding='utf-8') as f:
-                f.write(certificate)
-            
-            with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(cert_data, f, indent=2)
+            cert_filename, json_filename, cert_data = write_certificate(self.current_operation,
+                                                                         history=self.history)
             
             messagebox.showinfo(
                 "Certificate Generated Successfully",
@@ -672,7 +869,8 @@ Digital Signature: {hashlib.sha256(cert_data['certificate_id'].encode()).hexdige
                 f"Files created:\n"
                 f"• {cert_filename}\n"
                 f"• {json_filename}\n\n"
-                f"Certificate ID: {cert_data['certificate_id'][:16]}...\n\n"
+                f"Certificate ID: {cert_data['certificate_id'][:16]}...\n"
+                f"Signed with key {cert_data['signature']['key_id']}\n\n"
                 f"These files serve as legal proof of secure data destruction."
             )
             
@@ -690,73 +888,146 @@ Digital Signature: {hashlib.sha256(cert_data['certificate_id'].encode()).hexdige
     
     def update_stats(self):
         """Update statistics display"""
-        total_ops = len(self.wipe_history)
-        successful_ops = len([op for op in self.wipe_history if op['status'] == 'Completed'])
+        if not self.history.loaded:
+            return
+        
+        totals = self.history.totals()
+        total_ops = totals['operations']
+        successful_ops = totals['completed']
         success_rate = (successful_ops / total_ops * 100) if total_ops > 0 else 100
         
-        total_data = sum(op.get('total_size', 0) for op in self.wipe_history)
+        total_data = totals['total_size']
         
         self.total_ops_label.config(text=str(total_ops))
         self.success_rate_label.config(text=f"{success_rate:.1f}%")
-        self.data_wiped_label.config(text=self.format_size(total_data))
+        self.data_wiped_label.config(text=format_size(total_data))
+    
+    def history_filters(self):
+        """Query filters from the history filter bar"""
+        filters = {'path': self.history_search_var.get().strip()}
+        for key, var in (('method', self.history_method_var), ('status', self.history_status_var)):
+            if var.get() != ALL_FILTER:
+                filters[key] = var.get()
+        try:
+            if self.history_since_var.get().strip():
+                filters['since'] = date.fromisoformat(self.history_since_var.get().strip()).isoformat()
+            if self.history_until_var.get().strip():
+                until = date.fromisoformat(self.history_until_var.get().strip()) + timedelta(days=1)
+                filters['until'] = until.isoformat()  # The To date is inclusive
+        except ValueError:
+            pass  # Incomplete date while typing - filter without it
+        return filters
+    
+    def schedule_history_refresh(self):
+        """Refresh the history shortly after the last filter keystroke"""
+        if self.history_refresh_job is not None:
+            self.window.after_cancel(self.history_refresh_job)
+        self.history_refresh_job = self.window.after(HISTORY_FILTER_DELAY, self.refresh_history)
     
     def refresh_history(self):
-        """Refresh history display"""
-        # Clear existing items
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-        
-        # Add history items (most recent first)
-        for op in reversed(self.wipe_history[-20:]):  # Show last 20
-            timestamp = datetime.fromisoformat(op['timestamp']).strftime('%m/%d %H:%M')
-            items_text = f"{len(op['items'])} item(s)"
-            method = op['method']
-            
-            if op['status'] == 'Completed':
-                status = "✅"
-            elif op['status'] == 'Partial':
-                status = "⚠️"
+        """Refresh history display from the first page of the current filters"""
+        self.history_refresh_job = None
+        if not self.history.loaded:
+            return
+        self.history_offset = 0
+        self.load_history_page(self.history_filters())
+    
+    def load_history_page(self, filters=None):
+        """Query the visible rows in the background, then show them
+        
+        filters is given when they changed, which also recounts the matches.
+        Results of superseded requests are dropped.
+        """
+        recount = filters is not None
+        if recount:
+            self.history_query_filters = filters
+        self.history_request += 1
+        request = self.history_request
+        filters = self.history_query_filters
+        offset = self.history_offset
+        limit = self.history_page_rows
+        
+        def query():
+            total = self.history.count(**filters) if recount else None
+            rows = self.history.summaries(limit=limit, offset=offset, **filters)
+            self.window.after(0, lambda: self.show_history_page(request, total, rows))
+        
+        self.history_executor.submit(query)
+    
+    def show_history_page(self, request, total, rows):
+        """Put one page of history rows into the tree"""
+        if request != self.history_request:
+            return
+        if total is not None:
+            self.history_total = total
+        
+        # Reuse the existing tree rows - only their values change
+        children = self.history_tree.get_children()
+        for index, op in enumerate(rows):
+            timestamp = op['timestamp']
+            values = (f"{timestamp[5:7]}/{timestamp[8:10]} {timestamp[11:16]}",
+                      f"{op['item_count']} item(s)", op['method'],
+                      HISTORY_STATUS_ICONS.get(op['status'], "❌"))
+            if index < len(children):
+                self.history_tree.item(children[index], values=values)
             else:
-                status = "❌"
-            
-            self.history_tree.insert('', 0, values=(timestamp, items_text, method, status))
+                self.history_tree.insert('', 'end', values=values)
+        if len(children) > len(rows):
+            self.history_tree.delete(*children[len(rows):])
+        
+        total = self.history_total
+        if total:
+            self.history_scroll.set(self.history_offset / total,
+                                    min(1.0, (self.history_offset + len(rows)) / total))
+            self.history_count_label.config(
+                text=f"{self.history_offset + 1:,}-{self.history_offset + len(rows):,} of {total:,}")
+        else:
+            self.history_scroll.set(0.0, 1.0)
+            self.history_count_label.config(text="No matching operations")
     
-    def format_size(self, size_bytes):
-        """Format file size in human readable format"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        units = ['B', 'KB', 'MB', 'GB', 'TB']
-        i = 0
-        while size_bytes >= 1024 and i < len(units) - 1:
-            size_bytes /= 1024
-            i += 1
-        
-        return f"{size_bytes:.1f} {units[i]}"
+    def scroll_history(self, action, amount, unit=None):
+        """Scrollbar and mouse wheel handler for the virtual history list"""
+        if not self.history.loaded or not self.history_total:
+            return
+        if action == 'moveto':
+            offset = int(float(amount) * self.history_total)
+        elif unit == 'pages':
+            offset = self.history_offset + int(amount) * self.history_page_rows
+        else:
+            offset = self.history_offset + int(amount)
+        offset = max(0, min(offset, self.history_total - self.history_page_rows))
+        if offset != self.history_offset:
+            self.history_offset = offset
+            self.load_history_page()
+    
+    def resize_history(self, event):
+        """Fetch as many rows as fit in the tree"""
+        rows = max(1, (event.height - HISTORY_HEADING_HEIGHT) // HISTORY_ROW_HEIGHT)
+        if rows != self.history_page_rows:
+            self.history_page_rows = rows
+            if self.history.loaded:
+                self.load_history_page()
     
     def load_history(self):
-        """Load wipe history from file"""
-        try:
-            if os.path.exists('wipe_history.json'):
-                with open('wipe_history.json', 'r', encoding='utf-8') as f:
-                    self.wipe_history = json.load(f)
-        except Exception:
-            self.wipe_history = []
-    
-    def save_history(self):
-        """Save wipe history to file"""
-        try:
-            with open('wipe_history.json', 'w', encoding='utf-8') as f:
-                json.dump(self.wipe_history, f, indent=2)
-        except Exception:
-            pass
+        """Load wipe history in the background, then refresh the panels"""
+        self.history.load()
+        self.window.after(0, self.history_loaded)
+    
+    def history_loaded(self):
+        """Show history and statistics once they are available"""
+        self.update_stats()
+        self.refresh_history()
     
     def run(self):
         """Start the application"""
         self.window.mainloop()
 
 
-# Create and run the dashboard
-if __name__ == "__main__":
+def main():
+    """Create and run the dashboard"""
     app = ITAssetRecyclingDashboard()
-    app.run()
\ No newline at end of file
+    app.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Benchmark cases and report comparison"""
+
+from certiwipe.benchmark import case_key, compare, run_case
+
+
+def test_case_runs_with_generator_processes(tmp_path):
+    result = run_case('tiny-files', 'NIST Clear', None, 'per-file', str(tmp_path), scale=0.01,
+                      processes=2)
+    assert result['status'] == 'Completed'
+    assert result['generator_processes'] == 2
+
+
+def test_process_counts_are_compared_separately():
+    case = {'scenario': 'huge-files', 'method': 'NIST Clear', 'block_size': None,
+            'sync_policy': 'per-pass', 'ring_depth': 4}
+    # Reports from before the option ran generation in threads
+    baseline = {'results': [dict(case, seconds=1.0)]}
+    current = {'results': [dict(case, generator_processes=0, seconds=2.0),
+                           dict(case, generator_processes=4, seconds=3.0)]}
+    assert case_key(baseline['results'][0]) == case_key(current['results'][0])
+    regressions = compare(baseline, current)
+    assert [regression['case']['generator_processes'] for regression in regressions] == [0]
@@ -0,0 +1,83 @@
+"""Certificate signatures and batch audit"""
+
+import json
+
+import pytest
+
+from certiwipe.audit import verify_certificates
+from certiwipe.certificate import build_certificate, write_certificate
+from certiwipe.history import HistoryStore
+from certiwipe.signing import check_signature, load_key, sign
+
+OPERATION = {
+    'id': '5f0c7c4e-0000-4000-8000-000000000001',
+    'timestamp': '2026-03-02T10:15:00',
+    'items': ['/data/a', '/data/b'],
+    'method': 'DOD 3-Pass',
+    'pass_plan': ['0x00', 'complement', 'random'],
+    'status': 'Completed',
+    'total_size': 300000,
+    'successful_items': ['/data/a', '/data/b'],
+    'failed_items': [],
+    'operator': 'auditor',
+}
+
+
+@pytest.fixture
+def key():
+    return bytes(range(32))
+
+
+def test_signature_round_trip(key):
+    cert_data = sign(build_certificate(OPERATION), key)
+    assert check_signature(cert_data, key) is None
+    assert check_signature(json.loads(json.dumps(cert_data)), key) is None  # As stored
+
+
+def test_tampered_field_is_rejected(key):
+    cert_data = sign(build_certificate(OPERATION), key)
+    cert_data['total_size'] += 1
+    assert check_signature(cert_data, key) == ("signature does not match - "
+                                               "certificate was modified")
+
+
+def test_wrong_key_is_rejected(key):
+    cert_data = sign(build_certificate(OPERATION), key)
+    assert check_signature(cert_data, bytes(32)).startswith("signed with another key")
+    # A copied key id does not help a forger without the key
+    forged = sign(dict(cert_data, total_size=1), bytes(32))
+    forged['signature']['key_id'] = cert_data['signature']['key_id']
+    assert check_signature(forged, key) is not None
+    del cert_data['signature']
+    assert check_signature(cert_data, key) == "not signed"
+
+
+def test_audit_accepts_issued_and_rejects_edited_certificates(tmp_path):
+    key_file = str(tmp_path / 'certiwipe.key')
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    history.append(OPERATION)
+    output_dir = str(tmp_path / 'certificates')
+    _, json_path, _ = write_certificate(OPERATION, output_dir, key_file, history)
+    _, edited_path, _ = write_certificate(OPERATION, output_dir, key_file, history)
+    key = load_key(key_file, create=False)
+    
+    results = verify_certificates([output_dir], key, history, workers=1)
+    assert [result['problems'] for result in results] == [[], []]
+    
+    # Edited and re-signed with the right key: only the history catches it
+    with open(edited_path, 'r', encoding='utf-8') as f:
+        cert_data = json.load(f)
+    cert_data['total_size'] = 1
+    with open(edited_path, 'w', encoding='utf-8') as f:
+        json.dump(sign(cert_data, key), f)
+    problems = {result['path']: result['problems']
+                for result in verify_certificates([output_dir], key, history, workers=1)}
+    assert problems[json_path] == []
+    assert "differs from the certificate as issued" in problems[edited_path]
+    assert "printable certificate does not match its data" in problems[edited_path]
+    assert any(problem.startswith("total size differs from the history")
+               for problem in problems[edited_path])
+    
+    wrong_key = verify_certificates([json_path], bytes(32), history, workers=1)
+    assert wrong_key[0]['problems'][0].startswith("signed with another key")
+    history.close()
@@ -0,0 +1,40 @@
+"""Command line: planning before a wipe"""
+
+import os
+
+import certiwipe.engine
+from certiwipe.cli import main
+
+
+def global_options(tmp_path):
+    return ['--history-file', str(tmp_path / 'history.db'),
+            '--journal-dir', str(tmp_path / 'journals'),
+            '--manifest-dir', str(tmp_path / 'manifests'),
+            '--profile-file', str(tmp_path / 'profiles.json')]
+
+
+def test_wipe_with_yes_walks_the_tree_once(tmp_path, monkeypatch):
+    root = tmp_path / 'tree'
+    root.mkdir()
+    (root / 'file').write_bytes(os.urandom(100000))
+    plans = []
+    monkeypatch.setattr(certiwipe.engine, 'dry_run', lambda *args: plans.append(args))
+    
+    assert main(global_options(tmp_path) + ['wipe', str(root), '-y', '--no-progress']) == 0
+    assert plans == []
+    assert not root.exists()
+
+
+def test_dry_run_plans_for_the_wipe_storage_type(tmp_path, monkeypatch):
+    plans = []
+    
+    def dry_run(*args):
+        plans.append(args)
+        return {'items': [], 'method': args[1], 'pass_plan': [], 'total_size': 0,
+                'allocated_size': 0, 'files': 0, 'devices': [], 'estimated_seconds': None,
+                'bytes_to_write': 0}
+    
+    monkeypatch.setattr(certiwipe.engine, 'dry_run', dry_run)
+    assert main(global_options(tmp_path) + ['dry-run', str(tmp_path), '--storage-type',
+                                            'HDD']) == 0
+    assert plans[0][-1] == 'HDD'
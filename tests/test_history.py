@@ -0,0 +1,73 @@
+"""History store: legacy JSON migration and statistics rollups"""
+
+import json
+import os
+
+from certiwipe.history import LEGACY_HISTORY_FILE, HistoryStore
+
+
+def legacy_operation(index, status, method, items, total_size, day, operator=None):
+    operation = {
+        'id': f"legacy-{index}",
+        'timestamp': f"2024-05-{day:02d}T09:00:{index:02d}",
+        'items': [f"/old/{index}/{item}" for item in range(items)],
+        'method': method,
+        'status': status,
+    }
+    if total_size is not None:
+        operation['total_size'] = total_size
+    if operator is not None:
+        operation['operator'] = operator  # Early versions did not record one
+    return operation
+
+
+# Whole-file history as written by versions before the SQLite store
+LEGACY_HISTORY = [
+    legacy_operation(0, 'Completed', 'DOD 3-Pass', 2, 1000, 1, 'alice'),
+    legacy_operation(1, 'Completed', 'DOD 3-Pass', 1, 2500, 1),
+    legacy_operation(2, 'Partial', 'Gutmann 35-Pass', 3, 400, 2, 'alice'),
+    legacy_operation(3, 'Failed', 'NIST Clear', 1, None, 2, 'bob'),
+    legacy_operation(4, 'Completed', 'NIST Clear', 4, 10000, 3, 'bob'),
+]
+
+
+def test_legacy_json_is_migrated_once(tmp_path):
+    legacy_path = tmp_path / LEGACY_HISTORY_FILE
+    legacy_path.write_text(json.dumps(LEGACY_HISTORY), encoding='utf-8')
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    
+    assert history.count() == 5
+    assert not legacy_path.exists()
+    assert os.path.exists(str(legacy_path) + '.migrated')
+    assert history.get('legacy-2') == LEGACY_HISTORY[2]
+    assert history.totals() == {'operations': 5, 'completed': 3, 'partial': 1, 'failed': 1,
+                                'items': 11, 'total_size': 13900}
+    assert {key: row['total_size'] for key, row in history.stats('method').items()} == {
+        'DOD 3-Pass': 3500, 'Gutmann 35-Pass': 400, 'NIST Clear': 10000}
+    assert {key: row['operations'] for key, row in history.stats('status').items()} == {
+        'Completed': 3, 'Failed': 1, 'Partial': 1}
+    assert {key: row['items'] for key, row in history.stats('day').items()} == {
+        '2024-05-01': 3, '2024-05-02': 4, '2024-05-03': 4}
+    assert {key: row['operations'] for key, row in history.stats('operator').items()} == {
+        'Unknown': 1, 'alice': 2, 'bob': 2}
+    history.close()
+    
+    # Reopening neither imports again nor loses anything
+    reopened = HistoryStore(str(tmp_path / 'history.db'))
+    assert reopened.count() == 5
+    assert reopened.totals()['total_size'] == 13900
+    reopened.close()
+
+
+def test_rollups_follow_appends_and_replacements(tmp_path):
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    for operation in LEGACY_HISTORY:
+        history.append(operation)
+    # A resumed job is appended again under the same id, replacing its record
+    history.append(dict(LEGACY_HISTORY[2], status='Completed', total_size=900))
+    
+    assert history.count() == 5
+    totals = history.totals()
+    assert (totals['completed'], totals['partial'], totals['total_size']) == (4, 0, 14400)
+    assert 'Partial' not in history.stats('status')
+    history.close()
@@ -0,0 +1,85 @@
+"""Wipe manifest Merkle tree (RFC 6962) and inclusion proofs"""
+
+import hashlib
+
+import pytest
+
+from certiwipe.manifest import (MerkleAccumulator, WipeManifest, check_proof, inclusion_proof,
+                                merkle_root, verify_inclusion)
+
+# Leaf inputs and tree heads of the RFC 6962 reference test vectors
+LEAF_DATA = [b'', b'\x00', b'\x10', b'\x20\x21', b'\x30\x31']
+ROOTS = {
+    1: '6e340b9cffb37a989ca544e6bb780a2c78901d3fb33738768511a30617afa01d',
+    2: 'fac54203e7cc696cf0dfcb42c92a1d9dbaf70ad9e621f4bd8d98662f00e3c125',
+    3: 'aeb6bcfe274b70a14fb067a5e5578264db0fa9b51af5e0ba159158f329e06e77',
+    5: '4e3bbb1f7b478dcfe71fb631631519a3bca12c9aefca1612bfce4c13a86264d4',
+}
+LEAVES = [hashlib.sha256(b'\x00' + data).digest() for data in LEAF_DATA]
+
+
+def node(left, right):
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+a, b, c, d, e = LEAVES
+# Expected audit paths, leaf first, spelled out from the tree shapes
+PROOFS = {
+    (1, 0): [],
+    (2, 0): [b],
+    (2, 1): [a],
+    (3, 0): [b, c],
+    (3, 2): [node(a, b)],
+    (5, 0): [b, node(c, d), e],
+    (5, 3): [c, node(a, b), e],
+    (5, 4): [node(node(a, b), node(c, d))],
+}
+
+
+@pytest.mark.parametrize('size', sorted(ROOTS))
+def test_root_known_answers(size):
+    assert merkle_root(LEAVES[:size]).hex() == ROOTS[size]
+    accumulator = MerkleAccumulator()
+    for leaf in LEAVES[:size]:
+        accumulator.add(leaf)
+    assert accumulator.root().hex() == ROOTS[size]
+
+
+@pytest.mark.parametrize('size, index', sorted(PROOFS))
+def test_proof_known_answers(size, index):
+    proof = inclusion_proof(LEAVES[:size], index)
+    assert proof == PROOFS[size, index]
+    assert verify_inclusion(LEAVES[index], index, size, proof, bytes.fromhex(ROOTS[size]))
+
+
+@pytest.mark.parametrize('size', sorted(ROOTS))
+def test_every_leaf_proves_only_itself(size):
+    root = bytes.fromhex(ROOTS[size])
+    for index in range(size):
+        proof = inclusion_proof(LEAVES[:size], index)
+        assert verify_inclusion(LEAVES[index], index, size, proof, root)
+        assert not verify_inclusion(LEAVES[index], size, size, proof, root)
+        if size > 1:
+            other = (index + 1) % size
+            assert not verify_inclusion(LEAVES[other], index, size, proof, root)
+
+
+def test_check_proof_rejects_tampering(tmp_path):
+    manifest = WipeManifest(str(tmp_path / 'job'))
+    manifest.open()
+    for index in range(5):
+        manifest.add({'path': f"/data/f{index}", 'size': index * 100})
+    manifest.close()
+    root = manifest.summary()['root']
+    
+    proof = manifest.prove('/data/f3')
+    assert proof['root'] == root and check_proof(proof, root)
+    
+    tampered = dict(proof, record=dict(proof['record'], size=1))
+    assert not check_proof(tampered, root)
+    sibling = bytearray(bytes.fromhex(proof['proof'][0]))
+    sibling[0] ^= 1
+    assert not check_proof(dict(proof, proof=[sibling.hex()] + proof['proof'][1:]), root)
+    assert not check_proof(dict(proof, index=2), root)
+    assert not check_proof(proof, ROOTS[5])  # Some other tree
+    assert manifest.prove('/data/missing') is None
@@ -0,0 +1,87 @@
+"""Pattern generators: random sources, complements and sharing between threads"""
+
+import os
+import threading
+
+import pytest
+
+from certiwipe.engine import WipeEngine
+from certiwipe.methods import get_pass_plan
+from certiwipe.patterns import (COMPLEMENT_CHUNK_SIZE, INVERT_TABLE, ComplementPattern,
+                                KeystreamPattern, NumpyRandomPattern, RepeatingPattern,
+                                SecureRandomPattern)
+
+
+def filled(pattern, size, offset=0):
+    buffer = bytearray(size)
+    pattern.fill(buffer, offset)
+    return bytes(buffer)
+
+
+def test_complement_inverts_keystream():
+    source = KeystreamPattern(b'complement', block_size=4096)
+    for offset, size in [(0, 3 * 4096 + 17), (1000, 4096), (4095, 2)]:
+        assert filled(ComplementPattern(source), size, offset) == \
+            filled(source, size, offset).translate(INVERT_TABLE)
+
+
+def test_complement_inverts_other_sources():
+    source = RepeatingPattern(b'\x92\x49\x24')
+    size = 2 * COMPLEMENT_CHUNK_SIZE + 5
+    assert filled(ComplementPattern(source), size, 7) == \
+        filled(source, size, 7).translate(INVERT_TABLE)
+
+
+def test_repeating_pattern_shared_between_threads():
+    pattern = RepeatingPattern(b'\x92\x49\x24')
+    sizes = [1 + 997 * i for i in range(64)]
+    errors = []
+    
+    def fill_all(sizes):
+        for size in sizes:
+            try:
+                data = filled(pattern, size, size)
+            except ValueError:  # A tile shorter than the buffer
+                errors.append(size)
+                continue
+            if data != (b'\x92\x49\x24' * (size + 2))[size % 3:][:size]:
+                errors.append(size)
+    
+    # Growing and shrinking requests interleave, so tiles are replaced under readers
+    threads = [threading.Thread(target=fill_all, args=(order,))
+               for order in (sizes, sizes[::-1]) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_numpy_blocks_are_prefixes():
+    pytest.importorskip('numpy')
+    pattern = NumpyRandomPattern(b'numpy')
+    # Only the bytes a write needs are generated, and they match the whole block
+    assert len(pattern._block(0, 4096)) == 4096
+    assert pattern._block(0, 4096) == pattern._block(0, pattern.block_size)[:4096]
+    assert filled(pattern, 3000, 5) == filled(pattern, 1 << 20)[5:3005]
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('keystream', KeystreamPattern),
+    ('urandom', SecureRandomPattern),
+])
+def test_random_source_reaches_every_random_pass(source, expected):
+    patterns = get_pass_plan('NIST Purge').compile(b'seed', source)
+    assert isinstance(patterns[0], expected) and isinstance(patterns[2], expected)
+    assert isinstance(patterns[1], ComplementPattern)
+
+
+def test_unverifiable_random_source_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        WipeEngine('NIST Clear', random_source='urandom', verify='full')
+    path = tmp_path / 'file'
+    path.write_bytes(os.urandom(100000))
+    operation = WipeEngine('NIST Clear', random_source='urandom').wipe([str(path)])
+    assert operation['status'] == 'Completed'
+    assert operation['random_source'] == 'urandom'
+    assert not path.exists()
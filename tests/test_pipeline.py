@@ -0,0 +1,76 @@
+"""Write pipelines and the keystream generator pool"""
+
+import os
+
+import pytest
+
+from certiwipe.engine import WipeEngine
+from certiwipe.patterns import KeystreamPattern
+from certiwipe.pipeline import (GeneratorPool, SharedMemoryPipeline, WritePipeline,
+                                generator_processes)
+
+MIB = 1024 * 1024
+
+needs_pool = pytest.mark.skipif(not generator_processes(2),
+                                reason="multiprocessing.shared_memory is not available")
+
+
+def write_through(pipeline, path, pattern, ranges):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        for start, end in ranges:
+            pipeline.schedule(pattern, start, end)
+        for start, end in ranges:
+            pipeline.write(fd, start, end)
+    finally:
+        os.close(fd)
+        pipeline.close()
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+RANGES = [(0, 3 * MIB + 123), (5 * MIB, 6 * MIB + 7)]
+
+
+def expected(pattern):
+    data = bytearray(RANGES[-1][1])
+    for start, end in RANGES:
+        pattern.fill(memoryview(data)[start:end], start)
+    return bytes(data)
+
+
+def test_write_pipeline_matches_inline_keystream(tmp_path):
+    pattern = KeystreamPattern(b'\x01' * 32)
+    data = write_through(WritePipeline(3, 1 * MIB), str(tmp_path / 'out'), pattern, RANGES)
+    assert data == expected(pattern)
+
+
+@needs_pool
+def test_generator_pool_matches_inline_keystream(tmp_path):
+    pattern = KeystreamPattern(b'\x02' * 32)
+    pool = GeneratorPool(2)
+    try:
+        data = write_through(SharedMemoryPipeline(pool, 4, 1 * MIB), str(tmp_path / 'out'),
+                             pattern, RANGES)
+    finally:
+        pool.shutdown()
+    assert data == expected(pattern)
+
+
+def test_engine_starts_no_pool_by_default():
+    assert WipeEngine().generator_pool() is None
+
+
+@needs_pool
+def test_pool_wipe_passes_full_verification(tmp_path):
+    # Verification regenerates the final pass in this process
+    path = tmp_path / 'large.bin'
+    path.write_bytes(os.urandom(40 * MIB))
+    engine = WipeEngine('DOD 3-Pass', sync_policy='per-file', verify='full',
+                        generator_processes=2)
+    operation = engine.wipe([str(path)])
+    
+    assert operation['status'] == 'Completed', operation['failed_items']
+    assert operation['verification']['mismatches'] == 0
+    assert operation['phases']['generate']['bytes'] > 0
+    assert not path.exists()
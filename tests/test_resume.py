@@ -0,0 +1,100 @@
+"""Resuming interrupted jobs from their journal"""
+
+import os
+import subprocess
+import sys
+
+import certiwipe.sync
+from certiwipe.engine import WipeEngine
+from certiwipe.journal import JobJournal, pending_journals
+from certiwipe.sync import BatchedSync
+
+FILES = 8
+FILE_SIZE = 100 * 1000   # Above the small-file size, so every file is journaled on its own
+KILLED_AFTER = 3
+
+# Wipe with batched sync and die right after the third file is journaled as
+# done - after the batch barrier, before that file is removed
+INTERRUPTED_JOB = """
+import os, sys
+from certiwipe.engine import WipeEngine
+from certiwipe.journal import JobJournal
+from certiwipe.sync import BatchedSync
+
+root, journal_dir, killed_after = sys.argv[1], sys.argv[2], int(sys.argv[3])
+finished = []
+file_done = JobJournal.file_done
+
+def file_done_then_die(self, *args):
+    file_done(self, *args)
+    finished.append(args)
+    if len(finished) == killed_after:
+        os._exit(9)
+
+JobJournal.file_done = file_done_then_die
+engine = WipeEngine('DOD 3-Pass', sync_policy=BatchedSync(batch_files=1000), max_workers=1)
+operation = engine.new_operation([root])
+engine.journal = JobJournal.for_operation(operation, journal_dir)
+engine.run(operation)
+"""
+
+
+def test_resume_after_kill_under_batched_sync(tmp_path):
+    root = tmp_path / 'tree'
+    root.mkdir()
+    for index in range(FILES):
+        (root / f"f{index}").write_bytes(os.urandom(FILE_SIZE))
+    journal_dir = tmp_path / 'journals'
+    package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=package)
+    result = subprocess.run([sys.executable, '-c', INTERRUPTED_JOB, str(root), str(journal_dir),
+                             str(KILLED_AFTER)], env=env)
+    assert result.returncode == 9
+    # Nothing was journaled before the barrier, and the third file was not removed
+    assert len(os.listdir(root)) == FILES - KILLED_AFTER + 1
+    
+    journal = JobJournal.load(pending_journals(str(journal_dir))[-1])
+    assert len(journal.files_done) == KILLED_AFTER
+    engine = WipeEngine.resume(journal)
+    operation = engine.run(journal.operation)
+    
+    assert operation['status'] == 'Completed', operation['failed_items']
+    assert operation['resumed'] == 1
+    assert not root.exists()
+    # Finished files are removed, not overwritten again or counted twice
+    remaining = FILES - KILLED_AFTER
+    assert engine.progress.snapshot()['bytes_written'] == remaining * FILE_SIZE * 3
+    assert operation['total_size'] == FILES * FILE_SIZE
+
+
+def test_finished_files_journaled_after_their_barrier(tmp_path, monkeypatch):
+    root = tmp_path / 'tree'
+    root.mkdir()
+    for index in range(FILES):
+        (root / f"f{index}").write_bytes(os.urandom(FILE_SIZE))
+    events = []
+    syncfs = certiwipe.sync.syncfs
+    file_done = JobJournal.file_done
+    
+    def record_syncfs(fd):
+        syncfs(fd)
+        events.append('barrier')
+    
+    def record_file_done(self, file_path, *args):
+        file_done(self, file_path, *args)
+        events.append(file_path)
+    
+    monkeypatch.setattr(certiwipe.sync, 'syncfs', record_syncfs)
+    monkeypatch.setattr(JobJournal, 'file_done', record_file_done)
+    engine = WipeEngine('DOD 3-Pass', sync_policy=BatchedSync(batch_files=3))
+    operation = engine.new_operation([str(root)])
+    engine.journal = JobJournal.for_operation(operation, str(tmp_path / 'journals'))
+    engine.run(operation)
+    
+    assert operation['status'] == 'Completed', operation['failed_items']
+    assert len(events) - events.count('barrier') == FILES
+    # A batch of 3 is journaled only after the syncfs that covers it
+    for position, event in enumerate(events):
+        if event != 'barrier':
+            finished = position + 1 - events[:position + 1].count('barrier')
+            assert events[:position].count('barrier') * 3 >= finished
@@ -0,0 +1,76 @@
+"""Small-file fast path: per-directory batches of small files"""
+
+import os
+
+import pytest
+
+import certiwipe.sync
+from certiwipe.engine import WipeEngine
+
+resource = pytest.importorskip('resource')
+
+
+def make_tree(root, dirs, files, size=1000):
+    for d in range(dirs):
+        directory = root / f"d{d}"
+        directory.mkdir(parents=True)
+        for f in range(files):
+            (directory / f"f{f}").write_bytes(os.urandom(size))
+
+
+def test_batches_stay_within_open_file_limit(tmp_path):
+    root = tmp_path / 'tree'
+    make_tree(root, dirs=20, files=128)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (128, hard))
+    try:
+        # 8 NVMe slots x 128 files would need far more than 128 descriptors
+        engine = WipeEngine('DOD 3-Pass', storage_type='NVMe', max_workers=8,
+                            sync_policy='per-file')
+        operation = engine.wipe([str(root)])
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    
+    assert operation['status'] == 'Completed', operation['failed_items']
+    assert operation['total_size'] == 20 * 128 * 1000
+    assert not root.exists()
+
+
+def test_batch_overwrites_every_pass(tmp_path):
+    root = tmp_path / 'tree'
+    make_tree(root, dirs=2, files=10, size=5000)
+    engine = WipeEngine('DOD 3-Pass', sync_policy='per-pass')
+    operation = engine.wipe([str(root)])
+    
+    assert operation['status'] == 'Completed'
+    assert engine.progress.snapshot()['bytes_written'] == 3 * 20 * 5000
+    assert engine.progress.snapshot()['files_done'] == 20
+    assert not root.exists()
+
+
+@pytest.mark.parametrize('policy, syncfs_calls, fdatasync_calls', [
+    ('batched', 4, 0),  # One syncfs per batch, as for large files
+    ('per-pass', 12, 0),  # One syncfs per batch and pass
+    ('direct', 4, 0),
+    ('per-file', 0, 500),  # Only per-file keeps an fdatasync per file
+])
+def test_batch_barriers_follow_sync_policy(tmp_path, monkeypatch, policy, syncfs_calls,
+                                           fdatasync_calls):
+    root = tmp_path / 'tree'
+    make_tree(root, dirs=1, files=500)
+    calls = {'syncfs': 0, 'fdatasync': 0}
+    
+    def counted(name, function):
+        def call(fd):
+            calls[name] += 1
+            return function(fd)
+        return call
+    
+    for name in calls:
+        monkeypatch.setattr(certiwipe.sync, name, counted(name, getattr(certiwipe.sync, name)))
+    engine = WipeEngine('DOD 3-Pass', sync_policy=policy)
+    operation = engine.wipe([str(root)])
+    
+    assert operation['status'] == 'Completed', operation['failed_items']
+    assert engine.small_file_batch == 128  # 500 files make 4 batches
+    assert calls == {'syncfs': syncfs_calls, 'fdatasync': fdatasync_calls}
@@ -0,0 +1,28 @@
+"""Durability policies"""
+
+import os
+
+import pytest
+
+from certiwipe.engine import WipeEngine
+from certiwipe.sync import SYNC_POLICIES, create_sync_policy
+
+FILE_SIZE = 2 * 1024 * 1024   # Large enough for the direct policy's O_DIRECT path
+
+
+@pytest.mark.skipif(not hasattr(os, 'O_NOFOLLOW'), reason="needs O_NOFOLLOW")
+@pytest.mark.parametrize('policy', list(SYNC_POLICIES))
+def test_symlink_swapped_in_after_scan_is_not_followed(tmp_path, policy):
+    victim = tmp_path / 'victim'
+    data = os.urandom(FILE_SIZE)
+    victim.write_bytes(data)
+    path = tmp_path / 'file'
+    path.symlink_to(victim)
+    
+    sync_policy = create_sync_policy(policy, **({'min_size': 1} if policy == 'direct' else {}))
+    with pytest.raises(OSError):
+        sync_policy.open_file(str(path), FILE_SIZE)
+    engine = WipeEngine('DOD 3-Pass', sync_policy=sync_policy)
+    with pytest.raises(OSError):
+        engine.wipe_file(str(path), FILE_SIZE)  # Sized while it was still a file
+    assert victim.read_bytes() == data